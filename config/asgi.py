@@ -5,6 +5,16 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
+
+Production запуск (вместо manage.py runserver):
+
+    uvicorn config.asgi:application --host 0.0.0.0 --port 8000 --workers 4
+
+Асинхронные списки (/api/async/listings/, .../bookings/, .../reviews/) выполняются
+в цикле событий воркера и не занимают поток на время ожидания клиента.
+Синхронные DRF представления под ASGI тоже работают, но каждое в отдельном потоке
+(как под WSGI). Число воркеров — по числу ядер: ORM и сериализация используют CPU.
+При DEBUG статические файлы отдаёт сам Django (ASGIStaticFilesHandler).
 """
 
 import os
@@ -14,3 +24,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402  (после настройки Django)
+
+if settings.DEBUG:
+    from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
+
+    application = ASGIStaticFilesHandler(application)
@@ -10,17 +10,20 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import sys
 from pathlib import Path
 
-import pymysql
-pymysql.install_as_MySQLdb()
+# Драйвер MySQL: C-расширение mysqlclient, если установлено, иначе PyMySQL под именем MySQLdb
+try:
+    import MySQLdb  # noqa: F401
+except ImportError:
+    import pymysql
+    pymysql.install_as_MySQLdb()
 import os
 from environ import  Env
 env = Env()
 
 # from dotenv import load_dotenv
-from pathlib import Path
-import pymysql
 # load_dotenv()
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -35,6 +38,9 @@ SECRET_KEY = 'django-insecure-u!u%56$)s9jtq^^nlj+(k#%ih$+eijmez^)l!4-0h+dnm9_tt8
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
+# Запуск `manage.py test`: фоновые записи (буфер поисков) выполняются сразу, в транзакции теста
+TESTING = sys.argv[1:2] == ['test']
+
 ALLOWED_HOSTS = []
 
 # Application definition
@@ -55,20 +61,28 @@ INSTALLED_APPS = [
     'rest_framework',
 
     'drf_yasg',
-    'django_extensions',
 
     'listings_app.apps.ListingsAppConfig'
 ]
 
+# django_extensions (shell_plus, runserver_plus, ...) нужен только для разработки
+if env.bool('DJANGO_EXTENSIONS', default=DEBUG):
+    INSTALLED_APPS.insert(INSTALLED_APPS.index('listings_app.apps.ListingsAppConfig'), 'django_extensions')
+
 REST_FRAMEWORK = {
 
     # 'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'listings_app.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Первый рендерер — ответ по умолчанию; JSONRenderer вместо ORJSONRenderer даёт stdlib json
+    'DEFAULT_RENDERER_CLASSES': [
+        'listings_app.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 # SPECTACULAR_SETTINGS = {
 #     'TITLE': 'Your API Title',
@@ -82,6 +96,10 @@ from datetime import timedelta
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Первым после Security: все чтения запроса (сессия, пользователь) идут в нужную БД
+    'listings_app.middleware.ReplicaPinningMiddleware',
+    # Сжатие gzip/brotli ответов API (до остальных middleware — видит окончательное тело)
+    'listings_app.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -99,7 +117,23 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    # Ротация с отзывом старого токена без приложения token_blacklist
+    'TOKEN_REFRESH_SERIALIZER': 'listings_app.serializers.register_login.RevocableTokenRefreshSerializer',
 }
+
+# Размер LRU-кэша проверенных JWT (общий для middleware и CachedJWTAuthentication)
+JWT_VERIFIED_TOKEN_CACHE_SIZE = 10000
+
+# Кэш пользователей для аутентификации в памяти процесса: размер и время жизни записи (секунды)
+AUTH_USER_CACHE_SIZE = 10000
+AUTH_USER_CACHE_TIMEOUT = 60
+
+# Отзыв refresh токенов: как часто подтягивать отзывы других процессов,
+# на сколько перечитывать назад (запас на долгие транзакции с отзывом)
+# и как часто удалять истёкшие записи с перестройкой фильтра (секунды)
+TOKEN_REVOCATION_SYNC_INTERVAL = 5
+TOKEN_REVOCATION_SYNC_OVERLAP = 60
+TOKEN_REVOCATION_REBUILD_INTERVAL = 60 * 60
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
@@ -128,26 +162,95 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Сколько секунд ждать блокировку записи, а не падать с "database is locked"
+            # (транзакции бронирования берут её сразу, см. utils.listing_lock)
+            'timeout': 20,
+        },
+        # Тестовая БД в файле: in-memory SQLite с общим кэшем блокирует таблицы без ожидания
+        # (timeout не работает), и параллельные тесты бронирования падали бы с "table is locked"
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
-# DATABASES = {
-#     'default': {
-#         'ENGINE': 'django.db.backends.mysql',
-#         'NAME': env('DB_NAME'),
-#         'USER': env('DB_USER'),
-#         'PASSWORD': env('DB_PASSWORD'),
-#         'HOST': env('DB_HOST'),
-#         'PORT': env('DB_PORT'),
-#         'OPTIONS': {
-#             'ssl': {
-#                 'check_hostname': False,  # Отключение проверки имени хоста
-#             },
-#         },
-#     }
-# }
 
+# Production профиль: MYSQL=True и DB_* из окружения (см. docker-compose.yml)
+if env.bool('MYSQL', default=False):
+    DATABASES = {
+        'default': {
+            # Пул соединений процесса (listings_app.db.pool); DB_POOL=False — обычный бэкенд Django
+            'ENGINE': 'listings_app.db.mysql' if env.bool('DB_POOL', default=True) else 'django.db.backends.mysql',
+            'NAME': env('DB_NAME'),
+            'USER': env('DB_USER'),
+            'PASSWORD': env('DB_PASSWORD'),
+            'HOST': env('DB_HOST'),
+            'PORT': env('DB_PORT', default='3306'),
+            # С пулом соединение возвращается в пул в конце запроса (0),
+            # без пула — остаётся открытым у потока воркера на DB_CONN_MAX_AGE секунд
+            'CONN_MAX_AGE': env.int('DB_CONN_MAX_AGE', default=0 if env.bool('DB_POOL', default=True) else 60),
+            # Перед повторным использованием соединение проверяется ping, «мёртвое» переоткрывается
+            'CONN_HEALTH_CHECKS': env.bool('DB_CONN_HEALTH_CHECKS', default=True),
+            'POOL': {
+                'MAX_SIZE': env.int('DB_POOL_MAX_SIZE', default=10),
+                'MAX_LIFETIME': env.int('DB_POOL_MAX_LIFETIME', default=600),
+                'MAX_IDLE_TIME': env.int('DB_POOL_MAX_IDLE_TIME', default=60),
+            },
+            'OPTIONS': {
+                'charset': 'utf8mb4',
+                'connect_timeout': env.int('DB_CONNECT_TIMEOUT', default=5),
+                'ssl': {
+                    'check_hostname': False,  # Отключение проверки имени хоста
+                },
+            },
+        }
+    }
+
+
+# Реплики только для чтения (listings_app.db.router.PrimaryReplicaRouter):
+# - MySQL: DB_REPLICA_HOSTS=host1,host2 — те же настройки, что у primary, другой HOST;
+# - локально: SQLITE_REPLICA_NAME=replica.sqlite3 — второй файл SQLite
+#   (копия primary, обновляется командой sync_sqlite_replica).
+if env.bool('MYSQL', default=False):
+    for index, host in enumerate(env.list('DB_REPLICA_HOSTS', default=[]), start=1):
+        DATABASES[f'replica_{index}'] = {**DATABASES['default'], 'HOST': host, 'TEST': {'MIRROR': 'default'}}
+elif env('SQLITE_REPLICA_NAME', default=None):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': BASE_DIR / env('SQLITE_REPLICA_NAME'),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['listings_app.db.router.PrimaryReplicaRouter']
+# Сколько секунд после записи клиент читает из primary (запас на отставание реплики)
+DATABASE_REPLICA_STICKY_SECONDS = env.int('DATABASE_REPLICA_STICKY_SECONDS', default=5)
+
+# Ответы меньше этого размера (байт) не сжимаются: выигрыш меньше затрат на сжатие
+RESPONSE_COMPRESSION_MIN_SIZE = env.int('RESPONSE_COMPRESSION_MIN_SIZE', default=1024)
+
+
+
+# Кэш поиска, календаря и отметки записей для реплик сбрасываются версиями в кэше,
+# поэтому при нескольких воркерах кэш должен быть общим: CACHE_URL=redis://redis:6379/1.
+# LocMemCache по умолчанию — только для разработки в одном процессе (см. listings_app.checks)
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://listings-cache'),
+}
+
+# Время жизни закэшированных результатов поиска объявлений (секунды)
+LISTING_SEARCH_CACHE_TIMEOUT = 60
 
+# Время жизни месяцев календаря занятости (секунды); сбрасываются при изменении бронирований.
+# С кэшем процесса (LocMemCache) сброс не доходит до других воркеров, поэтому месяцы живут секунды
+LISTING_CALENDAR_CACHE_TIMEOUT = 60 * 60 * 24
+LISTING_CALENDAR_LOCAL_CACHE_TIMEOUT = 5
+
+# Буфер логирования поисковых запросов: интервал сброса в БД (секунды, 0 — сразу)
+# и количество уникальных запросов, после которого сброс происходит немедленно.
+# В тестах 0: фоновый поток писал бы своим соединением мимо отката TestCase,
+# а atexit — уже после удаления тестовой БД, в БД разработки
+SEARCH_QUERY_FLUSH_INTERVAL = 0 if TESTING else 5
+SEARCH_QUERY_BUFFER_SIZE = 1000
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -156,6 +259,17 @@ AUTHENTICATION_LOCKOUT_THRESHOLD = 5
 AUTHENTICATION_LOCKOUT_DURATION = 300
 AUTH_PASSWORD_MIN_LENGTH = 8
 
+# Вход по email одним запросом; ModelBackend оставлен для входа в админку по username
+AUTHENTICATION_BACKENDS = [
+    'listings_app.authentication.EmailBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# Пул проверки/хеширования паролей для login/register: потоки (по умолчанию — число CPU)
+# и предел задач в пуле, сверх которого отвечаем 503 с Retry-After
+PASSWORD_HASHING_WORKERS = None
+PASSWORD_HASHING_MAX_PENDING = 64
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -196,8 +310,10 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # drf_yasg настройки для Swagger
 SWAGGER_SETTINGS = {
-    'DEFAULT_INFO': 'config.urls.schema_view',  # Путь до схемы в urls.py
+    'DEFAULT_INFO': 'listings_app.utils.openapi_info.API_INFO',
     'USE_SESSION_AUTH': False,
+    # Swagger UI берёт готовую схему, а не генерирует её заново через ?format=openapi
+    'SPEC_URL': ('schema-json', {'format': '.json'}),
     'SECURITY_DEFINITIONS': {
         'Bearer': {
             'type': 'apiKey',
@@ -207,6 +323,16 @@ SWAGGER_SETTINGS = {
         }
     },
 }
+
+REDOC_SETTINGS = {
+    'SPEC_URL': ('schema-json', {'format': '.json'}),
+}
+
+# Файл OpenAPI схемы, созданный при сборке (manage.py generate_openapi_schema);
+# рядом лежит .yaml. Без файла схема генерируется при первом запросе к /api/swagger.json.
+OPENAPI_SCHEMA_FILE = env('OPENAPI_SCHEMA_FILE', default=None)
+# Базовый URL API для host/schemes схемы; без него Swagger UI берёт адрес страницы
+OPENAPI_SCHEMA_URL = env('OPENAPI_SCHEMA_URL', default=None)
 import os
 
 # LOGGING = {
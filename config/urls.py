@@ -2,32 +2,17 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include, re_path
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-from rest_framework.permissions import AllowAny
 
-# Настройка Swagger для drf_yasg
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Your API Title",
-        default_version='v1',
-        description="API documentation",
-        terms_of_service="https://www.example.com/terms/",
-        contact=openapi.Contact(email="contact@example.com"),
-        license=openapi.License(name="BSD License"),
-    ),
-    public=True,
-    permission_classes=(AllowAny,),
-)
+from listings_app.views.schema import openapi_schema, schema_ui
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('listings_app.urls')),  # Подключение маршрутов приложения
 
-    # Swagger и Redoc маршруты
-    re_path(r'^api/swagger(?P<format>\.json|\.yaml)$', schema_view.without_ui(cache_timeout=0), name='schema-json'),
-    path('api/swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('api/redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    # Swagger и Redoc маршруты: схема генерируется один раз (см. listings_app.utils.openapi_schema)
+    re_path(r'^api/swagger(?P<format>\.json|\.yaml)$', openapi_schema, name='schema-json'),
+    path('api/swagger/', schema_ui, {'renderer': 'swagger'}, name='schema-swagger-ui'),
+    path('api/redoc/', schema_ui, {'renderer': 'redoc'}, name='schema-redoc'),
 ]
 
 # Настройка для статических файлов в режиме DEBUG
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ListingsAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'listings_app'
+
+    def ready(self):
+        from listings_app import checks, signals  # noqa: F401
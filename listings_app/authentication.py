@@ -0,0 +1,147 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Value
+from django.db.models.functions import Lower
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from listings_app.utils.token_cache import get_verified_token
+from listings_app.utils.user_cache import user_cache
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication, которая не проверяет подпись повторно:
+    - токен, уже проверенный JWTAuthenticationMiddleware в этом запросе, берётся с request;
+    - иначе используется общий LRU-кэш проверенных токенов (utils.token_cache).
+    Пользователь берётся из кэша процесса (utils.user_cache), а не запросом к auth_user.
+    """
+
+    def authenticate(self, request):
+        self._request = request
+        try:
+            return super().authenticate(request)
+        finally:
+            self._request = None
+
+    def get_validated_token(self, raw_token):
+        request = getattr(self, '_request', None)
+        verified = getattr(getattr(request, '_request', request), '_verified_access_token', None)
+        if isinstance(raw_token, bytes):
+            raw_token = raw_token.decode()
+        if verified is not None and verified[0] == raw_token:
+            return verified[1]
+
+        messages = []
+        for AuthToken in api_settings.AUTH_TOKEN_CLASSES:
+            try:
+                return get_verified_token(raw_token, AuthToken)
+            except TokenError as e:
+                messages.append(
+                    {
+                        "token_class": AuthToken.__name__,
+                        "token_type": AuthToken.token_type,
+                        "message": e.args[0],
+                    }
+                )
+
+        raise InvalidToken(
+            {
+                "detail": _("Given token not valid for any token type"),
+                "messages": messages,
+            }
+        )
+
+    async def aauthenticate(self, request):
+        """
+        Асинхронный вариант authenticate для async представлений:
+        проверка токена — из кэша, пользователь — через user_cache.aget.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        self._request = request
+        try:
+            validated_token = self.get_validated_token(raw_token)
+        finally:
+            self._request = None
+
+        if api_settings.USER_ID_FIELD not in ('id', 'pk'):
+            return await sync_to_async(super().get_user)(validated_token), validated_token
+
+        try:
+            user = await user_cache.aget(self._get_user_id(validated_token))
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        return self._check_user(user, validated_token), validated_token
+
+    def _get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_FIELD not in ('id', 'pk'):
+            return super().get_user(validated_token)
+
+        try:
+            user = user_cache.get(self._get_user_id(validated_token))
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        return self._check_user(user, validated_token)
+
+    def _check_user(self, user, validated_token):
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
+
+
+def get_user_by_email(email):
+    """
+    Пользователь по email без учёта регистра или None.
+    LOWER(email) = LOWER(%s) использует индекс auth_user_email_lower_idx.
+    """
+    return (
+        get_user_model().objects
+        .alias(email_lower=Lower('email'))
+        .filter(email_lower=Lower(Value(email)))
+        .first()
+    )
+
+
+class EmailBackend(ModelBackend):
+    """
+    Аутентификация по email и паролю одним запросом к auth_user
+    (вместо поиска username по email и повторной загрузки пользователя).
+    """
+
+    def authenticate(self, request, email=None, password=None, **kwargs):
+        if not email or password is None:
+            return None
+        user = get_user_by_email(email)
+        if user is None:
+            # Хешируем впустую, чтобы время ответа не выдавало существование email
+            get_user_model()().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_shared_cache():
+    """Кэш общий для всех воркеров (Redis, memcached, БД, файлы)."""
+    return settings.CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS
+
+
+@register(deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if is_shared_cache():
+        return []
+    return [Warning(
+        'The default cache is local to each process.',
+        hint=(
+            'Search result and calendar invalidation only reaches the worker that handled '
+            'the write. Set CACHE_URL (e.g. redis://redis:6379/1) when running several workers.'
+        ),
+        id='listings_app.W001',
+    )]
@@ -0,0 +1,20 @@
+from django.db.backends.mysql.base import Database
+from django.db.backends.mysql.base import DatabaseWrapper as MySQLDatabaseWrapper
+
+from listings_app.db.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, MySQLDatabaseWrapper):
+    """
+    MySQL бэкенд с пулом соединений процесса
+    (ENGINE = 'listings_app.db.mysql', см. listings_app.db.pool).
+    """
+
+    def is_raw_connection_usable(self, connection):
+        try:
+            # Без переподключения: PyMySQL по умолчанию молча открыл бы новое соединение,
+            # а init_connection_state для соединения из пула не выполняется
+            connection.ping(False)
+        except Database.Error:
+            return False
+        return True
@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import deque
+
+
+class ConnectionPool:
+    """
+    Пул открытых соединений с БД на процесс.
+    - acquire() отдаёт свободное соединение (или открывает новое через connect);
+    - release() возвращает соединение после запроса вместо закрытия TCP;
+    - соединения старше max_lifetime или простоявшие дольше max_idle_time
+      закрываются, а не выдаются (сервер мог закрыть их сам по wait_timeout);
+    - при health_checks свободное соединение проверяется ping перед выдачей.
+    Храним не больше max_size свободных соединений, лишние закрываются.
+    """
+
+    def __init__(self, max_size=10, max_lifetime=600, max_idle_time=60, health_checks=True):
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.max_idle_time = max_idle_time
+        self.health_checks = health_checks
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+
+    def acquire(self, connect, is_usable):
+        """(соединение, время открытия, взято ли из пула)."""
+        while True:
+            with self._lock:
+                entry = self._idle.pop() if self._idle else None
+            if entry is None:
+                break
+            connection, created_at, released_at = entry
+            now = time.monotonic()
+            if (now - created_at >= self.max_lifetime or now - released_at >= self.max_idle_time
+                    or (self.health_checks and not is_usable(connection))):
+                self._discard(connection)
+                continue
+            with self._lock:
+                self.reused += 1
+            return connection, created_at, True
+
+        connection = connect()
+        with self._lock:
+            self.created += 1
+        return connection, time.monotonic(), False
+
+    def release(self, connection, created_at):
+        entry = (connection, created_at, time.monotonic())
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                # Последним вернули — первым выдадим: «тёплые» соединения используются чаще,
+                # редко нужные доживают до max_idle_time и закрываются
+                self._idle.append(entry)
+                return
+        self._discard(connection)
+
+    def discard(self, connection):
+        self._discard(connection)
+
+    def _discard(self, connection):
+        with self._lock:
+            self.discarded += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def clear(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for connection, created_at, released_at in idle:
+            self._discard(connection)
+
+    def get_stats(self):
+        return {
+            'idle': len(self._idle),
+            'max_size': self.max_size,
+            'created': self.created,
+            'reused': self.reused,
+            'discarded': self.discarded,
+        }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, options):
+    """Пул для алиаса БД (один на процесс, общий для всех потоков)."""
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None:
+            pool = _pools[alias] = ConnectionPool(**options)
+        return pool
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Подмешивается к DatabaseWrapper бэкенда: get_new_connection берёт соединение
+    из пула, а close() возвращает его туда. Настройки — ключ POOL в DATABASES:
+    {'MAX_SIZE': 10, 'MAX_LIFETIME': 600, 'MAX_IDLE_TIME': 60}; проверка ping
+    включается тем же CONN_HEALTH_CHECKS. Работает и при CONN_MAX_AGE = 0
+    (соединение отдаётся в пул в конце каждого запроса), и под ASGI,
+    где у каждого запроса свой поток и постоянные соединения Django не переиспользуются.
+    """
+
+    @property
+    def pool(self):
+        options = self.settings_dict.get('POOL') or {}
+        return get_pool(self.alias, {
+            'max_size': options.get('MAX_SIZE', 10),
+            'max_lifetime': options.get('MAX_LIFETIME', 600),
+            'max_idle_time': options.get('MAX_IDLE_TIME', 60),
+            'health_checks': self.settings_dict['CONN_HEALTH_CHECKS'],
+        })
+
+    def get_new_connection(self, conn_params):
+        connection, self._pool_created_at, self._pool_reused = self.pool.acquire(
+            lambda: super(PooledDatabaseWrapperMixin, self).get_new_connection(conn_params),
+            self.is_raw_connection_usable,
+        )
+        return connection
+
+    def init_connection_state(self):
+        # Настройки сессии (SQL_AUTO_IS_NULL, уровень изоляции) сохраняются в соединении,
+        # для соединения из пула повторно их не выполняем
+        if not self._pool_reused:
+            super().init_connection_state()
+
+    def is_raw_connection_usable(self, connection):
+        raise NotImplementedError
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # Соединение посреди транзакции или после ошибки БД в пул не возвращаем
+        if self.in_atomic_block or self.errors_occurred:
+            self.pool.discard(self.connection)
+            return
+        try:
+            if not self.autocommit:
+                self.connection.rollback()
+        except Exception:
+            self.pool.discard(self.connection)
+            return
+        self.pool.release(self.connection, self._pool_created_at)
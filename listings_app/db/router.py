@@ -0,0 +1,77 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Все чтения текущего запроса/контекста идут в primary (небезопасный метод или «липкое» окно)
+_pinned = ContextVar('db_pinned_to_primary', default=False)
+# В текущем запросе была запись — клиенту выставляется окно чтения из primary
+_wrote = ContextVar('db_wrote', default=False)
+
+
+def get_replicas():
+    return [alias for alias in getattr(settings, 'DATABASE_REPLICAS', []) if alias in settings.DATABASES]
+
+
+def set_pinned(pinned):
+    """Закрепляет (или открепляет) чтения текущего контекста за primary."""
+    _pinned.set(pinned)
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+def get_sticky_seconds():
+    return getattr(settings, 'DATABASE_REPLICA_STICKY_SECONDS', 5)
+
+
+def reset_writes():
+    _wrote.set(False)
+
+
+def has_written():
+    return _wrote.get()
+
+
+class PrimaryReplicaRouter:
+    """
+    Записи — в primary (default), чтения — в случайную реплику из DATABASE_REPLICAS.
+    Чтения остаются в primary, если:
+    - контекст закреплён за primary (ReplicaPinningMiddleware: POST/PATCH/DELETE
+      или «липкое» окно после записи этого клиента);
+    - идёт транзакция на primary (select_for_update, проверки перед записью);
+    - модель в primary_models (отзыв токенов не должен отставать от реплики).
+    Без настроенных реплик всё идёт в default, как раньше.
+    """
+    primary_models = {'listings_app.revokedtoken'}
+
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if not replicas:
+            return None
+        if (_pinned.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block
+                or model._meta.label_lower in self.primary_models):
+            return DEFAULT_DB_ALIAS
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Связанные объекты читаем из той же БД, что и сам объект
+            return instance._state.db
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема реплик приходит репликацией (локально — командой sync_sqlite_replica)
+        if db in get_replicas():
+            return False
+        return None
@@ -0,0 +1,104 @@
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Count, Exists, OuterRef, Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import SearchFilter
+
+from listings_app.models import Booking, ListingTrigram
+from listings_app.utils.full_text_search import full_text_search
+from listings_app.utils.text_normalization import normalize_text, trigrams
+
+MATCH_MODES = ('contains', 'prefix', 'exact')
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    Замена SearchFilter: `?search=` ищет по полнотекстовому индексу
+    (title, description, location, city) вместо LIKE '%…%' по каждому полю.
+    Результаты ранжируются по релевантности через аннотацию `search_rank`.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        return full_text_search(queryset, query)
+
+
+def filter_normalized(queryset, field, value, mode='contains'):
+    """
+    Фильтр по нормализованной копии поля (`city` / `location`).
+    - exact: равенство по индексу `<field>_normalized`.
+    - prefix: диапазон [value, value + '\\uffff') по тому же индексу.
+    - contains: кандидаты из триграммного индекса, затем точная проверка подстроки.
+      Для запросов короче трёх символов используется prefix.
+    """
+    value = normalize_text(value)
+    column = f'{field}_normalized'
+    if not value:
+        return queryset
+
+    if mode == 'exact':
+        return queryset.filter(**{column: value})
+
+    grams = trigrams(value)
+    if mode == 'prefix' or not grams:
+        return queryset.filter(**{f'{column}__gte': value, f'{column}__lt': value + '\uffff'})
+
+    candidates = (
+        ListingTrigram.objects.filter(field=field, trigram__in=grams)
+        .values('listing_id')
+        .annotate(hits=Count('trigram'))
+        .filter(hits=len(grams))
+        .values('listing_id')
+    )
+    return queryset.filter(id__in=candidates, **{f'{column}__contains': value})
+
+
+def parse_stay_dates(check_in, check_out):
+    """
+    Проверяет пару check_in/check_out (YYYY-MM-DD) и возвращает даты.
+    """
+    if not check_in or not check_out:
+        raise ValidationError('check_in and check_out must be provided together.')
+    try:
+        check_in = date.fromisoformat(check_in)
+        check_out = date.fromisoformat(check_out)
+    except ValueError:
+        raise ValidationError('check_in and check_out must be dates in YYYY-MM-DD format.')
+    if check_in >= check_out:
+        raise ValidationError('check_in must be before check_out.')
+    return check_in, check_out
+
+
+def parse_rating(value):
+    """
+    Проверяет rating_min (число) и возвращает Decimal.
+    """
+    try:
+        rating = Decimal(value)
+    except InvalidOperation:
+        raise ValidationError('rating_min must be a number.')
+    if not rating.is_finite():
+        raise ValidationError('rating_min must be a number.')
+    return rating
+
+
+def filter_available(queryset, check_in, check_out):
+    """
+    Оставляет объявления, свободные с check_in по check_out:
+    - период попадает в available_from/available_until (если они заданы);
+    - нет неотменённого бронирования, пересекающегося с периодом.
+    Бронирования отсекаются одним NOT EXISTS по индексу
+    Booking(listing, is_canceled, start_date, end_date).
+    """
+    overlapping = Booking.objects.filter(
+        listing=OuterRef('pk'),
+        is_canceled=False,
+        start_date__lt=check_out,
+        end_date__gt=check_in,
+    )
+    return queryset.filter(
+        Q(available_from__isnull=True) | Q(available_from__lte=check_in),
+        Q(available_until__isnull=True) | Q(available_until__gte=check_out),
+        ~Exists(overlapping),
+    )
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from listings_app.models import Listing, ListingTrigram
+from listings_app.utils.text_normalization import normalize_text
+
+
+class Command(BaseCommand):
+    help = 'Заполняет city_normalized/location_normalized и триграммный индекс для существующих объявлений.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        total = 0
+
+        while True:
+            # Идём по id, а не через OFFSET, чтобы каждая пачка стоила одинаково
+            batch = list(
+                Listing.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .only('id', 'location', 'city')[:batch_size]
+            )
+            if not batch:
+                break
+
+            for listing in batch:
+                listing.location_normalized = normalize_text(listing.location)
+                listing.city_normalized = normalize_text(listing.city)
+
+            with transaction.atomic():
+                Listing.objects.bulk_update(batch, ['location_normalized', 'city_normalized'])
+                ListingTrigram.objects.filter(listing__in=batch).delete()
+                ListingTrigram.objects.bulk_create(
+                    [trigram for listing in batch for trigram in ListingTrigram.build_for(listing)],
+                    batch_size=batch_size
+                )
+
+            total += len(batch)
+            last_id = batch[-1].id
+            self.stdout.write(f'Processed {total} listings')
+
+        self.stdout.write(self.style.SUCCESS(f'Backfilled {total} listings'))
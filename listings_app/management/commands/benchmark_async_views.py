@@ -0,0 +1,150 @@
+import asyncio
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from listings_app.models import Booking, Listing, Review
+
+USERNAME_PREFIX = 'benchmark_async_views'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает запросы в секунду для списков объявлений, бронирований и отзывов: '
+        'синхронные DRF представления через WSGI (пул потоков, как у sync воркера) '
+        'и async варианты /api/async/... через ASGI (один цикл событий). '
+        '--client-delay имитирует медленного клиента, который держит воркер. '
+        'Тестовые данные удаляются после замера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Запросов на каждый endpoint')
+        parser.add_argument('--threads', type=int, default=4, help='Потоков WSGI воркера')
+        parser.add_argument('--concurrency', type=int, default=50, help='Одновременных клиентов ASGI')
+        parser.add_argument('--client-delay', type=float, default=100, help='Задержка клиента, мс')
+        parser.add_argument('--rows', type=int, default=200)
+
+    def handle(self, *args, **options):
+        landlord, guest, listings = self.create_data(options['rows'])
+        # Тестовые клиенты Django всегда шлют Host: testserver
+        allowed_hosts = override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'])
+        allowed_hosts.enable()
+        try:
+            token = str(AccessToken.for_user(guest))
+            listing = listings[0]
+            endpoints = [
+                ('listings', 'listings/?page_size=20'),
+                ('bookings', f'listings/{listing.pk}/bookings/'),
+                ('reviews', f'listings/{listing.pk}/reviews/'),
+            ]
+            delay = options['client_delay'] / 1000
+            for name, path in endpoints:
+                wsgi = self.run_wsgi(f'/api/{path}', token, options['requests'], options['threads'], delay)
+                asgi = asyncio.run(self.run_asgi(
+                    f'/api/async/{path}', token, options['requests'], options['concurrency'], delay
+                ))
+                self.stdout.write(
+                    f'{name:<10} WSGI {wsgi:8.1f} req/s   ASGI {asgi:8.1f} req/s   x{asgi / wsgi:.2f}'
+                )
+        finally:
+            allowed_hosts.disable()
+            self.delete_data(landlord, guest, listings)
+
+    def create_data(self, rows):
+        landlord = User.objects.create_user(username=f'{USERNAME_PREFIX}_landlord', password='benchmark')
+        guest = User.objects.create_user(username=f'{USERNAME_PREFIX}_guest', password='benchmark')
+        listings = Listing.objects.bulk_create([
+            Listing(
+                owner=landlord,
+                title=f'Benchmark listing {index}',
+                description='Bright apartment close to the park.',
+                location='Mitte',
+                city='Berlin',
+                rooms=1 + index % 5,
+                property_type='apartment',
+                price=Decimal('500.00') + index,
+            )
+            for index in range(max(rows, 1))
+        ], batch_size=500)
+        start = date(2000, 1, 1)
+        Booking.objects.bulk_create([
+            Booking(
+                listing=listings[0],
+                owner=guest,
+                start_date=start + timedelta(days=index * 3),
+                end_date=start + timedelta(days=index * 3 + 2),
+                is_confirmed=True,
+            )
+            for index in range(20)
+        ])
+        Review.objects.bulk_create([
+            Review(listing=listings[0], user=guest, rating=1 + index % 5, comment='Benchmark review')
+            for index in range(20)
+        ])
+        return landlord, guest, listings
+
+    def delete_data(self, landlord, guest, listings):
+        Booking.objects.filter(listing__in=listings).delete()
+        Review.objects.filter(listing__in=listings).delete()
+        Listing.objects.filter(pk__in=[listing.pk for listing in listings]).delete()
+        User.objects.filter(pk__in=[landlord.pk, guest.pk]).delete()
+
+    @staticmethod
+    def get_headers(token):
+        return {'Authorization': f'Bearer {token}'}
+
+    def check_status(self, path, status_code):
+        if status_code != 200:
+            raise CommandError(f'{path} returned {status_code}')
+
+    def run_wsgi(self, path, token, requests, threads, delay):
+        """Каждый поток — поток sync воркера: пока клиент медленный, поток занят."""
+        errors = []
+
+        def worker(count):
+            client = Client(headers=self.get_headers(token))
+            try:
+                for _ in range(count):
+                    time.sleep(delay)
+                    status_code = client.get(path).status_code
+                    if status_code != 200:
+                        errors.append(status_code)
+            finally:
+                connection.close()
+
+        counts = [requests // threads + (index < requests % threads) for index in range(threads)]
+        workers = [threading.Thread(target=worker, args=(count,)) for count in counts]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        if errors:
+            self.check_status(path, errors[0])
+        return requests / elapsed
+
+    async def run_asgi(self, path, token, requests, concurrency, delay):
+        """Клиенты ждут в цикле событий, не занимая потоков."""
+        client = AsyncClient()
+        headers = self.get_headers(token)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with semaphore:
+                await asyncio.sleep(delay)
+                response = await client.get(path, headers=headers)
+                self.check_status(path, response.status_code)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        return requests / (time.perf_counter() - started)
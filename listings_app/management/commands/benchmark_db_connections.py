@@ -0,0 +1,101 @@
+import copy
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.utils import load_backend
+
+POOLED_ENGINES = {
+    'django.db.backends.mysql': 'listings_app.db.mysql',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Задержка «запроса» к БД (request_started → N запросов → request_finished, '
+        'как у представления) для трёх режимов: новое соединение на каждый запрос, '
+        'постоянное соединение (CONN_MAX_AGE) и пул соединений (listings_app.db.pool). '
+        'Каждый режим — с потоком воркера (WSGI) и с новым потоком на запрос (ASGI). '
+        'Используются настройки БД --database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--queries', type=int, default=3, help='Запросов к БД на один запрос')
+        parser.add_argument('--pool-engine', help='ENGINE с пулом (по умолчанию для MySQL — listings_app.db.mysql)')
+
+    def handle(self, *args, **options):
+        settings_dict = copy.deepcopy(connections[options['database']].settings_dict)
+        engine = settings_dict['ENGINE']
+        plain_engine = next((plain for plain, pooled in POOLED_ENGINES.items() if pooled == engine), engine)
+        pool_engine = options['pool_engine'] or POOLED_ENGINES.get(plain_engine)
+
+        modes = [
+            ('new connection', plain_engine, 0),
+            ('persistent', plain_engine, 600),
+        ]
+        if pool_engine:
+            modes.append(('pool', pool_engine, 0))
+        else:
+            self.stdout.write(f'No pooled backend for {plain_engine}, pass --pool-engine to compare')
+
+        self.stdout.write(f'{"mode":<16} {"worker":<6} {"mean ms":>8} {"p50 ms":>8} {"p95 ms":>8} {"connects":>9}')
+        for name, mode_engine, max_age in modes:
+            for worker, thread_per_request in (('WSGI', False), ('ASGI', True)):
+                mode_settings = {
+                    **settings_dict,
+                    'ENGINE': mode_engine,
+                    'CONN_MAX_AGE': max_age,
+                    'CONN_HEALTH_CHECKS': True,
+                }
+                alias = f'benchmark_{name}_{worker}'.replace(' ', '_')
+                latencies, connects = self.measure(
+                    alias, mode_settings, options['requests'], options['queries'], thread_per_request
+                )
+                latencies.sort()
+                self.stdout.write(
+                    f'{name:<16} {worker:<6} {statistics.mean(latencies) * 1000:8.2f} '
+                    f'{latencies[len(latencies) // 2] * 1000:8.2f} '
+                    f'{latencies[int(len(latencies) * 0.95)] * 1000:8.2f} {connects:9}'
+                )
+
+    def measure(self, alias, settings_dict, requests, queries, thread_per_request):
+        backend = load_backend(settings_dict['ENGINE'])
+        connects = 0
+
+        def count_connect(sender, connection, **kwargs):
+            nonlocal connects
+            if connection.alias == alias:
+                connects += 1
+
+        connection_created.connect(count_connect, weak=False)
+        wrappers = []
+        latencies = []
+        try:
+            wrapper = None
+            for _ in range(requests):
+                # Под ASGI у каждого запроса свой поток, а значит и свой DatabaseWrapper
+                if wrapper is None or thread_per_request:
+                    wrapper = backend.DatabaseWrapper(settings_dict, alias)
+                    wrappers.append(wrapper)
+                started = time.perf_counter()
+                wrapper.close_if_unusable_or_obsolete()  # request_started
+                for _ in range(queries):
+                    with wrapper.cursor() as cursor:
+                        cursor.execute('SELECT 1')
+                        cursor.fetchall()
+                wrapper.close_if_unusable_or_obsolete()  # request_finished
+                latencies.append(time.perf_counter() - started)
+        finally:
+            connection_created.disconnect(count_connect)
+            for wrapper in wrappers:
+                wrapper.close()
+            pool = getattr(wrappers[0], 'pool', None) if wrappers else None
+            if pool is not None:
+                # connection_created срабатывает и на соединение из пула, считаем реально открытые
+                connects = pool.created
+                pool.clear()
+        return latencies, connects
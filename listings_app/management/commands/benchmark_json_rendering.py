@@ -0,0 +1,93 @@
+import statistics
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from listings_app.models import Listing, Review
+from listings_app.renderers import ORJSONRenderer
+from listings_app.serializers.serializers import ListingSerializer
+from listings_app.utils.compression import compress, get_available_encodings
+
+USERNAME = 'benchmark_json_rendering'
+
+
+class Command(BaseCommand):
+    help = (
+        'Время рендеринга списка ListingSerializer (--rows объявлений с отзывами) '
+        'через DRF JSONRenderer и ORJSONRenderer, проверка одинаковости вывода, '
+        'а также размер и время сжатия тела gzip/brotli. '
+        'Тестовые данные создаются в транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            listings = self.create_data(options['rows'])
+            queryset = Listing.objects.filter(pk__in=[listing.pk for listing in listings]) \
+                .select_related('owner').prefetch_related('reviews')
+
+            serialize_time, data = self.measure(lambda: ListingSerializer(queryset, many=True).data, 1)
+            self.stdout.write(f'{len(data)} listings, serializer {serialize_time * 1000:.1f} ms')
+
+            bodies = {}
+            self.stdout.write(f'{"renderer":<16} {"mean ms":>8} {"MB/s":>8} {"bytes":>10}')
+            for renderer in (JSONRenderer(), ORJSONRenderer()):
+                seconds, body = self.measure(lambda: renderer.render(data), options['repeat'])
+                bodies[type(renderer).__name__] = body
+                self.stdout.write(
+                    f'{type(renderer).__name__:<16} {seconds * 1000:8.2f} '
+                    f'{len(body) / seconds / 1_000_000:8.1f} {len(body):10}'
+                )
+            identical = len(set(bodies.values())) == 1
+            self.stdout.write(f'identical output: {"yes" if identical else "NO"}')
+
+            body = bodies['ORJSONRenderer']
+            self.stdout.write(f'{"encoding":<16} {"mean ms":>8} {"ratio":>8} {"bytes":>10}')
+            for encoding in get_available_encodings():
+                seconds, compressed = self.measure(lambda: compress(body, encoding), options['repeat'])
+                self.stdout.write(
+                    f'{encoding:<16} {seconds * 1000:8.2f} {len(body) / len(compressed):8.1f} {len(compressed):10}'
+                )
+            transaction.set_rollback(True)
+
+    def create_data(self, rows):
+        owner = User.objects.create_user(username=USERNAME, password='benchmark')
+        guest = User.objects.create_user(username=f'{USERNAME}_guest', password='benchmark')
+        listings = Listing.objects.bulk_create([
+            Listing(
+                owner=owner,
+                title=f'Benchmark listing {index}',
+                description='Bright apartment close to the park, with a balcony and a quiet courtyard.',
+                location='Mitte',
+                city='Berlin',
+                rooms=1 + index % 5,
+                property_type='apartment',
+                price=Decimal('500.00') + index,
+                avg_rating=Decimal('4.25'),
+            )
+            for index in range(max(rows, 1))
+        ], batch_size=500)
+        Review.objects.bulk_create([
+            Review(listing=listing, user=guest, rating=1 + index % 5, comment='Benchmark review')
+            for listing in listings
+            for index in range(3)
+        ], batch_size=500)
+        return listings
+
+    @staticmethod
+    def measure(func, repeat):
+        """(среднее время, результат последнего вызова)."""
+        timings = []
+        result = None
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - started)
+        return statistics.mean(timings), result
@@ -0,0 +1,82 @@
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from listings_app.models import Listing
+from listings_app.pagination import ListingCursorPagination
+from listings_app.views.listing import SearchListingListView
+
+CARD_FIELDS = 'id,title,price,city,rooms'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает скорость списка объявлений: полный ListingSerializer, '
+        'sparse fieldset через ModelSerializer и быстрый путь через .values(). '
+        'Тестовые данные создаются в транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000)
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self.create_data(options['rows'])
+            results = [
+                ('full serializer', '', True),
+                ('sparse, ModelSerializer', CARD_FIELDS, False),
+                ('sparse, .values() fast path', CARD_FIELDS, True),
+            ]
+            baseline = None
+            for name, fields, fast_path in results:
+                elapsed = self.measure(user, fields, fast_path, options['page_size'], options['repeat'])
+                baseline = baseline or elapsed
+                rows_per_second = options['page_size'] * options['repeat'] / elapsed
+                self.stdout.write(
+                    f'{name:<30} {elapsed / options["repeat"] * 1000:8.2f} ms/page '
+                    f'{rows_per_second:10.0f} rows/s  x{baseline / elapsed:.2f}'
+                )
+            transaction.set_rollback(True)
+
+    def create_data(self, rows):
+        user = User.objects.create_user(username='benchmark_listing_list', password='benchmark')
+        Listing.objects.bulk_create([
+            Listing(
+                owner=user,
+                title=f'Listing {index}',
+                description='Bright apartment close to the park. ' * 20,
+                location='Mitte',
+                city='Berlin',
+                rooms=1 + index % 5,
+                property_type='apartment',
+                price=Decimal('500.00') + index % 1000,
+            )
+            for index in range(rows)
+        ], batch_size=500)
+        return user
+
+    def measure(self, user, fields, fast_path, page_size, repeat):
+        factory = APIRequestFactory()
+        view = SearchListingListView.as_view({'get': 'list'}, values_fast_path=fast_path)
+        params = {'page_size': page_size}
+        if fields:
+            params['fields'] = fields
+
+        cache_results = ListingCursorPagination.cache_results
+        ListingCursorPagination.cache_results = False
+        try:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                request = factory.get('/api/listings/', params, HTTP_HOST='localhost')
+                force_authenticate(request, user=user)
+                response = view(request)
+                response.render()
+            return time.perf_counter() - start
+        finally:
+            ListingCursorPagination.cache_results = cache_results
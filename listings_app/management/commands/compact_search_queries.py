@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from listings_app.models import SearchQuery, SearchQueryRollup
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет устаревшие данные поисковой аналитики: строки SearchQuery, '
+        'которые давно не повторялись (их счётчики уже учтены в агрегатах), '
+        'и старые почасовые/суточные агрегаты.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--raw-days', type=int, default=30,
+                            help='Сколько дней хранить строки SearchQuery после последнего поиска.')
+        parser.add_argument('--hourly-days', type=int, default=7,
+                            help='Сколько дней хранить почасовые агрегаты.')
+        parser.add_argument('--daily-days', type=int, default=0,
+                            help='Сколько дней хранить суточные агрегаты (0 — бессрочно).')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        batch_size = options['batch_size']
+
+        deleted = self.delete_in_batches(
+            SearchQuery.objects.filter(last_seen_at__lt=now - timedelta(days=options['raw_days'])),
+            batch_size
+        )
+        self.stdout.write(f'Deleted {deleted} raw search queries')
+
+        deleted = self.delete_in_batches(
+            SearchQueryRollup.objects.filter(
+                period=SearchQueryRollup.HOUR,
+                bucket_start__lt=now - timedelta(days=options['hourly_days'])
+            ),
+            batch_size
+        )
+        self.stdout.write(f'Deleted {deleted} hourly rollups')
+
+        if options['daily_days']:
+            deleted = self.delete_in_batches(
+                SearchQueryRollup.objects.filter(
+                    period=SearchQueryRollup.DAY,
+                    bucket_start__lt=now - timedelta(days=options['daily_days'])
+                ),
+                batch_size
+            )
+            self.stdout.write(f'Deleted {deleted} daily rollups')
+
+        self.stdout.write(self.style.SUCCESS('Search analytics compacted'))
+
+    def delete_in_batches(self, queryset, batch_size):
+        """
+        Удаляет пачками по id, чтобы не держать долгую блокировку на больших таблицах.
+        """
+        total = 0
+        while True:
+            ids = list(queryset.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return total
+            total += queryset.model.objects.filter(id__in=ids).delete()[0]
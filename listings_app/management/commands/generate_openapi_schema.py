@@ -0,0 +1,29 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from listings_app.utils.openapi_schema import generate_schema, write_schema
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует OpenAPI схему (JSON и YAML) в файл OPENAPI_SCHEMA_FILE или --output. '
+        'Запускается при сборке: воркеры отдают /api/swagger.json из файла, '
+        'не обходя представления и сериализаторы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Путь к JSON файлу схемы (по умолчанию OPENAPI_SCHEMA_FILE).')
+
+    def handle(self, *args, **options):
+        path = options['output'] or getattr(settings, 'OPENAPI_SCHEMA_FILE', None)
+        if not path:
+            raise CommandError('Set OPENAPI_SCHEMA_FILE or pass --output.')
+
+        started = time.perf_counter()
+        files = write_schema(path, generate_schema())
+        elapsed = (time.perf_counter() - started) * 1000
+        for file in files.values():
+            self.stdout.write(f'{file} ({file.stat().st_size} bytes)')
+        self.stdout.write(f'Generated in {elapsed:.0f} ms')
@@ -0,0 +1,73 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from listings_app.models import Listing, Review
+from listings_app.utils.search_cache import get_listing_snapshot, invalidate_for_listing
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает rating_sum/rating_count/avg_rating объявлений по таблице отзывов '
+        'и исправляет расхождения (например, после добавления отзывов через админку).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Только показать расхождения.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        checked = 0
+        fixed = 0
+
+        while True:
+            batch = list(
+                Listing.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .only('id', 'avg_rating', 'rating_sum', 'rating_count')[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+            checked += len(batch)
+
+            totals = {
+                row['listing']: row
+                for row in Review.objects.filter(listing__in=batch)
+                .values('listing')
+                .annotate(rating_sum=Sum('rating'), rating_count=Count('id'))
+            }
+
+            changed = []
+            for listing in batch:
+                total = totals.get(listing.id, {'rating_sum': 0, 'rating_count': 0})
+                avg_rating = Decimal('0.00')
+                if total['rating_count']:
+                    avg_rating = (Decimal(total['rating_sum']) / total['rating_count']).quantize(Decimal('0.01'))
+                if (listing.rating_sum, listing.rating_count, listing.avg_rating) != (
+                        total['rating_sum'], total['rating_count'], avg_rating):
+                    self.stdout.write(
+                        f'Listing {listing.id}: {listing.rating_sum}/{listing.rating_count} '
+                        f'-> {total["rating_sum"]}/{total["rating_count"]} (avg {avg_rating})'
+                    )
+                    listing.rating_sum = total['rating_sum']
+                    listing.rating_count = total['rating_count']
+                    listing.avg_rating = avg_rating
+                    # bulk_update не выставляет auto_now, а от update_at зависит ETag объявления
+                    listing.update_at = timezone.now()
+                    changed.append(listing)
+
+            if changed and not options['dry_run']:
+                with transaction.atomic():
+                    Listing.objects.bulk_update(changed, ['rating_sum', 'rating_count', 'avg_rating', 'update_at'])
+                for listing in Listing.objects.filter(id__in=[listing.id for listing in changed]):
+                    invalidate_for_listing(get_listing_snapshot(listing))
+            fixed += len(changed)
+
+        action = 'Found' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} listings. {action} {fixed} mismatches.'))
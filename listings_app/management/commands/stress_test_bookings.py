@@ -0,0 +1,136 @@
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from listings_app.models import Booking, Listing
+from listings_app.views.booking import BookingViewSet
+
+USERNAME_PREFIX = 'stress_test_bookings'
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочная проверка создания бронирований из нескольких потоков: '
+        'конкурентные запросы на одни и те же даты не должны давать двойных бронирований, '
+        'а бронирования разных объявлений не должны ждать друг друга. '
+        'Тестовые данные удаляются после проверки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--attempts', type=int, default=20, help='Запросов на поток')
+        parser.add_argument('--listings', type=int, default=8)
+
+    def handle(self, *args, **options):
+        threads = options['threads']
+        attempts = options['attempts']
+        landlord, guests, listings = self.create_data(threads, options['listings'])
+        try:
+            start = timezone.now().date() + timedelta(days=30)
+
+            # 1. Все потоки бронируют одни и те же даты одного объявления
+            contested = listings[0]
+            results = self.run(threads, attempts, lambda thread, attempt: (
+                guests[thread], contested, start + timedelta(days=attempt * 3), start + timedelta(days=attempt * 3 + 2)
+            ))
+            self.report('same listing, same dates', results)
+            created = results['created']
+            if created != attempts:
+                raise CommandError(f'Expected {attempts} bookings on the contested listing, got {created}')
+
+            # 2. Каждый поток бронирует своё объявление: пропускная способность без конкуренции
+            results = self.run(threads, attempts, lambda thread, attempt: (
+                guests[thread], listings[1 + thread % (len(listings) - 1)],
+                start + timedelta(days=attempt * 3), start + timedelta(days=attempt * 3 + 2)
+            ))
+            self.report('different listings', results)
+
+            overlaps = self.count_overlaps(listings)
+            self.stdout.write(f'overlapping bookings: {overlaps}')
+            if overlaps:
+                raise CommandError('Double booking detected')
+        finally:
+            self.delete_data(landlord, guests, listings)
+
+    def create_data(self, threads, listing_count):
+        landlord = User.objects.create_user(username=f'{USERNAME_PREFIX}_landlord', password='stress')
+        guests = [
+            User.objects.create_user(username=f'{USERNAME_PREFIX}_{index}', password='stress')
+            for index in range(threads)
+        ]
+        # Отдельное объявление для первого сценария, чтобы сценарии не пересекались
+        listings = [
+            Listing.objects.create(
+                owner=landlord,
+                title=f'Stress listing {index}',
+                description='Stress test',
+                location='Mitte',
+                city='Berlin',
+                rooms=2,
+                property_type='apartment',
+                price=Decimal('100.00'),
+            )
+            for index in range(max(listing_count, 1) + 1)
+        ]
+        return landlord, guests, listings
+
+    def delete_data(self, landlord, guests, listings):
+        Booking.objects.filter(listing__in=listings).delete()
+        for listing in listings:
+            listing.delete()
+        User.objects.filter(pk__in=[landlord.pk] + [guest.pk for guest in guests]).delete()
+
+    def run(self, threads, attempts, get_booking):
+        factory = APIRequestFactory()
+        view = BookingViewSet.as_view({'post': 'create'})
+        statuses = {}
+        lock = threading.Lock()
+
+        def worker(thread):
+            try:
+                for attempt in range(attempts):
+                    guest, listing, start_date, end_date = get_booking(thread, attempt)
+                    request = factory.post(
+                        f'/api/listings/{listing.pk}/bookings/',
+                        {'start_date': start_date.isoformat(), 'end_date': end_date.isoformat()},
+                        format='json', HTTP_HOST='localhost',
+                    )
+                    force_authenticate(request, user=guest)
+                    status_code = view(request, listing_pk=listing.pk).status_code
+                    with lock:
+                        statuses[status_code] = statuses.get(status_code, 0) + 1
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(thread,)) for thread in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        return {'statuses': statuses, 'created': statuses.get(201, 0), 'elapsed': elapsed}
+
+    def report(self, name, results):
+        statuses = ', '.join(f'{code}: {count}' for code, count in sorted(results['statuses'].items()))
+        self.stdout.write(
+            f'{name:<26} {results["created"]:5} created  '
+            f'{results["created"] / results["elapsed"]:8.1f} bookings/s  ({statuses})'
+        )
+
+    def count_overlaps(self, listings):
+        overlapping = Booking.objects.filter(
+            listing=OuterRef('listing'),
+            is_canceled=False,
+            start_date__lt=OuterRef('end_date'),
+            end_date__gt=OuterRef('start_date'),
+        ).exclude(pk=OuterRef('pk'))
+        return Booking.objects.filter(listing__in=listings, is_canceled=False).filter(Exists(overlapping)).count()
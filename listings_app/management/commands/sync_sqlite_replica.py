@@ -0,0 +1,33 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from listings_app.db.router import get_replicas
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует primary SQLite базу в файлы реплик (DATABASE_REPLICAS) через backup API. '
+        'Заменяет репликацию при локальной проверке PrimaryReplicaRouter: '
+        'между запусками реплика «отстаёт» от primary.'
+    )
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        replicas = [alias for alias in get_replicas() if settings.DATABASES[alias]['ENGINE'] == primary['ENGINE']]
+        if primary['ENGINE'] != 'django.db.backends.sqlite3' or not replicas:
+            raise CommandError('Needs a SQLite primary and SQLITE_REPLICA_NAME replica.')
+
+        source = sqlite3.connect(primary['NAME'])
+        try:
+            for alias in replicas:
+                target = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f'{primary["NAME"]} -> {settings.DATABASES[alias]["NAME"]}')
+        finally:
+            source.close()
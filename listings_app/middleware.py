@@ -1,49 +1,78 @@
+import time
 from datetime import datetime
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
 from django.utils.deprecation import MiddlewareMixin
-from rest_framework_simplejwt.tokens import RefreshToken, AccessToken
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework_simplejwt.exceptions import TokenError
 
+from listings_app.db.router import get_sticky_seconds, has_written, reset_writes, set_pinned
+from listings_app.utils.compression import acompress_stream, compress, compress_stream, negotiate_encoding
+from listings_app.utils.token_cache import get_verified_token, verified_token_cache
+from listings_app.utils.token_revocation import RevocableRefreshToken
+
 
 class JWTAuthenticationMiddleware(MiddlewareMixin):
+    """
+    Переносит access токен из cookie в заголовок Authorization и обновляет его по refresh токену.
+    Проверенный токен сохраняется в request._verified_access_token и в общем кэше,
+    поэтому CachedJWTAuthentication и process_response не декодируют его повторно.
+    """
+
     def process_request(self, request):
         access_token = request.COOKIES.get('access_token')
         refresh_token = request.COOKIES.get('refresh_token')
 
         if access_token:
             try:
-                token = AccessToken(access_token)
-                if datetime.utcfromtimestamp(token['exp']) < datetime.utcnow():
-                    raise TokenError('Token expired')
+                # Проверка подписи и exp, повторные запросы с тем же токеном берут его из кэша
+                token = get_verified_token(access_token)
                 request.META['HTTP_AUTHORIZATION'] = f'Bearer {access_token}'
+                request._verified_access_token = (access_token, token)
             except TokenError:
                 # Попробовать обновить access токен, если refresh токен не истек
                 new_access_token = self.refresh_access_token(refresh_token)
                 if new_access_token:
-                    request.META['HTTP_AUTHORIZATION'] = f'Bearer {new_access_token}'
-                    request._new_access_token = new_access_token
+                    self.set_new_access_token(request, new_access_token)
                 else:
                     # Удалить токены из куки, если обновление не удалось
                     self.clear_cookies(request)
         elif refresh_token:
             new_access_token = self.refresh_access_token(refresh_token)
             if new_access_token:
-                request.META['HTTP_AUTHORIZATION'] = f'Bearer {new_access_token}'
-                request._new_access_token = new_access_token
+                self.set_new_access_token(request, new_access_token)
             else:
                 self.clear_cookies(request)
 
     def refresh_access_token(self, refresh_token):
+        """
+        Возвращает новый AccessToken (объект) или None.
+        Отозванный refresh токен (logout, ротация) новый access токен не даёт.
+        """
         try:
-            refresh = RefreshToken(refresh_token)
-            new_access_token = str(refresh.access_token)
+            refresh = RevocableRefreshToken(refresh_token)
+            new_access_token = refresh.access_token
             return new_access_token
         except TokenError:
             return None
 
+    def set_new_access_token(self, request, new_access_token):
+        # str() подписывает токен, делаем это один раз
+        new_access_token_str = str(new_access_token)
+        # Только что выпущенный токен проверять не нужно
+        verified_token_cache.add(new_access_token, new_access_token_str)
+        request.META['HTTP_AUTHORIZATION'] = f'Bearer {new_access_token_str}'
+        request._verified_access_token = (new_access_token_str, new_access_token)
+        request._new_access_token = new_access_token_str
+        request._new_access_token_exp = new_access_token['exp']
+
     def process_response(self, request, response):
         new_access_token = getattr(request, '_new_access_token', None)
-        if new_access_token:
-            access_expiry = AccessToken(new_access_token)['exp']
+        # Не перезаписываем cookie, которую выставило или удалило представление (например, logout)
+        if new_access_token and 'access_token' not in response.cookies:
+            # exp сохранён при выпуске токена, повторно не декодируем
+            access_expiry = request._new_access_token_exp
             response.set_cookie(
                 key='access_token',
                 value=new_access_token,
@@ -58,3 +87,82 @@ class JWTAuthenticationMiddleware(MiddlewareMixin):
         # Метод для удаления истекших куки
         request.COOKIES.pop('access_token', None)
         request.COOKIES.pop('refresh_token', None)
+
+
+class ReplicaPinningMiddleware(MiddlewareMixin):
+    """
+    Read-your-writes для PrimaryReplicaRouter:
+    - POST/PUT/PATCH/DELETE целиком идут в primary (чтения перед записью не отстают);
+    - если в запросе была запись, клиент получает cookie и следующие
+      DATABASE_REPLICA_STICKY_SECONDS секунд читает из primary, пока реплика догоняет.
+    """
+    cookie_name = 'db_primary_until'
+
+    def is_sticky(self, request):
+        try:
+            return float(request.COOKIES.get(self.cookie_name, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def process_request(self, request):
+        # Контекст потока переживает запрос, поэтому состояние выставляется явно
+        set_pinned(request.method not in SAFE_METHODS or self.is_sticky(request))
+        reset_writes()
+
+    def process_response(self, request, response):
+        if has_written():
+            sticky_seconds = get_sticky_seconds()
+            response.set_cookie(
+                self.cookie_name,
+                f'{time.time() + sticky_seconds:.3f}',
+                max_age=sticky_seconds,
+                httponly=True,
+                samesite='Lax',
+            )
+        set_pinned(False)
+        reset_writes()
+        return response
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Сжимает ответы API (JSON, NDJSON, CSV, YAML) длиннее RESPONSE_COMPRESSION_MIN_SIZE
+    байт: brotli, если он установлен и клиент его принимает, иначе gzip.
+    - HTML не сжимаем: в формах браузерного API есть CSRF токен (атака BREACH);
+    - потоковые ответы (выгрузки) сжимаются по кускам, каждый кусок уходит клиенту сразу;
+    - уже сжатые ответы (Content-Encoding) отдаются как есть;
+    - сильный ETag становится слабым: сжатое тело — то же представление, другие байты.
+    """
+    compressible_types = ('application/json', 'application/x-ndjson', 'text/csv', 'application/yaml')
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '').partition(';')[0].strip()
+        if content_type not in self.compressible_types:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if not response.streaming and len(response.content) < getattr(settings, 'RESPONSE_COMPRESSION_MIN_SIZE', 1024):
+            return response
+        encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_stream(response.streaming_content, encoding)
+            else:
+                response.streaming_content = compress_stream(response.streaming_content, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = f'W/{etag}'
+        return response
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.2 on 2026-10-18 16:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings_app', '0003_delete_profile'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['is_active', 'created_at', 'id'], name='listings_ap_is_acti_45afb9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['is_active', 'price', 'id'], name='listings_ap_is_acti_606021_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['is_active', 'avg_rating', 'id'], name='listings_ap_is_acti_2ff2f1_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+from listings_app.utils.full_text_search import FTS_COLUMNS, FTS_TABLE, LISTING_TABLE, MYSQL_FULLTEXT_INDEX
+
+
+def create_full_text_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    columns = ', '.join(FTS_COLUMNS)
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5({columns}, "
+            f"tokenize='unicode61 remove_diacritics 2')"
+        )
+        # Заполняем индекс существующими объявлениями
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, {columns}) "
+            f"SELECT id, title, description, location, COALESCE(city, '') FROM {LISTING_TABLE}"
+        )
+    elif vendor == 'mysql':
+        schema_editor.execute(
+            f"ALTER TABLE {LISTING_TABLE} ADD FULLTEXT INDEX {MYSQL_FULLTEXT_INDEX} ({columns})"
+        )
+
+
+def drop_full_text_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == 'mysql':
+        schema_editor.execute(f"ALTER TABLE {LISTING_TABLE} DROP INDEX {MYSQL_FULLTEXT_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings_app', '0004_listing_listings_ap_is_acti_45afb9_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_full_text_index, drop_full_text_index),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.2 on 2026-10-18 16:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings_app', '0005_listing_full_text_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='city_normalized',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='location_normalized',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.CreateModel(
+            name='ListingTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(max_length=20)),
+                ('trigram', models.CharField(max_length=3)),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigrams', to='listings_app.listing')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['field', 'trigram', 'listing'], name='listings_ap_field_1e81b1_idx')],
+            },
+        ),
+    ]
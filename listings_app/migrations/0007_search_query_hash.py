@@ -0,0 +1,80 @@
+import hashlib
+import json
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+# Копия SearchQuery.KEY_FIELDS и build_search_query_hash на момент миграции:
+# миграция не должна меняться вместе с моделью
+KEY_FIELDS = ('owner', 'title', 'description', 'location', 'city', 'rooms_min',
+              'rooms_max', 'property_type', 'price_min', 'price_max')
+
+
+def _canonical_value(value):
+    if value is None:
+        return None
+    if isinstance(value, models.Model):
+        return str(value.pk)
+    if isinstance(value, Decimal):
+        return str(value.normalize())
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def build_search_query_hash(values):
+    key = [_canonical_value(values.get(field)) for field in KEY_FIELDS]
+    return hashlib.sha1(json.dumps(key).encode()).hexdigest()
+
+
+def fill_query_hash(apps, schema_editor):
+    """
+    Заполняет query_hash и схлопывает дубли (одинаковые фильтры одного владельца)
+    в одну строку с суммарным count.
+    """
+    SearchQuery = apps.get_model('listings_app', 'SearchQuery')
+    seen = {}
+    for query in SearchQuery.objects.order_by('id').iterator():
+        values = {
+            field: getattr(query, f'{field}_id' if field == 'owner' else field)
+            for field in KEY_FIELDS
+        }
+        query_hash = build_search_query_hash(values)
+        if query_hash in seen:
+            seen[query_hash].append(query.id)
+            continue
+        seen[query_hash] = [query.id]
+        query.query_hash = query_hash
+        query.save(update_fields=['query_hash'])
+
+    for query_hash, ids in seen.items():
+        if len(ids) > 1:
+            total = SearchQuery.objects.filter(id__in=ids).aggregate(total=Sum('count'))['total']
+            SearchQuery.objects.filter(id=ids[0]).update(count=total)
+            SearchQuery.objects.filter(id__in=ids[1:]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings_app', '0006_listing_city_normalized_listing_location_normalized_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='searchquery',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='searchquery',
+            name='query_hash',
+            field=models.CharField(editable=False, max_length=40, null=True),
+        ),
+        migrations.RunPython(fill_query_hash, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='searchquery',
+            name='query_hash',
+            field=models.CharField(editable=False, max_length=40, unique=True),
+        ),
+    ]
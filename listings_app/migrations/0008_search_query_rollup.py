@@ -0,0 +1,117 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:04
+
+import hashlib
+import json
+import unicodedata
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F
+
+# Копии хэша фильтров, нормализации текста и констант SearchQueryRollup на момент миграции:
+# миграция не должна меняться вместе с моделями
+KEY_FIELDS = ('owner', 'title', 'description', 'location', 'city', 'rooms_min',
+              'rooms_max', 'property_type', 'price_min', 'price_max')
+FILTER_FIELDS = ('title', 'description', 'location', 'city', 'rooms_min',
+                 'rooms_max', 'property_type', 'price_min', 'price_max')
+TEXT_FIELDS = ('title', 'description', 'location', 'city')
+DAY = 'day'
+
+
+def _canonical_value(value):
+    if value is None:
+        return None
+    if isinstance(value, Decimal):
+        return str(value.normalize())
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def build_search_query_hash(values):
+    key = [_canonical_value(values.get(field)) for field in KEY_FIELDS]
+    return hashlib.sha1(json.dumps(key).encode()).hexdigest()
+
+
+def normalize_text(value):
+    if not value:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', value)
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.casefold().split())
+
+
+def get_filter_values(model, query):
+    filter_values = {field: getattr(query, field) for field in FILTER_FIELDS}
+    for field in TEXT_FIELDS:
+        if filter_values[field] is not None:
+            max_length = model._meta.get_field(field).max_length
+            filter_values[field] = normalize_text(filter_values[field])[:max_length] or None
+    return filter_values
+
+
+def backfill_rollups(apps, schema_editor):
+    """
+    Переносит накопленные счётчики SearchQuery в суточные агрегаты
+    (по дню created_at), чтобы отчёты учитывали историю до появления агрегатов.
+    """
+    SearchQuery = apps.get_model('listings_app', 'SearchQuery')
+    SearchQueryRollup = apps.get_model('listings_app', 'SearchQueryRollup')
+
+    SearchQuery.objects.update(last_seen_at=F('created_at'))
+
+    rollups = {}
+    for query in SearchQuery.objects.iterator():
+        filter_values = get_filter_values(SearchQueryRollup, query)
+        bucket_start = query.created_at.replace(hour=0, minute=0, second=0, microsecond=0)
+        key = (bucket_start, build_search_query_hash(filter_values))
+        if key in rollups:
+            rollups[key].count += query.count
+        else:
+            rollups[key] = SearchQueryRollup(
+                period=DAY,
+                bucket_start=bucket_start,
+                filter_hash=key[1],
+                count=query.count,
+                **filter_values
+            )
+    SearchQueryRollup.objects.bulk_create(rollups.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings_app', '0007_search_query_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='searchquery',
+            name='last_seen_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.CreateModel(
+            name='SearchQueryRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('bucket_start', models.DateTimeField()),
+                ('filter_hash', models.CharField(max_length=40)),
+                ('title', models.CharField(blank=True, max_length=200, null=True)),
+                ('description', models.CharField(blank=True, max_length=200, null=True)),
+                ('location', models.CharField(blank=True, max_length=100, null=True)),
+                ('city', models.CharField(blank=True, max_length=100, null=True)),
+                ('rooms_min', models.FloatField(blank=True, null=True)),
+                ('rooms_max', models.FloatField(blank=True, null=True)),
+                ('property_type', models.CharField(blank=True, max_length=50, null=True)),
+                ('price_min', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('price_max', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['period', 'bucket_start', 'city'], name='listings_ap_period_6b08a2_idx')],
+                'unique_together': {('period', 'bucket_start', 'filter_hash')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:07
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Listing = apps.get_model('listings_app', 'Listing')
+    Review = apps.get_model('listings_app', 'Review')
+    totals = Review.objects.values('listing').annotate(rating_sum=Sum('rating'), rating_count=Count('id'))
+    for total in totals:
+        Listing.objects.filter(pk=total['listing']).update(
+            rating_sum=total['rating_sum'],
+            rating_count=total['rating_count'],
+            avg_rating=(Decimal(total['rating_sum']) / total['rating_count']).quantize(Decimal('0.01')),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings_app', '0008_search_query_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='listing',
+            name='avg_rating',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=3),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings_app', '0009_listing_rating_aggregates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['listing', 'is_canceled', 'start_date', 'end_date'], name='listings_ap_listing_ff3ca1_idx'),
+        ),
+    ]
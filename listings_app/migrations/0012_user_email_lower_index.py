@@ -0,0 +1,45 @@
+from django.db import migrations
+
+USER_TABLE = 'auth_user'
+# Поиск пользователя по LOWER(email) (вход, проверка при регистрации)
+EMAIL_LOOKUP_INDEX = 'auth_user_email_lower_idx'
+# Уникальность email без учёта регистра; пустой email (createsuperuser) не участвует
+EMAIL_UNIQUE_INDEX = 'auth_user_email_ci_uniq'
+
+
+def create_email_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute(f"CREATE INDEX {EMAIL_LOOKUP_INDEX} ON {USER_TABLE} (LOWER(email))")
+        schema_editor.execute(
+            f"CREATE UNIQUE INDEX {EMAIL_UNIQUE_INDEX} ON {USER_TABLE} (LOWER(email)) WHERE email <> ''"
+        )
+    elif vendor == 'mysql':
+        # Функциональные индексы (MySQL 8.0.13+); частичных индексов нет, поэтому
+        # уникальность по NULLIF(...): NULL для пустого email не конфликтует
+        schema_editor.execute(f"CREATE INDEX {EMAIL_LOOKUP_INDEX} ON {USER_TABLE} ((LOWER(email)))")
+        schema_editor.execute(
+            f"CREATE UNIQUE INDEX {EMAIL_UNIQUE_INDEX} ON {USER_TABLE} ((NULLIF(LOWER(email), '')))"
+        )
+
+
+def drop_email_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute(f"DROP INDEX IF EXISTS {EMAIL_UNIQUE_INDEX}")
+        schema_editor.execute(f"DROP INDEX IF EXISTS {EMAIL_LOOKUP_INDEX}")
+    elif vendor == 'mysql':
+        schema_editor.execute(f"DROP INDEX {EMAIL_UNIQUE_INDEX} ON {USER_TABLE}")
+        schema_editor.execute(f"DROP INDEX {EMAIL_LOOKUP_INDEX} ON {USER_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('listings_app', '0011_revoked_token'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_email_indexes, drop_email_indexes),
+    ]
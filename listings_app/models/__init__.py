@@ -2,4 +2,6 @@ from .booking import *
 from .listing import *
 
 from .review import *
-from .search_query import *
\ No newline at end of file
+from .search_query import *
+from .search_query_rollup import *
+from .revoked_token import *
\ No newline at end of file
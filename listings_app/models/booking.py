@@ -13,6 +13,17 @@ class Booking(models.Model):
     is_confirmed = models.BooleanField(default=False)  # Confirmed by landlord
     is_canceled = models.BooleanField(default=False)  # Confirmed by user
 
+    class Meta:
+        indexes = [
+            # Поиск пересекающихся бронирований (фильтр доступности, проверка при создании)
+            models.Index(fields=['listing', 'is_canceled', 'start_date', 'end_date']),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_dates = (instance.__dict__.get('start_date'), instance.__dict__.get('end_date'))
+        return instance
 
     def clean(self):
         if self.start_date >= self.end_date:
@@ -1,8 +1,13 @@
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Cast, Round
 from django.utils import timezone
 from django.utils.text import slugify
 
+from listings_app.utils.search_cache import get_listing_snapshot
+from listings_app.utils.text_normalization import normalize_text, trigrams
+
 
 class Listing(models.Model):
     owner = models.ForeignKey(User, on_delete=models.DO_NOTHING, related_name='listings')
@@ -10,6 +15,9 @@ class Listing(models.Model):
     description = models.TextField()
     location = models.CharField(max_length=100)
     city = models.CharField(max_length=100, null=True)
+    # Нормализованные копии city/location для индексированного поиска (заполняются в save)
+    location_normalized = models.CharField(max_length=100, default='', editable=False, db_index=True)
+    city_normalized = models.CharField(max_length=100, default='', editable=False, db_index=True)
     rooms = models.FloatField()
     property_type = models.CharField(max_length=50, choices=[
         ('apartment', 'Apartment'),
@@ -22,7 +30,10 @@ class Listing(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
     update_at = models.DateTimeField(auto_now=True)
-    avg_rating = models.IntegerField(default=0)
+    # Агрегаты отзывов: обновляются атомарно при создании отзыва (см. add_rating)
+    avg_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
 
     is_active = models.BooleanField(default=True)
 
@@ -30,9 +41,93 @@ class Listing(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['title']),
-            models.Index(fields=['created_at', 'owner'])
+            models.Index(fields=['created_at', 'owner']),
+            # Индексы под keyset-пагинацию: (поле сортировки, id)
+            models.Index(fields=['is_active', 'created_at', 'id']),
+            models.Index(fields=['is_active', 'price', 'id']),
+            models.Index(fields=['is_active', 'avg_rating', 'id']),
         ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._indexed_text = instance._get_normalized_text()
+        instance._search_snapshot = get_listing_snapshot(instance)
+        return instance
+
+    def _get_normalized_text(self):
+        return {field: self.__dict__.get(f'{field}_normalized') for field in ListingTrigram.FIELDS}
+
+    @classmethod
+    def add_rating(cls, listing_pk, rating):
+        """
+        Атомарно добавляет оценку в агрегаты одним UPDATE, без чтения строки.
+        avg_rating идёт первым: MySQL вычисляет SET слева направо с уже новыми значениями,
+        остальные БД — со старыми, и в обоих случаях формула считает по старым.
+        """
+        return cls.objects.filter(pk=listing_pk).update(
+            avg_rating=Round(
+                Cast(F('rating_sum') + Value(rating), FloatField())
+                / (F('rating_count') + Value(1)),
+                2
+            ),
+            rating_sum=F('rating_sum') + Value(rating),
+            rating_count=F('rating_count') + Value(1),
+            # update() не трогает auto_now, а отзыв меняет представление (avg_rating, reviews) и его ETag
+            update_at=timezone.now(),
+        )
+
+    def save(self, *args, **kwargs):
+        self.location_normalized = normalize_text(self.location)
+        self.city_normalized = normalize_text(self.city)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            for field in ListingTrigram.FIELDS:
+                if field in update_fields:
+                    update_fields.add(f'{field}_normalized')
+            kwargs['update_fields'] = update_fields
+
+        super().save(*args, **kwargs)
+
+        # Триграммы перестраиваем только если нормализованный текст изменился
+        normalized_text = self._get_normalized_text()
+        if normalized_text != getattr(self, '_indexed_text', None):
+            ListingTrigram.rebuild_for(self)
+            self._indexed_text = normalized_text
+
+
+class ListingTrigram(models.Model):
+    """
+    Триграммный индекс по нормализованным city/location.
+    Поиск подстроки 'ber' превращается в выборку по индексу (field, trigram)
+    вместо сканирования всей таблицы объявлений.
+    """
+    FIELDS = ('location', 'city')
+
+    listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name='trigrams')
+    field = models.CharField(max_length=20)
+    trigram = models.CharField(max_length=3)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['field', 'trigram', 'listing']),
+        ]
+
+    @classmethod
+    def build_for(cls, listing):
+        return [
+            cls(listing_id=listing.pk, field=field, trigram=trigram)
+            for field in cls.FIELDS
+            for trigram in sorted(trigrams(getattr(listing, f'{field}_normalized')))
+        ]
+
+    @classmethod
+    def rebuild_for(cls, listing):
+        cls.objects.filter(listing_id=listing.pk).delete()
+        cls.objects.bulk_create(cls.build_for(listing))
+
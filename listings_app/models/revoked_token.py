@@ -0,0 +1,14 @@
+from django.db import models
+
+
+class RevokedToken(models.Model):
+    """
+    Отозванный refresh токен (logout, ротация при обновлении).
+    Строка нужна только до истечения токена, дальше её удаляет очистка.
+    """
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.jti
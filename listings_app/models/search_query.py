@@ -1,8 +1,41 @@
+import hashlib
+import json
+from decimal import Decimal
+
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from listings_app.utils.upsert import bulk_increment
+from .search_query_rollup import SearchQueryRollup
+
+
+def _canonical_value(value):
+    if value is None:
+        return None
+    if isinstance(value, models.Model):
+        return str(value.pk)
+    if isinstance(value, Decimal):
+        return str(value.normalize())
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def build_search_query_hash(values):
+    """
+    Хэш по значениям SearchQuery.KEY_FIELDS. NULL-значения участвуют в хэше,
+    поэтому уникальность работает и для частично заполненных фильтров.
+    """
+    key = [_canonical_value(values.get(field)) for field in SearchQuery.KEY_FIELDS]
+    return hashlib.sha1(json.dumps(key).encode()).hexdigest()
 
 
 class SearchQuery(models.Model):
+    KEY_FIELDS = ('owner', 'title', 'description', 'location', 'city', 'rooms_min',
+                  'rooms_max', 'property_type', 'price_min', 'price_max')
+
     owner = models.ForeignKey(User, on_delete=models.DO_NOTHING, related_name='search_query', null=True, blank=True)
     title = models.CharField(max_length=200, null=True, blank=True)
     description = models.CharField(max_length=200, null=True, blank=True)
@@ -19,32 +52,50 @@ class SearchQuery(models.Model):
     price_min = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     price_max = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    last_seen_at = models.DateTimeField(auto_now=True, db_index=True)
     count = models.IntegerField(default=1)
+    # Хэш комбинации фильтров (включая владельца); по нему делается upsert
+    query_hash = models.CharField(max_length=40, unique=True, editable=False)
 
-    class Meta:
-        unique_together = ('title', 'description',
-                           'location', 'city', 'rooms_min',
-                           'rooms_max', 'property_type', 'price_min',
-                           'price_max')
+    def get_key_values(self):
+        return {field: getattr(self, f'{field}_id' if field == 'owner' else field) for field in self.KEY_FIELDS}
 
     def save(self, *args, **kwargs):
+        self.query_hash = build_search_query_hash(self.get_key_values())
+        if self.pk is None:
+            with transaction.atomic():
+                SearchQueryRollup.increment_many([(self.get_key_values(), self.count)], timezone.now())
+                # Повторный поиск — атомарно увеличиваем счётчик вместо read-modify-write
+                updated = SearchQuery.objects.filter(query_hash=self.query_hash).update(
+                    count=F('count') + self.count, last_seen_at=timezone.now()
+                )
+                if not updated:
+                    super(SearchQuery, self).save(*args, **kwargs)
+            return
+        super(SearchQuery, self).save(*args, **kwargs)
 
-        query = SearchQuery.objects.filter(
-            owner=self.owner,
-            title=self.title,
-            description=self.description,
-            location=self.location,
-            city=self.city,
-            rooms_min=self.rooms_min,
-            rooms_max=self.rooms_max,
-            property_type=self.property_type,
-            price_min=self.price_min,
-            price_max=self.price_max
-        ).first()
-        if query and query != self:
-            query.count += 1
-            query.save()
-        else:
-            super(SearchQuery, self).save(*args, **kwargs)
-
+    @classmethod
+    def increment_many(cls, entries):
+        """
+        Bulk upsert агрегированных поисков: [(values, count), ...],
+        где values — словарь KEY_FIELDS (owner — id пользователя или None).
+        Новые комбинации вставляются, для существующих count += n одним запросом.
+        Те же счётчики добавляются в почасовые/суточные агрегаты.
+        """
+        if not entries:
+            return
 
+        now = timezone.now()
+        rows = [
+            {
+                **{field: values.get(field) for field in cls.KEY_FIELDS},
+                'query_hash': build_search_query_hash(values),
+                'created_at': now,
+                'last_seen_at': now,
+                'count': count,
+            }
+            for values, count in entries
+        ]
+        with transaction.atomic():
+            bulk_increment(cls, rows, conflict_fields=['query_hash'], replace_fields=['last_seen_at'])
+            SearchQueryRollup.increment_many(entries, now)
@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+from django.db import models
+
+from listings_app.utils.text_normalization import normalize_text
+from listings_app.utils.upsert import bulk_increment
+
+
+class SearchQueryRollup(models.Model):
+    """
+    Почасовые и суточные агрегаты поисковых запросов всех пользователей.
+    Текстовые фильтры хранятся в нормализованном виде, поэтому
+    'Berlin' и 'berlin ' попадают в одну строку.
+    """
+    HOUR = 'hour'
+    DAY = 'day'
+    PERIOD_CHOICES = [
+        (HOUR, 'Hour'),
+        (DAY, 'Day'),
+    ]
+    FILTER_FIELDS = ('title', 'description', 'location', 'city', 'rooms_min',
+                     'rooms_max', 'property_type', 'price_min', 'price_max')
+    TEXT_FIELDS = ('title', 'description', 'location', 'city')
+
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    bucket_start = models.DateTimeField()
+    filter_hash = models.CharField(max_length=40)
+    title = models.CharField(max_length=200, null=True, blank=True)
+    description = models.CharField(max_length=200, null=True, blank=True)
+    location = models.CharField(max_length=100, null=True, blank=True)
+    city = models.CharField(max_length=100, null=True, blank=True)
+    rooms_min = models.FloatField(null=True, blank=True)
+    rooms_max = models.FloatField(null=True, blank=True)
+    property_type = models.CharField(max_length=50, null=True, blank=True)
+    price_min = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    price_max = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('period', 'bucket_start', 'filter_hash')
+        indexes = [
+            models.Index(fields=['period', 'bucket_start', 'city']),
+        ]
+
+    @classmethod
+    def get_bucket_start(cls, moment, period):
+        bucket = moment.replace(minute=0, second=0, microsecond=0)
+        if period == cls.DAY:
+            bucket = bucket.replace(hour=0)
+        return bucket
+
+    @classmethod
+    def get_window_start(cls, moment, period, size):
+        """
+        Начало окна из `size` последних бакетов (текущий включительно).
+        """
+        step = timedelta(days=1) if period == cls.DAY else timedelta(hours=1)
+        return cls.get_bucket_start(moment, period) - step * (size - 1)
+
+    @classmethod
+    def get_filter_values(cls, values):
+        filter_values = {field: values.get(field) for field in cls.FILTER_FIELDS}
+        for field in cls.TEXT_FIELDS:
+            if filter_values[field] is not None:
+                max_length = cls._meta.get_field(field).max_length
+                filter_values[field] = normalize_text(filter_values[field])[:max_length] or None
+        return filter_values
+
+    @classmethod
+    def increment_many(cls, entries, moment):
+        """
+        Добавляет [(values, count), ...] в почасовой и суточный бакеты `moment`.
+        """
+        from listings_app.models.search_query import build_search_query_hash
+
+        rows = {}
+        for values, count in entries:
+            filter_values = cls.get_filter_values(values)
+            filter_hash = build_search_query_hash(filter_values)
+            for period in (cls.HOUR, cls.DAY):
+                bucket_start = cls.get_bucket_start(moment, period)
+                key = (period, bucket_start, filter_hash)
+                if key in rows:
+                    rows[key]['count'] += count
+                else:
+                    rows[key] = {
+                        'period': period,
+                        'bucket_start': bucket_start,
+                        'filter_hash': filter_hash,
+                        **filter_values,
+                        'count': count,
+                    }
+
+        bulk_increment(cls, list(rows.values()), conflict_fields=['period', 'bucket_start', 'filter_hash'])
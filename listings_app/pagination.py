@@ -0,0 +1,218 @@
+from base64 import b64decode
+from urllib import parse
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, Cursor, _reverse_ordering
+
+from listings_app.utils import search_cache
+
+
+class ListingCursorPagination(CursorPagination):
+    """
+    Keyset-пагинация для объявлений.
+    Позиция курсора хранит полный ключ сортировки (поле + id), поэтому
+    каждая страница выбирается через WHERE по индексу без OFFSET и без COUNT(*).
+    При `cache_results` id страниц кэшируются по канонической сигнатуре фильтров.
+    """
+    cache_results = True
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Берём основное поле сортировки (из OrderingFilter или по умолчанию)
+        и добавляем id в том же направлении как уникальный tie-breaker.
+        Для полнотекстового поиска без явного ?ordering= сортируем по релевантности.
+        """
+        ordering = super().get_ordering(request, queryset, view)
+        if 'search_rank' in queryset.query.annotations and 'ordering' not in request.query_params:
+            ordering = ('search_rank',)
+        primary = ordering[0]
+        if primary.lstrip('-') == 'id':
+            return (primary,)
+        return (primary, '-id' if primary.startswith('-') else 'id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset = self._prepare(queryset, request, view)
+        if page_queryset is None:
+            return None
+        return self._set_page(self._fetch_results(queryset, page_queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        То же, что paginate_queryset, но строки выбираются асинхронным ORM.
+        """
+        page_queryset = self._prepare(queryset, request, view)
+        if page_queryset is None:
+            return None
+        return self._set_page(await self._afetch_results(queryset, page_queryset))
+
+    def _prepare(self, queryset, request, view):
+        """
+        Разбирает курсор и строит запрос страницы (без обращения к БД).
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        self.reverse = self.cursor.reverse if self.cursor else False
+        self.position = self.cursor.position if self.cursor else None
+
+        ordering = _reverse_ordering(self.ordering) if self.reverse else self.ordering
+        page_queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            try:
+                page_queryset = page_queryset.filter(self._get_keyset_filter(ordering, self.position))
+            except (DjangoValidationError, TypeError, ValueError):
+                # Позиция не приводится к типам полей (курсор другой сортировки той же длины)
+                raise NotFound(self.invalid_cursor_message)
+        return page_queryset
+
+    def _set_page(self, results):
+        # Берём на один элемент больше, чтобы узнать, есть ли следующая страница
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if self.reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = self.position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.position is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def _get_cache_key(self):
+        params = search_cache.get_search_params(self.request)
+        signature = search_cache.get_signature(params)
+        key = search_cache.get_page_key(signature, params, {
+            'ordering': self.ordering,
+            'position': self.position,
+            'reverse': self.reverse,
+            'page_size': self.page_size,
+        })
+        return key
+
+    def _fetch_results(self, queryset, page_queryset):
+        if not self.cache_results:
+            return list(page_queryset[:self.page_size + 1])
+
+        key = self._get_cache_key()
+        ids = search_cache.get_cached_ids(key)
+        if ids is None:
+            results = list(page_queryset[:self.page_size + 1])
+            search_cache.set_cached_ids(key, [self._get_pk(obj) for obj in results])
+            return results
+
+        # in_bulk не работает с .values(), поэтому собираем словарь сами
+        objects = {self._get_pk(obj): obj for obj in self._get_cached_rows(queryset, ids)}
+        return [objects[pk] for pk in ids if pk in objects]
+
+    async def _afetch_results(self, queryset, page_queryset):
+        if not self.cache_results:
+            return [obj async for obj in page_queryset[:self.page_size + 1]]
+
+        key = self._get_cache_key()
+        ids = search_cache.get_cached_ids(key)
+        if ids is None:
+            results = [obj async for obj in page_queryset[:self.page_size + 1]]
+            search_cache.set_cached_ids(key, [self._get_pk(obj) for obj in results])
+            return results
+
+        objects = {self._get_pk(obj): obj async for obj in self._get_cached_rows(queryset, ids)}
+        return [objects[pk] for pk in ids if pk in objects]
+
+    def _get_cached_rows(self, queryset, ids):
+        """
+        Строки закэшированной страницы одной выборкой по первичному ключу из чистого
+        queryset модели: цепочка фильтров (FTS, доступность по датам, триграммы)
+        не повторяется, сохраняются только select_related/prefetch_related и .values().
+        С аннотациями (ранг FTS нужен курсору) выбираем из исходного queryset.
+        """
+        if queryset.query.annotations:
+            return queryset.filter(pk__in=ids)
+        rows = queryset.model._default_manager.filter(pk__in=ids)
+        rows.query.select_related = queryset.query.select_related
+        rows = rows.prefetch_related(*queryset._prefetch_related_lookups)
+        if queryset._fields is not None:
+            rows = rows.values(*queryset._fields)
+        return rows
+
+    def _get_pk(self, instance):
+        # Строки быстрого пути (.values()) — словари
+        return instance['id'] if isinstance(instance, dict) else instance.pk
+
+    def _get_keyset_filter(self, ordering, position):
+        """
+        Строит условие (a, id) > (va, vid) с учётом направления каждого поля:
+        a > va OR (a = va AND id > vid).
+        """
+        condition = Q()
+        equal = {}
+        for order, value in zip(ordering, position):
+            field_name = order.lstrip('-')
+            lookup = '__lt' if order.startswith('-') else '__gt'
+            condition |= Q(**equal, **{field_name + lookup: value})
+            equal[field_name] = value
+        return condition
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if self.page:
+            position = self._get_position_from_instance(self.page[-1], self.ordering)
+        else:
+            position = self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.page:
+            position = self._get_position_from_instance(self.page[0], self.ordering)
+        else:
+            position = self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            querystring = b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+            position = tokens.get('p')
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if position is not None and len(position) != len(self.ordering):
+            # Курсор был выдан для другой сортировки
+            raise NotFound(self.invalid_cursor_message)
+
+        return Cursor(offset=0, reverse=reverse, position=position)
+
+    def _get_position_from_instance(self, instance, ordering):
+        position = []
+        for order in ordering:
+            field_name = order.lstrip('-')
+            if isinstance(instance, dict):
+                attr = instance[field_name]
+            else:
+                attr = getattr(instance, field_name)
+            position.append(str(attr))
+        return position
@@ -0,0 +1,103 @@
+import csv
+import io
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на orjson: тот же вывод, что у DRF с настройками по умолчанию
+    (COMPACT_JSON, UNICODE_JSON), но кодирование в несколько раз быстрее.
+    - datetime/date/time и всё, чего orjson не знает (Decimal, lazy-строки, QuerySet),
+      кодируются тем же DRF JSONEncoder.default, поэтому цены и даты совпадают байт в байт;
+    - отступы (?indent / Accept: application/json; indent=4), другие JSON-настройки
+      DRF и значения, которые orjson не может закодировать (целые больше 64 бит),
+      уходят в обычный JSONRenderer;
+    - без установленного orjson рендерер ведёт себя как JSONRenderer.
+    Отличие одно: NaN/Infinity orjson пишет как null, а не ошибкой STRICT_JSON.
+    """
+    options = 0 if orjson is None else (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (orjson is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Как и JSONRenderer, экранируем U+2028/U+2029 (JSON как подмножество JavaScript)
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class ExportRenderer(BaseRenderer):
+    """
+    Рендерер выгрузки (StreamingExportMixin): заголовок и строки рендерятся отдельно,
+    чтобы писать их в поток пачками. render() — для обычных ответов тем же форматом
+    (ошибки, detail с ?format=).
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        fields = list(rows[0]) if rows else []
+        return self.render_header(fields) + self.render_rows(rows, fields)
+
+    def render_header(self, fields):
+        return b''
+
+    def render_rows(self, rows, fields):
+        raise NotImplementedError
+
+
+class NDJSONRenderer(ExportRenderer):
+    """Объект JSON на строку (application/x-ndjson), значения — как у ORJSONRenderer."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    json_renderer = ORJSONRenderer()
+
+    def render_rows(self, rows, fields):
+        return b''.join(self.json_renderer.render(row) + b'\n' for row in rows)
+
+
+class CSVRenderer(ExportRenderer):
+    """
+    CSV с заголовком из полей сериализатора. Списки и словари (reviews) пишутся
+    JSON в ячейке, None — пустой ячейкой. Строки, начинающиеся с = + - @,
+    экранируются апострофом, чтобы табличный редактор не выполнил их как формулу.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    formula_prefixes = ('=', '+', '-', '@', '\t', '\r')
+    json_renderer = ORJSONRenderer()
+
+    def render_header(self, fields):
+        return self._write([fields])
+
+    def render_rows(self, rows, fields):
+        return self._write([self._get_cell(row.get(field)) for field in fields] for row in rows)
+
+    def _get_cell(self, value):
+        if isinstance(value, (list, dict)):
+            return self.json_renderer.render(value).decode()
+        if isinstance(value, str) and value.startswith(self.formula_prefixes):
+            return f"'{value}"
+        return value
+
+    def _write(self, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode()
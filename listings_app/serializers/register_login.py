@@ -2,6 +2,12 @@ from django.contrib.auth.models import User
 from django.core.validators import EmailValidator
 from rest_framework import serializers
 from django.contrib.auth import authenticate
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from listings_app.authentication import get_user_by_email
+from listings_app.utils.token_revocation import RevocableRefreshToken
 
 
 
@@ -28,14 +34,16 @@ class RegisterSerializer(serializers.ModelSerializer):
         return data
 
     def validate_email(self, value):
-        if User.objects.filter(email=value).exists():
+        # Без учёта регистра, по индексу LOWER(email)
+        if get_user_by_email(value) is not None:
             raise serializers.ValidationError('A user with this email already exists')
         return value
 
     def create(self, validated_data):
 
         password = validated_data.pop('password')
-        user = User.objects.create(**validated_data)
+        # Пароль хешируем до вставки: один INSERT вместо INSERT + UPDATE
+        user = User(**validated_data)
         user.set_password(password)
         user.save()
 
@@ -52,3 +60,29 @@ class LoginSerializer(serializers.Serializer):
         if user is None:
             raise serializers.ValidationError("Invalid login credentials.")
         return user
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Обновление токенов с проверкой отзыва. При ротации старый refresh токен
+    отзывается (BLACKLIST_AFTER_ROTATION без приложения token_blacklist),
+    поэтому повторно его использовать нельзя, в том числе параллельными запросами.
+    """
+    token_class = RevocableRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION and not refresh.revoke():
+                raise InvalidToken("Token is blacklisted")
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+
+            data["refresh"] = str(refresh)
+
+        return data
@@ -5,7 +5,7 @@ from listings_app.models import Review
 
 class ReviewSerializer(serializers.ModelSerializer):
     user = serializers.ReadOnlyField(source='user.username')  # Make user read-only, as it should be auto-assigned
-    listing = serializers.SlugRelatedField(slug_field='slug', read_only=True)  # Display listing by slug, read-only
+    listing = serializers.PrimaryKeyRelatedField(read_only=True)  # Listing has no slug, display it by id
 
     class Meta:
         model = Review
@@ -27,8 +27,7 @@ class ReviewSerializer(serializers.ModelSerializer):
         request = self.context.get('request')  # Get the request from the serializer context
         listing = self.context.get('listing')   # Listing passed to the serializer context
 
-        return Review.objects.create(
-            listing=listing,
-            user=request.user,
-            **validated_data
-        )
\ No newline at end of file
+        # listing/user могут прийти и через serializer.save(listing=..., user=...)
+        validated_data.setdefault('listing', listing)
+        validated_data.setdefault('user', request.user)
+        return Review.objects.create(**validated_data)
\ No newline at end of file
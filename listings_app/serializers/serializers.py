@@ -9,6 +9,7 @@ from django.contrib.auth.models import User
 from rest_framework import serializers
 
 from listings_app.models.search_query import SearchQuery
+from listings_app.serializers.sparse import SparseFieldsetMixin
 
 
 
@@ -37,22 +38,47 @@ class BookingSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'listing', 'owner', 'start_date', 'end_date', 'is_canceled']
 
 
+class BookingBulkUpdateSerializer(serializers.Serializer):
+    """
+    Массовое изменение бронирований владельцем листинга:
+    {"ids": [1, 2, 3], "is_confirmed": true} или {"ids": [...], "is_canceled": true}.
+    """
+    MAX_IDS = 5000
+
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=MAX_IDS)
+    is_confirmed = serializers.BooleanField(required=False)
+    is_canceled = serializers.BooleanField(required=False)
+
+    def validate_is_canceled(self, value):
+        # Снятие отмены снова занимает даты и требует проверки пересечений по каждому бронированию
+        if not value:
+            raise serializers.ValidationError("Отменённые бронирования нельзя восстановить массово.")
+        return value
+
+    def validate(self, attrs):
+        if 'is_confirmed' not in attrs and 'is_canceled' not in attrs:
+            raise serializers.ValidationError("Укажите is_confirmed или is_canceled.")
+        # Порядок сохраняем, дубликаты убираем
+        attrs['ids'] = list(dict.fromkeys(attrs['ids']))
+        return attrs
+
+
 class LandlordListingSerializer(serializers.ModelSerializer):
     bookings = BookingSerializer(many=True, read_only=True)
 
     class Meta:
         model = Listing
-        fields = '__all__'
-        read_only_fields = ['id', 'owner', 'created_at', 'update_at']
+        exclude = ['location_normalized', 'city_normalized', 'rating_sum']
+        read_only_fields = ['id', 'owner', 'created_at', 'update_at', 'avg_rating']
 
 
-class ListingSerializer(serializers.ModelSerializer):
+class ListingSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     owner = serializers.ReadOnlyField(source='owner.username')
     reviews = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
 
     class Meta:
         model = Listing
-        fields = '__all__'
+        exclude = ['location_normalized', 'city_normalized', 'rating_sum']
         read_only_fields = ['avg_rating']
 
 
@@ -76,5 +102,18 @@ class SearchQuerySerializer(serializers.ModelSerializer):
     # print(hasattr(serializers,'source'))
     class Meta:
         model = SearchQuery
-        fields = '__all__'
+        exclude = ['query_hash']
         read_only_fields = ['owner', 'created_at']
+
+
+class PopularSearchQuerySerializer(serializers.Serializer):
+    title = serializers.CharField(allow_null=True)
+    description = serializers.CharField(allow_null=True)
+    location = serializers.CharField(allow_null=True)
+    city = serializers.CharField(allow_null=True)
+    rooms_min = serializers.FloatField(allow_null=True)
+    rooms_max = serializers.FloatField(allow_null=True)
+    property_type = serializers.CharField(allow_null=True)
+    price_min = serializers.DecimalField(max_digits=10, decimal_places=2, allow_null=True)
+    price_max = serializers.DecimalField(max_digits=10, decimal_places=2, allow_null=True)
+    count = serializers.IntegerField(source='total')
@@ -0,0 +1,109 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+from rest_framework.serializers import BaseSerializer, SerializerMethodField
+
+FIELDS_PARAM = 'fields'
+
+
+def get_requested_fields(request):
+    """
+    Разбирает `?fields=id,title,price`. Возвращает None, если параметра нет
+    или запрос не GET (ответы на запись всегда полные).
+    """
+    if request is None or request.method != 'GET':
+        return None
+    value = request.query_params.get(FIELDS_PARAM)
+    if not value:
+        return None
+    fields = {name.strip() for name in value.split(',') if name.strip()}
+    return fields or None
+
+
+class SparseFieldsetMixin:
+    """
+    Оставляет в сериализаторе только поля из `?fields=`.
+    Неизвестные имена игнорируются.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = get_requested_fields(self.context.get('request'))
+        if requested and requested & set(self.fields):
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+
+def get_values_lookup(field, model):
+    """
+    Путь для .values() по полю сериализатора ('owner.username' -> 'owner__username')
+    или None, если поле нельзя прочитать одной колонкой (many=True, вложенные сериализаторы,
+    SerializerMethodField, обратные связи).
+    """
+    if isinstance(field, (ManyRelatedField, BaseSerializer, SerializerMethodField)) or field.source == '*':
+        return None
+
+    current_model = model
+    path = []
+    for index, attr in enumerate(field.source_attrs):
+        try:
+            model_field = current_model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        is_last = index == len(field.source_attrs) - 1
+
+        if not model_field.is_relation:
+            if not is_last or not model_field.concrete:
+                return None
+            path.append(attr)
+            return '__'.join(path)
+
+        if not (model_field.many_to_one or model_field.one_to_one) or not model_field.concrete:
+            return None
+        if is_last:
+            # PrimaryKeyRelatedField по внешнему ключу -> колонка owner_id
+            if isinstance(field, PrimaryKeyRelatedField):
+                path.append(model_field.attname)
+                return '__'.join(path)
+            return None
+        path.append(attr)
+        current_model = model_field.related_model
+    return None
+
+
+class ValuesRowSerializer:
+    """
+    Быстрый путь для списков: строки из queryset.values() превращаются в ответ
+    через to_representation полей исходного сериализатора, без создания
+    экземпляров модели и без обхода атрибутов ModelSerializer.
+    Формат ответа совпадает с обычным сериализатором.
+    """
+
+    def __init__(self, serializer, model):
+        self.columns = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            lookup = get_values_lookup(field, model)
+            if lookup is None:
+                raise ValueError(f'Field {name!r} can not be read with .values()')
+            self.columns.append((name, lookup, field.to_representation))
+
+    @classmethod
+    def supports(cls, serializer, model):
+        return all(
+            field.write_only or get_values_lookup(field, model) is not None
+            for field in serializer.fields.values()
+        )
+
+    def get_lookups(self):
+        return [lookup for name, lookup, to_representation in self.columns]
+
+    def to_representation(self, rows):
+        columns = self.columns
+        return [
+            {
+                name: None if row[lookup] is None else to_representation(row[lookup])
+                for name, lookup, to_representation in columns
+            }
+            for row in rows
+        ]
@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from listings_app.models import Booking, Listing
+from listings_app.utils import availability_calendar
+from listings_app.utils.full_text_search import index_listing, unindex_listing
+from listings_app.utils.search_cache import (
+    get_listing_snapshot, invalidate_for_booking, invalidate_for_listing
+)
+from listings_app.utils.user_cache import user_cache
+
+
+@receiver(post_save, sender=Listing)
+def update_listing_search_index(sender, instance, **kwargs):
+    index_listing(instance)
+
+
+@receiver(post_delete, sender=Listing)
+def remove_listing_search_index(sender, instance, **kwargs):
+    unindex_listing(instance.pk)
+
+
+CALENDAR_FIELDS = ('is_active', 'available_from', 'available_until')
+
+
+@receiver(post_save, sender=Listing)
+def invalidate_listing_caches(sender, instance, **kwargs):
+    old_snapshot = getattr(instance, '_search_snapshot', None)
+    snapshot = get_listing_snapshot(instance)
+    invalidate_for_listing(old_snapshot, snapshot)
+    if old_snapshot and any(old_snapshot[field] != snapshot[field] for field in CALENDAR_FIELDS):
+        availability_calendar.invalidate_listing(instance.pk)
+    instance._search_snapshot = snapshot
+
+
+@receiver(post_delete, sender=Listing)
+def invalidate_deleted_listing_caches(sender, instance, **kwargs):
+    invalidate_for_listing(get_listing_snapshot(instance))
+    availability_calendar.invalidate_listing(instance.pk)
+
+
+@receiver(post_save, sender=Booking)
+def invalidate_booking_caches(sender, instance, **kwargs):
+    dates = (instance.start_date, instance.end_date)
+    old_dates = getattr(instance, '_loaded_dates', dates)
+    invalidate_for_booking()
+    availability_calendar.invalidate_months(instance.listing_id, old_dates, dates)
+    instance._loaded_dates = dates
+
+
+@receiver(post_delete, sender=Booking)
+def invalidate_deleted_booking_caches(sender, instance, **kwargs):
+    invalidate_for_booking()
+    availability_calendar.invalidate_months(instance.listing_id, (instance.start_date, instance.end_date))
+
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Смена пароля, деактивация, удаление — следующий запрос перечитает пользователя
+    user_cache.invalidate(instance.pk)
@@ -1,3 +1,727 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import threading
+from base64 import b64encode
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from listings_app.db.mysql.base import Database as MySQLDatabase, DatabaseWrapper as PooledMySQLDatabaseWrapper
+from listings_app.db.pool import ConnectionPool
+from listings_app.db.router import set_pinned
+from listings_app.models import Booking, Listing, Review, RevokedToken, SearchQuery, SearchQueryRollup
+from listings_app.serializers.serializers import ListingSerializer
+from listings_app.utils import availability_calendar, search_cache
+from listings_app.utils.query_budget import query_budget
+from listings_app.utils.search_log import SearchQueryBuffer
+from listings_app.utils.token_revocation import RevocationRegistry
+from listings_app.views.listing import SearchListingListView
+
+
+class ApiTestCase(TestCase):
+    """Владелец объявлений (landlord), гость с бронированиями и отзывами и клиент API."""
+
+    def setUp(self):
+        # Кэш поиска и календаря общий для тестов процесса
+        cache.clear()
+        self.landlord = User.objects.create_user('landlord', 'landlord@example.com', 'password')
+        self.guest = User.objects.create_user('guest', 'guest@example.com', 'password')
+        self.client = APIClient()
+
+    def create_listings(self, count, owner=None):
+        return [
+            Listing.objects.create(
+                owner=owner or self.landlord,
+                title=f'Listing {index}',
+                description='Bright apartment close to the park.',
+                location='Mitte',
+                city='Berlin',
+                rooms=2,
+                property_type='apartment',
+                price=Decimal('500.00') + index,
+            )
+            for index in range(count)
+        ]
+
+    def create_bookings(self, listing, count, owner=None):
+        start = date(2000, 1, 1)
+        return [
+            Booking.objects.create(
+                listing=listing,
+                owner=owner or self.guest,
+                start_date=start + timedelta(days=index * 3),
+                end_date=start + timedelta(days=index * 3 + 2),
+                is_confirmed=True,
+            )
+            for index in range(count)
+        ]
+
+    def create_reviews(self, listing, count):
+        return Review.objects.bulk_create([
+            Review(listing=listing, user=self.guest, rating=1 + index % 5, comment='Nice')
+            for index in range(count)
+        ])
+
+
+class QueryBudgetTests(ApiTestCase):
+    """
+    Число запросов списков не зависит от числа строк (нет N+1):
+    один и тот же бюджет для маленького и большого набора.
+    """
+
+    def assert_constant_queries(self, budget, url_for_size, fill):
+        for size in (2, 12):
+            url = url_for_size(fill(size))
+            cache.clear()
+            with query_budget(budget):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+    def test_listing_list(self):
+        self.client.force_authenticate(self.guest)
+
+        def fill(size):
+            Review.objects.all().delete()
+            Listing.objects.all().delete()
+            for listing in self.create_listings(size):
+                self.create_reviews(listing, 2)
+
+        # страница, отзывы (prefetch); ETag из версий в кэше, без запроса
+        self.assert_constant_queries(2, lambda _: '/api/listings/', fill)
+
+    def test_booking_list(self):
+        self.client.force_authenticate(self.landlord)
+        listing = self.create_listings(1)[0]
+
+        def fill(size):
+            Booking.objects.all().delete()
+            self.create_bookings(listing, size)
+            return listing
+
+        # объявление (карта объектов), бронирования
+        self.assert_constant_queries(2, lambda listing: f'/api/listings/{listing.pk}/bookings/', fill)
+
+    def test_review_list(self):
+        self.client.force_authenticate(self.guest)
+        listing = self.create_listings(1)[0]
+
+        def fill(size):
+            Review.objects.all().delete()
+            self.create_reviews(listing, size)
+            return listing
+
+        # объявление (карта объектов), отзывы с авторами (select_related)
+        self.assert_constant_queries(2, lambda listing: f'/api/listings/{listing.pk}/reviews/', fill)
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    """Параллельные запросы на одни и те же даты создают ровно одно бронирование."""
+    threads = 8
+
+    def setUp(self):
+        cache.clear()
+        landlord = User.objects.create_user('landlord', 'landlord@example.com', 'password')
+        self.guests = [
+            User.objects.create_user(f'guest{index}', f'guest{index}@example.com', 'password')
+            for index in range(self.threads)
+        ]
+        self.listing = Listing.objects.create(
+            owner=landlord, title='Contested', description='d', location='Mitte', city='Berlin',
+            rooms=2, property_type='apartment', price=Decimal('500.00'),
+        )
+
+    def test_same_dates_book_once(self):
+        start = date.today() + timedelta(days=30)
+        payload = {'start_date': start.isoformat(), 'end_date': (start + timedelta(days=3)).isoformat()}
+        barrier = threading.Barrier(self.threads)
+        statuses = []
+
+        def book(guest):
+            client = APIClient()
+            client.force_authenticate(guest)
+            try:
+                barrier.wait()
+                statuses.append(client.post(f'/api/listings/{self.listing.pk}/bookings/', payload).status_code)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=book, args=(guest,)) for guest in self.guests]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(sorted(statuses), [201] + [400] * (self.threads - 1))
+        self.assertEqual(Booking.objects.filter(listing=self.listing).count(), 1)
+
+
+class BookingDetailTests(ApiTestCase):
+    """Число запросов просмотра и удаления бронирования, 404 для чужого бронирования."""
+
+    def setUp(self):
+        super().setUp()
+        self.listing = self.create_listings(1)[0]
+        self.booking = self.create_bookings(self.listing, 1)[0]
+        self.url = f'/api/listings/{self.listing.pk}/bookings/{self.booking.pk}/'
+
+    def test_guest_list(self):
+        self.client.force_authenticate(self.guest)
+        # объявление (карта объектов), бронирования
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/listings/{self.listing.pk}/bookings/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_retrieve(self):
+        self.client.force_authenticate(self.guest)
+        # объявление (карта объектов), бронирование
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['id'], self.booking.pk)
+
+    def test_destroy(self):
+        self.client.force_authenticate(self.guest)
+        # объявление (карта объектов), бронирование, DELETE
+        with self.assertNumQueries(3):
+            response = self.client.delete(self.url)
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Booking.objects.filter(pk=self.booking.pk).exists())
+
+    def test_destroy_invisible_booking_is_not_found(self):
+        stranger = User.objects.create_user('stranger', 'stranger@example.com', 'password')
+        self.client.force_authenticate(stranger)
+        response = self.client.delete(self.url)
+        # Чужое бронирование не попадает в queryset: 404, а не 403 (не раскрываем, что оно есть)
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(Booking.objects.filter(pk=self.booking.pk).exists())
+
+    def test_landlord_cannot_destroy_guest_booking(self):
+        self.client.force_authenticate(self.landlord)
+        response = self.client.delete(self.url)
+        self.assertEqual(response.status_code, 403)
+        self.assertTrue(Booking.objects.filter(pk=self.booking.pk).exists())
+
+
+class ReviewListTests(ApiTestCase):
+    """Список отзывов (просмотра и удаления отдельного отзыва в API нет)."""
+
+    def setUp(self):
+        super().setUp()
+        self.listing = self.create_listings(1)[0]
+        self.create_reviews(self.listing, 3)
+        self.url = f'/api/listings/{self.listing.pk}/reviews/'
+
+    def test_list(self):
+        self.client.force_authenticate(self.guest)
+        # объявление (карта объектов), отзывы с авторами (select_related)
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+
+class BookingBulkUpdateTests(ApiTestCase):
+    """Массовое подтверждение меняет только бронирования своих объявлений и не подтверждает отменённые."""
+
+    def test_confirm(self):
+        own, canceled = self.create_bookings(self.create_listings(1)[0], 2)
+        Booking.objects.filter(pk=canceled.pk).update(is_canceled=True, is_confirmed=False)
+        other = self.create_bookings(self.create_listings(1, owner=self.guest)[0], 1)[0]
+        Booking.objects.update(is_confirmed=False)
+        self.client.force_authenticate(self.landlord)
+
+        response = self.client.post(
+            '/api/bookings/bulk/', {'ids': [own.pk, canceled.pk, other.pk], 'is_confirmed': True}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(
+            {row['id']: row['status'] for row in response.data['results']},
+            {own.pk: 'updated', canceled.pk: 'canceled', other.pk: 'not_found'},
+        )
+        self.assertEqual(
+            set(Booking.objects.filter(is_confirmed=True).values_list('id', flat=True)), {own.pk})
+
+    def test_booking_canceled_after_check_is_not_confirmed(self):
+        booking = self.create_bookings(self.create_listings(1)[0], 1)[0]
+        Booking.objects.update(is_confirmed=False)
+        self.client.force_authenticate(self.landlord)
+        values = QuerySet.values
+
+        def cancel_after_read(queryset, *fields):
+            # Гость отменяет бронирование сразу после проверки (как без блокировки строк в SQLite)
+            rows = list(values(queryset, *fields))
+            Booking.objects.filter(pk=booking.pk).update(is_canceled=True)
+            return rows
+
+        with mock.patch.object(QuerySet, 'values', cancel_after_read):
+            response = self.client.post(
+                '/api/bookings/bulk/', {'ids': [booking.pk], 'is_confirmed': True}, format='json')
+
+        self.assertEqual(response.data['updated'], 0)
+        self.assertEqual(response.data['results'], [{'id': booking.pk, 'status': 'canceled'}])
+        self.assertFalse(Booking.objects.get(pk=booking.pk).is_confirmed)
+
+
+class AvailabilityCalendarTests(ApiTestCase):
+    """Кэш месяцев календаря занятости."""
+    start, end = date(2000, 1, 1), date(2000, 2, 1)
+
+    def test_booking_during_build_is_not_cached(self):
+        listing = self.create_listings(1)[0]
+        build = availability_calendar._build_months
+
+        def build_then_book(listing_pk, months):
+            built = build(listing_pk, months)
+            # Параллельное бронирование коммитится после чтения бронирований
+            with self.captureOnCommitCallbacks(execute=True):
+                self.create_bookings(listing, 1)
+            return built
+
+        with mock.patch.object(availability_calendar, '_build_months', build_then_book):
+            self.assertEqual(availability_calendar.get_occupancy(listing.pk, self.start, self.end), '0' * 31)
+        self.assertEqual(availability_calendar.get_occupancy(listing.pk, self.start, self.end), '11' + '0' * 29)
+
+    def test_endpoint_not_modified(self):
+        self.client.force_authenticate(self.guest)
+        listing = self.create_listings(1)[0]
+        url = f'/api/listings/{listing.pk}/calendar/?from=2000-01-01&to=2000-02-01'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['listing'], listing.pk)
+
+        for if_none_match in (response['ETag'], f'W/{response["ETag"]}', '*'):
+            with self.subTest(if_none_match=if_none_match), self.assertNumQueries(0):
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=if_none_match).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_endpoint_invalid_pk(self):
+        self.client.force_authenticate(self.guest)
+        self.assertEqual(self.client.get('/api/listings/abc/calendar/').status_code, 404)
+        self.assertEqual(self.client.get('/api/listings/999/calendar/').status_code, 404)
+
+    @override_settings(LISTING_CALENDAR_CACHE_TIMEOUT=3600, LISTING_CALENDAR_LOCAL_CACHE_TIMEOUT=5)
+    def test_process_cache_timeout_is_short(self):
+        self.assertEqual(availability_calendar.get_timeout(), 5)
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}}):
+            self.assertEqual(availability_calendar.get_timeout(), 3600)
+
+
+@override_settings(TOKEN_REVOCATION_SYNC_INTERVAL=0, TOKEN_REVOCATION_SYNC_OVERLAP=60)
+class RevocationRegistryTests(TestCase):
+    """Фильтр отзыва refresh токенов подтягивает отзывы других процессов."""
+
+    def revoke_elsewhere(self, pk, jti, revoked_ago=0):
+        # Отзыв другим процессом: строка вставлена revoked_ago секунд назад, видна с этого момента
+        RevokedToken.objects.create(pk=pk, jti=jti, expires_at=timezone.now() + timedelta(days=1))
+        RevokedToken.objects.filter(pk=pk).update(revoked_at=timezone.now() - timedelta(seconds=revoked_ago))
+
+    def test_sync_picks_up_late_commits(self):
+        registry = RevocationRegistry()
+        self.assertFalse(registry.is_revoked('new'))
+        self.revoke_elsewhere(100, 'new')
+        self.assertTrue(registry.is_revoked('new'))
+        # Меньший id, но транзакция закоммичена после синхронизации, увидевшей id 100
+        self.revoke_elsewhere(50, 'late', revoked_ago=30)
+
+        self.assertTrue(registry.is_revoked('late'))
+        self.assertFalse(registry.is_revoked('valid'))
+
+    def test_revoke_during_rebuild(self):
+        registry = RevocationRegistry()
+        values_list = QuerySet.values_list
+
+        def revoke_while_reading(queryset, *fields, **kwargs):
+            registry.revoke('during', timezone.now() + timedelta(days=1))
+            return values_list(queryset, *fields, **kwargs)
+
+        with mock.patch.object(QuerySet, 'values_list', revoke_while_reading):
+            registry._refresh()
+        self.assertIn('during', registry._bloom)
+
+
+@override_settings(DATABASE_REPLICAS=['default'], DATABASE_REPLICA_STICKY_SECONDS=5)
+class ReplicaStalenessTests(TestCase):
+    """Страницы поиска, прочитанные из реплики сразу после записи, не кэшируются."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_process_cache_skips_replica_reads(self):
+        # Записи других воркеров в LocMemCache не видны
+        self.assertTrue(search_cache.may_be_stale())
+
+    def test_shared_cache_uses_last_write(self):
+        with mock.patch.object(search_cache, 'is_shared_cache', return_value=True):
+            self.assertFalse(search_cache.may_be_stale())
+            with self.captureOnCommitCallbacks(execute=True):
+                search_cache.invalidate_for_booking()
+            self.assertTrue(search_cache.may_be_stale())
+            set_pinned(True)
+            try:
+                self.assertFalse(search_cache.may_be_stale())
+            finally:
+                set_pinned(False)
+
+
+class SearchCacheInvalidationTests(ApiTestCase):
+    """Версии поиска меняются только после коммита записи."""
+
+    def test_versions_bumped_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.create_listings(1)
+            self.assertIsNone(cache.get(search_cache.LISTINGS_VERSION_KEY))
+        for callback in callbacks:
+            callback()
+        self.assertIsNotNone(cache.get(search_cache.LISTINGS_VERSION_KEY))
+
+
+class ListingCollectionETagTests(ApiTestCase):
+    """ETag списка объявлений: 304 без запросов к БД, новый ETag после записи."""
+
+    # Без ротации версии раз в минуту (она только для кэша процесса)
+    @mock.patch.object(search_cache, 'is_shared_cache', return_value=True)
+    def test_not_modified_until_write(self, is_shared_cache):
+        self.client.force_authenticate(self.guest)
+        listing = self.create_listings(1)[0]
+        etag = self.client.get('/api/listings/')['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/listings/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Поле вне поиска тоже меняет тело ответа
+        listing.description = 'Renovated.'
+        with self.captureOnCommitCallbacks(execute=True):
+            listing.save()
+        response = self.client.get('/api/listings/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_no_etag_for_possibly_stale_replica_read(self):
+        self.client.force_authenticate(self.guest)
+        self.create_listings(1)
+        with mock.patch.object(search_cache, 'may_be_stale', return_value=True):
+            response = self.client.get('/api/listings/', HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+    def test_retrieve(self):
+        self.client.force_authenticate(self.guest)
+        listing = self.create_listings(1)[0]
+        response = self.client.get(f'/api/listings/{listing.pk}/')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(f'/api/listings/{listing.pk}/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        self.assertEqual(self.client.get('/api/listings/abc/').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/listings/{listing.pk + 1}/').status_code, 404)
+
+
+class ListingCursorPaginationTests(ApiTestCase):
+    """Keyset-пагинация списка объявлений: одинаковые значения сортировки, обратные страницы, неверный курсор."""
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.guest)
+        listings = self.create_listings(7)
+        # Повторяющиеся цены: порядок внутри цены задаёт id
+        for listing, price in zip(listings, (300, 100, 200, 100, 300, 100, 200)):
+            listing.price = Decimal(price)
+            listing.save()
+        self.by_price = [listing.pk for listing in sorted(listings, key=lambda listing: (listing.price, listing.pk))]
+
+    def get_page(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']], response.data['next'], response.data['previous']
+
+    def walk(self, url, link):
+        """id всех страниц по ссылкам next (link=1) или previous (link=2), начиная с url."""
+        pages = []
+        while url:
+            page = self.get_page(url)
+            pages.append(page[0])
+            url = page[link]
+        return pages
+
+    def test_forward_pages_with_ties(self):
+        pages = self.walk('/api/listings/?ordering=price&page_size=3', 1)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), self.by_price)
+
+    def test_descending_ties(self):
+        pages = self.walk('/api/listings/?ordering=-price&page_size=2', 1)
+        expected = [listing.pk for listing in sorted(
+            Listing.objects.all(), key=lambda listing: (listing.price, listing.pk), reverse=True)]
+        self.assertEqual(sum(pages, []), expected)
+
+    def test_previous_pages(self):
+        last = self.walk('/api/listings/?ordering=price&page_size=3', 1)
+        ids, _, previous = self.get_page(self.last_page_url('/api/listings/?ordering=price&page_size=3'))
+        self.assertEqual(ids, last[-1])
+        pages = self.walk(previous, 2)
+        self.assertEqual(sum(reversed(pages), []), self.by_price[:6])
+        self.assertEqual(pages[-1], self.by_price[:3])
+
+    def last_page_url(self, url):
+        while True:
+            _, next_url, _ = self.get_page(url)
+            if next_url is None:
+                return url
+            url = next_url
+
+    def test_first_page_has_no_previous(self):
+        _, next_url, previous = self.get_page('/api/listings/?ordering=price&page_size=3')
+        self.assertIsNone(previous)
+        # Страница, открытая по ссылке previous со второй страницы, снова первая
+        _, _, previous = self.get_page(next_url)
+        ids, _, first_previous = self.get_page(previous)
+        self.assertEqual(ids, self.by_price[:3])
+        self.assertIsNone(first_previous)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/listings/?cursor=not-a-cursor').status_code, 404)
+        # Позиция из трёх значений при сортировке (поле, id)
+        cursor = b64encode(b'r=0&p=1&p=2&p=3').decode()
+        self.assertEqual(self.client.get(f'/api/listings/?cursor={cursor}').status_code, 404)
+        # Курсор по price (цена + id) той же длины, но цена не дата для сортировки по created_at
+        _, next_url, _ = self.get_page('/api/listings/?ordering=price&page_size=3')
+        cursor = parse_qs(urlparse(next_url).query)['cursor'][0]
+        response = self.client.get('/api/listings/', {'ordering': '-created_at', 'cursor': cursor})
+        self.assertEqual(response.status_code, 404)
+
+    def test_search_rank_default_ordering(self):
+        weak, strong = self.create_listings(2)
+        weak.title, weak.description = 'Quiet flat', 'Garden view.'
+        strong.title, strong.description = 'Garden garden flat', 'Garden and garden terrace.'
+        weak.save()
+        strong.save()
+        pages = self.walk('/api/listings/?search=garden&page_size=1', 1)
+        # Без ?ordering= — по релевантности (bm25), постранично тоже
+        self.assertEqual(pages, [[strong.pk], [weak.pk]])
+
+
+class SearchQueryLogTests(ApiTestCase):
+    """Буфер поисковых запросов и bulk upsert счётчиков."""
+
+    def values(self, owner=None, **filters):
+        return {field: None for field in SearchQuery.KEY_FIELDS} | {'owner': owner} | filters
+
+    def test_buffer_coalesces_same_searches(self):
+        buffer = SearchQueryBuffer(flush_interval=60, max_size=100)
+        with mock.patch.object(buffer, '_ensure_worker'):
+            for _ in range(3):
+                buffer.add(self.values(city='berlin'))
+            buffer.add(self.values(city='berlin', rooms_min=2))
+            self.assertEqual(len(buffer._pending), 2)
+            self.assertFalse(SearchQuery.objects.exists())
+
+            self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(
+            dict(SearchQuery.objects.values_list('rooms_min', 'count')), {None: 3, 2: 1})
+        self.assertEqual(buffer.flush(), 0)
+
+    def test_buffer_flushes_when_full(self):
+        buffer = SearchQueryBuffer(flush_interval=60, max_size=2)
+        with mock.patch.object(buffer, '_ensure_worker'):
+            buffer.add(self.values(city='berlin'))
+            buffer.add(self.values(city='hamburg'))
+        self.assertEqual(SearchQuery.objects.count(), 2)
+        self.assertEqual(buffer._pending, {})
+
+    def test_increment_many_counts(self):
+        berlin = self.values(city='berlin')
+        SearchQuery.increment_many([(berlin, 2), (self.values(self.guest.pk, city='berlin'), 1)])
+        SearchQuery.increment_many([(berlin, 5)])
+
+        self.assertEqual(
+            dict(SearchQuery.objects.values_list('owner', 'count')), {None: 7, self.guest.pk: 1})
+        # Агрегаты по фильтрам без владельца: оба поиска в одном бакете
+        daily = SearchQueryRollup.objects.get(period=SearchQueryRollup.DAY)
+        self.assertEqual((daily.city, daily.count), ('berlin', 8))
+
+    def test_filtered_search_is_logged_in_request(self):
+        self.client.force_authenticate(self.guest)
+        self.client.get('/api/listings/', {'city': 'Berlin'})
+        self.client.get('/api/listings/', {'city': 'Berlin'})
+        # В тестах SEARCH_QUERY_FLUSH_INTERVAL = 0: запись сразу, в транзакции теста
+        self.assertEqual(SearchQuery.objects.get().count, 2)
+
+
+class ListingFilterValidationTests(ApiTestCase):
+    """Неверные параметры фильтров — 400, а не 500."""
+
+    def test_rating_min(self):
+        self.client.force_authenticate(self.guest)
+        rated, _ = self.create_listings(2)
+        Listing.objects.filter(pk=rated.pk).update(avg_rating=Decimal('4.50'))
+
+        for value in ('abc', 'NaN', 'Infinity'):
+            with self.subTest(value=value):
+                self.assertEqual(self.client.get('/api/listings/', {'rating_min': value}).status_code, 400)
+        response = self.client.get('/api/listings/', {'rating_min': '4.5'})
+        self.assertEqual([row['id'] for row in response.data['results']], [rated.pk])
+
+
+class FakeConnection:
+    """Соединение DB-API для тестов пула: ping без переподключения падает на «мёртвом» соединении."""
+
+    def __init__(self, alive=True):
+        self.alive = alive
+        self.closed = False
+        self.pings = []
+
+    def ping(self, reconnect=True):
+        self.pings.append(reconnect)
+        if not self.alive and not reconnect:
+            raise MySQLDatabase.OperationalError(2006, 'MySQL server has gone away')
+        self.alive = True
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Пул соединений процесса (listings_app.db.pool)."""
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch('listings_app.db.pool.time.monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = ConnectionPool(max_size=2, max_lifetime=600, max_idle_time=60)
+
+    def acquire(self, is_usable=lambda connection: True):
+        return self.pool.acquire(FakeConnection, is_usable)
+
+    def test_release_and_reuse(self):
+        connection, created_at, reused = self.acquire()
+        self.assertFalse(reused)
+        self.pool.release(connection, created_at)
+
+        self.now += 10
+        self.assertEqual(self.acquire(), (connection, created_at, True))
+        self.assertEqual(self.pool.get_stats()['created'], 1)
+        self.assertEqual(self.pool.get_stats()['reused'], 1)
+
+    def test_last_released_is_reused_first(self):
+        first, second = self.acquire(), self.acquire()
+        self.pool.release(*first[:2])
+        self.pool.release(*second[:2])
+        self.assertIs(self.acquire()[0], second[0])
+
+    def test_release_over_max_size_closes(self):
+        entries = [self.acquire() for _ in range(3)]
+        for connection, created_at, reused in entries:
+            self.pool.release(connection, created_at)
+        self.assertEqual(self.pool.get_stats()['idle'], 2)
+        self.assertTrue(entries[2][0].closed)
+
+    def test_idle_expiry(self):
+        connection, created_at, reused = self.acquire()
+        self.pool.release(connection, created_at)
+        self.now += 60
+        new_connection, _, reused = self.acquire()
+        self.assertFalse(reused)
+        self.assertIsNot(new_connection, connection)
+        self.assertTrue(connection.closed)
+
+    def test_lifetime_expiry(self):
+        connection, created_at, reused = self.acquire()
+        # Соединение часто используется (не простаивает), но старше max_lifetime
+        for _ in range(11):
+            self.now += 55
+            self.pool.release(connection, created_at)
+            connection, created_at, reused = self.acquire()
+        self.assertFalse(reused)
+        self.assertEqual(self.pool.get_stats()['discarded'], 1)
+
+    def test_unusable_connection_is_discarded(self):
+        connection, created_at, reused = self.acquire()
+        self.pool.release(connection, created_at)
+        new_connection, _, reused = self.acquire(is_usable=lambda connection: False)
+        self.assertFalse(reused)
+        self.assertTrue(connection.closed)
+
+    def test_discard_and_clear(self):
+        connection = self.acquire()[0]
+        self.pool.discard(connection)
+        self.assertTrue(connection.closed)
+        idle = self.acquire()
+        self.pool.release(*idle[:2])
+        self.pool.clear()
+        self.assertTrue(idle[0].closed)
+        self.assertEqual(self.pool.get_stats()['idle'], 0)
+
+    def test_mysql_health_check_does_not_reconnect(self):
+        wrapper = PooledMySQLDatabaseWrapper(dict(connection.settings_dict), alias='pool_test')
+        dead = FakeConnection(alive=False)
+        self.assertFalse(wrapper.is_raw_connection_usable(dead))
+        self.assertEqual(dead.pings, [False])
+        self.assertTrue(wrapper.is_raw_connection_usable(FakeConnection()))
+
+
+class StreamingExportTests(ApiTestCase):
+    """Выгрузка ?format=ndjson / ?format=csv: пачки по pk, порядок полей, фильтры."""
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.guest)
+        self.listings = self.create_listings(8)
+        # Маленькие пачки: 2 строки, затем по 3
+        for name, value in (('export_first_chunk_size', 2), ('export_chunk_size', 3)):
+            patcher = mock.patch.object(SearchListingListView, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def export(self, url, params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode(), response
+
+    def test_ndjson_batches(self):
+        with CaptureQueriesContext(connection) as queries:
+            body, response = self.export('/api/listings/', {'format': 'ndjson'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="listings.ndjson"')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['id'] for row in rows], [listing.pk for listing in self.listings])
+        # Пачки 2 + 3 + 3 и пустая: каждая — выборка объявлений и отзывов (prefetch)
+        listing_selects = [query for query in queries if query['sql'].startswith('SELECT "listings_app_listing"."id"')]
+        self.assertEqual(len(listing_selects), 4)
+
+    def test_csv_header_and_rows(self):
+        body, response = self.export('/api/listings/', {'format': 'csv'})
+        rows = list(csv.reader(io.StringIO(body)))
+        expected = [name for name, field in ListingSerializer().fields.items() if not field.write_only]
+        self.assertEqual(rows[0], expected)
+        self.assertEqual(len(rows), 1 + len(self.listings))
+        self.assertEqual([int(row[expected.index('id')]) for row in rows[1:]], [listing.pk for listing in self.listings])
+        self.assertEqual(rows[1][expected.index('owner')], 'landlord')
+
+    def test_filters_apply(self):
+        body, response = self.export('/api/listings/', {'format': 'ndjson', 'price_max': '503', 'ordering': '-price'})
+        # Фильтр учитывается, ?ordering= — нет (выгрузка по pk)
+        self.assertEqual(
+            [json.loads(line)['id'] for line in body.splitlines()], [listing.pk for listing in self.listings[:4]])
+
+    def test_empty_csv_has_header(self):
+        body, response = self.export('/api/listings/', {'format': 'csv', 'price_min': '10000'})
+        self.assertEqual(len(list(csv.reader(io.StringIO(body)))), 1)
+
+    def test_review_export(self):
+        self.create_reviews(self.listings[0], 5)
+        body, response = self.export(f'/api/listings/{self.listings[0].pk}/reviews/', {'format': 'ndjson'})
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="reviews.ndjson"')
+        self.assertEqual(len(body.splitlines()), 5)
@@ -1,14 +1,15 @@
 from django.urls import include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from listings_app.views.async_read import AsyncBookingListView, AsyncListingListView, AsyncReviewListView
 from listings_app.views.auth.login import LoginView
 from listings_app.views.auth.logout import LogoutView
 from listings_app.views.auth.register import RegisterView
-from listings_app.views.booking import BookingViewSet
+from listings_app.views.booking import BookingBulkUpdateView, BookingViewSet
 
 from listings_app.views.listing import SearchListingListView
 from listings_app.views.review import ListingReviewView
-from listings_app.views.search_query import SearchQueryListView
+from listings_app.views.search_query import PopularSearchQueryListView, SearchQueryListView
 from django.urls import path
 
 router = DefaultRouter()
@@ -33,7 +34,15 @@ urlpatterns = [
     path('listings/<int:listing_pk>/bookings/<int:pk>/',
          BookingViewSet.as_view({'get': 'retrieve', 'patch': 'partial_update', 'delete': 'destroy'}),
          name='booking-detail'),
+    path('bookings/bulk/', BookingBulkUpdateView.as_view(), name='booking-bulk-update'),
+
+
+    # Асинхронные (async ORM) варианты списков для запуска под ASGI, см. config/asgi.py
+    path('async/listings/', AsyncListingListView.as_view(), name='async-listing-list'),
+    path('async/listings/<int:listing_pk>/bookings/', AsyncBookingListView.as_view(), name='async-booking-list'),
+    path('async/listings/<int:listing_pk>/reviews/', AsyncReviewListView.as_view(), name='async-listing-review'),
 
 
     path('search-queries/', SearchQueryListView.as_view(), name='search-query-list'),
+    path('search-queries/popular/', PopularSearchQueryListView.as_view(), name='search-query-popular'),
 ]
@@ -0,0 +1,152 @@
+import hashlib
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.http import Http404
+
+from listings_app.checks import is_shared_cache
+from listings_app.models import Booking, Listing
+
+CACHE_PREFIX = 'listing_calendar'
+FREE = '0'
+BUSY = '1'
+
+
+def get_timeout():
+    """
+    С общим кэшем месяцы живут долго и сбрасываются версией. С LocMemCache сброс
+    доходит только до воркера, принявшего бронирование, поэтому месяцы живут секунды.
+    """
+    if is_shared_cache():
+        return getattr(settings, 'LISTING_CALENDAR_CACHE_TIMEOUT', 60 * 60 * 24)
+    return getattr(settings, 'LISTING_CALENDAR_LOCAL_CACHE_TIMEOUT', 5)
+
+
+def _month_start(day):
+    return day.replace(day=1)
+
+
+def _next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _months(start, end):
+    """Первые числа месяцев, пересекающихся с [start, end)."""
+    month = _month_start(start)
+    while month < end:
+        yield month
+        month = _next_month(month)
+
+
+def _version_key(listing_pk):
+    return f'{CACHE_PREFIX}:version:{listing_pk}'
+
+
+def _month_key(listing_pk, version, month):
+    return f'{CACHE_PREFIX}:{listing_pk}:{version}:{month:%Y-%m}'
+
+
+def _build_months(listing_pk, months):
+    """
+    Строит занятость для нескольких месяцев: один запрос за объявлением
+    и один за бронированиями всего диапазона (индекс listing, is_canceled, start_date, end_date).
+    День занят, если на эту ночь есть неотменённое бронирование
+    (start_date <= день < end_date) или он вне available_from/available_until.
+    """
+    # Месяцы кэшируются надолго, поэтому читаем из primary, а не из отстающей реплики
+    listing = Listing.objects.using(DEFAULT_DB_ALIAS).filter(pk=listing_pk).values('is_active', 'available_from', 'available_until').first()
+    if listing is None:
+        raise Http404('Listing not found.')
+
+    start, end = months[0], _next_month(months[-1])
+    days = [FREE] * (end - start).days
+    for index in range(len(days)):
+        day = start + timedelta(days=index)
+        if (not listing['is_active']
+                or (listing['available_from'] and day < listing['available_from'])
+                or (listing['available_until'] and day >= listing['available_until'])):
+            days[index] = BUSY
+
+    bookings = Booking.objects.using(DEFAULT_DB_ALIAS).filter(
+        listing_id=listing_pk, is_canceled=False, start_date__lt=end, end_date__gt=start
+    ).values_list('start_date', 'end_date')
+    for start_date, end_date in bookings:
+        for index in range(max((start_date - start).days, 0), min((end_date - start).days, len(days))):
+            days[index] = BUSY
+
+    result = {}
+    for month in months:
+        offset = (month - start).days
+        result[month] = ''.join(days[offset:offset + (_next_month(month) - month).days])
+    return result
+
+
+def get_occupancy(listing_pk, start, end):
+    """
+    Строка занятости по дням [start, end): '1' — занято, '0' — свободно.
+    Месяцы берутся из кэша, недостающие строятся одним проходом по БД.
+    """
+    version = cache.get(_version_key(listing_pk), 0)
+    months = list(_months(start, end))
+    keys = {month: _month_key(listing_pk, version, month) for month in months}
+    cached = cache.get_many(keys.values())
+    occupancy = {month: cached[key] for month, key in keys.items() if key in cached}
+
+    missing = [month for month in months if month not in occupancy]
+    if missing:
+        built = _build_months(listing_pk, missing)
+        # Бронирование, записанное во время построения, сменило версию:
+        # построенные месяцы могут его не содержать, отдаём их, но не кэшируем
+        if cache.get(_version_key(listing_pk), 0) == version:
+            cache.set_many({keys[month]: days for month, days in built.items()}, get_timeout())
+        occupancy.update(built)
+
+    days = ''.join(occupancy[month] for month in months)
+    offset = (start - months[0]).days
+    return days[offset:offset + (end - start).days]
+
+
+def get_busy_ranges(start, days):
+    """Занятые периоды [start, end) из строки занятости."""
+    ranges = []
+    range_start = None
+    for index, value in enumerate(days + FREE):
+        if value == BUSY and range_start is None:
+            range_start = index
+        elif value != BUSY and range_start is not None:
+            ranges.append({
+                'start': start + timedelta(days=range_start),
+                'end': start + timedelta(days=index),
+            })
+            range_start = None
+    return ranges
+
+
+def get_etag(listing_pk, start, end, days):
+    return hashlib.sha1(f'{listing_pk}:{start}:{end}:{days}'.encode()).hexdigest()
+
+
+def invalidate_months(listing_pk, *date_ranges):
+    """
+    Сбрасывает календарь после изменения бронирования с периодами (до и после изменения).
+    Меняется версия объявления, а не удаляются ключи месяцев: иначе запрос, который
+    строит месяц параллельно, записал бы в кэш занятость без нового бронирования.
+    """
+    if any(isinstance(start_date, date) and isinstance(end_date, date) for start_date, end_date in date_ranges):
+        invalidate_listing(listing_pk)
+
+
+def invalidate_listing(listing_pk):
+    """
+    Сбрасывает весь календарь объявления (изменились available_from/until,
+    is_active, бронирования или объявление удалено).
+    """
+    def bump():
+        # Версия живёт дольше месяцев, поэтому старые ключи не «воскреснут»
+        cache.set(_version_key(listing_pk), time.time_ns(), get_timeout() * 2)
+
+    # После коммита: до него параллельный запрос прочитал бы новую версию и старые бронирования
+    transaction.on_commit(bump)
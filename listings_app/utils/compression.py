@@ -0,0 +1,81 @@
+import gzip
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_LEVEL = 6
+# 4–5 для динамических ответов: почти как gzip -9 по размеру и в разы быстрее brotli 11
+BROTLI_QUALITY = 5
+
+
+def get_available_encodings():
+    """Поддерживаемые кодировки в порядке предпочтения сервера."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def parse_accept_encoding(header):
+    """{'gzip': 1.0, 'br': 0.5, ...} из Accept-Encoding; неверный q считается 0."""
+    accepted = {}
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def negotiate_encoding(header):
+    """
+    Кодировка для ответа: с наибольшим q среди поддерживаемых,
+    при равных q — br раньше gzip. None — отдаём без сжатия.
+    """
+    accepted = parse_accept_encoding(header or '')
+    best, best_quality = None, 0.0
+    for encoding in get_available_encodings():
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=BROTLI_QUALITY)
+    # mtime=0: одинаковое тело даёт одинаковые байты
+    return gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _get_stream_compressor(encoding):
+    """(process, finish): process сжимает кусок и сбрасывает буфер, чтобы клиент получил его сразу."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        return lambda chunk: compressor.process(chunk) + compressor.flush(), compressor.finish
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+
+def compress_stream(chunks, encoding):
+    process, finish = _get_stream_compressor(encoding)
+    for chunk in chunks:
+        if chunk:
+            yield process(chunk)
+    yield finish()
+
+
+async def acompress_stream(chunks, encoding):
+    process, finish = _get_stream_compressor(encoding)
+    async for chunk in chunks:
+        if chunk:
+            yield process(chunk)
+    yield finish()
@@ -0,0 +1,40 @@
+import hashlib
+
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+
+
+def make_etag(*parts):
+    """Сильный ETag из частей отпечатка: одинаковые части — одинаковое тело ответа."""
+    return quote_etag(hashlib.sha1(':'.join(str(part) for part in parts).encode()).hexdigest())
+
+
+def get_representation(request):
+    """
+    Всё, от чего кроме данных зависит тело: формат рендерера, путь с параметрами
+    (fields, cursor, фильтры) и пользователь (my=1).
+    """
+    return f'{request.accepted_renderer.format}:{request.get_full_path()}:{request.user.pk}'
+
+
+def get_validator_headers(etag, last_modified=None):
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified.timestamp())
+    return headers
+
+
+def is_not_modified(request, etag, last_modified=None):
+    """
+    Условный GET: If-None-Match (слабое сравнение, как положено для GET/HEAD),
+    а если его нет — If-Modified-Since с точностью до секунды.
+    """
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        if if_none_match.strip() == '*':
+            return True
+        return etag.removeprefix('W/') in {value.removeprefix('W/') for value in parse_etags(if_none_match)}
+
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    if if_modified_since is None or last_modified is None:
+        return False
+    return int(last_modified.timestamp()) <= if_modified_since
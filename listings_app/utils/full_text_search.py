@@ -0,0 +1,107 @@
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+LISTING_TABLE = 'listings_app_listing'
+FTS_TABLE = 'listings_app_listing_fts'
+FTS_COLUMNS = ('title', 'description', 'location', 'city')
+MYSQL_FULLTEXT_INDEX = 'listing_fulltext_idx'
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def get_search_terms(query):
+    """
+    Разбивает пользовательский ввод на слова.
+    Спецсимволы синтаксиса FTS отбрасываются, поэтому ввод нельзя «сломать».
+    """
+    return WORD_RE.findall(query or '')
+
+
+def _sqlite_match_expression(terms, columns=None):
+    expression = ' AND '.join(f'"{term}"*' for term in terms)
+    if columns:
+        return '{%s} : (%s)' % (' '.join(columns), expression)
+    return expression
+
+
+def _mysql_match_expression(terms):
+    return ' '.join(f'+{term}*' for term in terms)
+
+
+def full_text_search(queryset, query, columns=None):
+    """
+    Фильтрует объявления по полнотекстовому индексу и добавляет аннотацию
+    `search_rank` (меньше — релевантнее).
+    - SQLite: виртуальная таблица FTS5, ранжирование bm25.
+    - MySQL: FULLTEXT индекс, MATCH ... AGAINST в BOOLEAN MODE.
+    - Другие БД: запасной вариант через icontains.
+    `columns` ограничивает поиск отдельными полями (например, только title).
+    """
+    terms = get_search_terms(query)
+    if not terms:
+        return queryset
+
+    columns = columns or FTS_COLUMNS
+    restricted = tuple(columns) != FTS_COLUMNS
+
+    if connection.vendor == 'sqlite':
+        match = _sqlite_match_expression(terms, columns if restricted else None)
+        queryset = queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]
+        ))
+        return queryset.annotate(search_rank=RawSQL(
+            f'SELECT bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = {LISTING_TABLE}.id',
+            [match], output_field=FloatField()
+        ))
+
+    if connection.vendor == 'mysql':
+        match = _mysql_match_expression(terms)
+        relevance = (
+            f'MATCH ({", ".join(FTS_COLUMNS)}) AGAINST (%s IN BOOLEAN MODE)'
+        )
+        queryset = queryset.filter(
+            RawSQL(relevance, [match], output_field=BooleanField())
+        ).annotate(search_rank=RawSQL(
+            f'-({relevance})', [match], output_field=FloatField()
+        ))
+        if restricted:
+            # Индекс сужает выборку, проверка поля выполняется только по найденным строкам
+            for term in terms:
+                condition = Q()
+                for column in columns:
+                    condition |= Q(**{f'{column}__icontains': term})
+                queryset = queryset.filter(condition)
+        return queryset
+
+    for term in terms:
+        condition = Q()
+        for column in columns:
+            condition |= Q(**{f'{column}__icontains': term})
+        queryset = queryset.filter(condition)
+    return queryset
+
+
+def index_listing(listing):
+    """
+    Обновляет запись объявления в FTS5 индексе.
+    В MySQL FULLTEXT индекс поддерживается самой БД.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [listing.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, {", ".join(FTS_COLUMNS)}) VALUES (%s, %s, %s, %s, %s)',
+            [listing.pk] + [getattr(listing, column) or '' for column in FTS_COLUMNS]
+        )
+
+
+def unindex_listing(listing_pk):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [listing_pk])
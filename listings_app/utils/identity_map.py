@@ -0,0 +1,45 @@
+from django.shortcuts import get_object_or_404
+
+
+class IdentityMap:
+    """
+    Объекты моделей, загруженные в рамках одного запроса.
+    Каждая строка читается из БД не более одного раза: проверки прав,
+    выбор сериализатора и само представление получают один и тот же экземпляр.
+    """
+
+    def __init__(self):
+        self._objects = {}
+
+    @staticmethod
+    def _key(model, pk):
+        return model._meta.concrete_model, str(pk)
+
+    def get(self, model, pk):
+        """
+        Объект из карты, иначе загружает его (Http404, если строки нет).
+        """
+        key = self._key(model, pk)
+        instance = self._objects.get(key)
+        if instance is None:
+            instance = self._objects[key] = get_object_or_404(model, pk=pk)
+        return instance
+
+    def add(self, instance):
+        self._objects[self._key(type(instance), instance.pk)] = instance
+        return instance
+
+    def discard(self, instance):
+        self._objects.pop(self._key(type(instance), instance.pk), None)
+
+
+def get_identity_map(request):
+    """
+    Карта текущего запроса. Хранится на HttpRequest, поэтому общая
+    для DRF Request, middleware и всех вызовов внутри представления.
+    """
+    request = getattr(request, '_request', request)
+    identity_map = getattr(request, '_identity_map', None)
+    if identity_map is None:
+        identity_map = request._identity_map = IdentityMap()
+    return identity_map
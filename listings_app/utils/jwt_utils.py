@@ -2,7 +2,11 @@ from django.utils import timezone
 from rest_framework_simplejwt.tokens import RefreshToken
 
 
-def set_jwt_cookies(response, user):
+def issue_jwt_tokens(user):
+    """
+    Выпускает пару токенов. Возвращает данные для тела ответа
+    и cookie в виде [(имя, значение, истекает), ...].
+    """
     refresh_token = RefreshToken.for_user(user)
     refresh_token_str = str(refresh_token)
     refresh_token_exp = refresh_token['exp']
@@ -17,22 +21,32 @@ def set_jwt_cookies(response, user):
         access_token_exp,
         tz=timezone.get_current_timezone()
     )
-    response.set_cookie(
-        'refresh_token',
-        refresh_token_str,
-        expires=refresh_token_exp,
-        httponly=True
-    )
-    response.set_cookie(
-        'access_token',
-        access_token_str,
-        expires=access_token_exp,
-        httponly=True
-    )
-    response.data = {
+    data = {
         'username': user.username,
         'email': user.email,
         'refresh_token': refresh_token_str,
         'access_token': access_token_str
     }
-    return response
\ No newline at end of file
+    cookies = [
+        ('refresh_token', refresh_token_str, refresh_token_exp),
+        ('access_token', access_token_str, access_token_exp),
+    ]
+    return data, cookies
+
+
+def set_token_cookies(response, cookies):
+    for name, value, expires in cookies:
+        response.set_cookie(
+            name,
+            value,
+            expires=expires,
+            httponly=True
+        )
+    return response
+
+
+def set_jwt_cookies(response, user):
+    data, cookies = issue_jwt_tokens(user)
+    set_token_cookies(response, cookies)
+    response.data = data
+    return response
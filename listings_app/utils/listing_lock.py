@@ -0,0 +1,53 @@
+import threading
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.shortcuts import get_object_or_404
+
+from listings_app.models import Booking, Listing
+
+# Полосатые блокировки процесса: разные объявления почти всегда попадают в разные полосы
+PROCESS_LOCK_STRIPES = 64
+_process_locks = [threading.Lock() for _ in range(PROCESS_LOCK_STRIPES)]
+
+
+@contextmanager
+def _process_lock(listing_pk):
+    if connection.features.has_select_for_update:
+        yield
+        return
+    # SQLite игнорирует SELECT ... FOR UPDATE, поэтому внутри процесса
+    # сериализуем изменения одного объявления обычной блокировкой
+    with _process_locks[int(listing_pk) % PROCESS_LOCK_STRIPES]:
+        yield
+
+
+@contextmanager
+def lock_listing(listing_pk):
+    """
+    Транзакция с блокировкой строки объявления (SELECT ... FOR UPDATE).
+    Проверка пересечения дат и запись бронирования внутри блока выполняются
+    атомарно относительно других бронирований того же объявления,
+    бронирования других объявлений не ждут друг друга.
+    Возвращает заблокированное объявление, 404 если его нет.
+    """
+    with _process_lock(listing_pk), transaction.atomic():
+        if not connection.features.has_select_for_update:
+            # SQLite: пустой UPDATE сразу берёт блокировку записи БД и ждёт её (OPTIONS timeout),
+            # как BEGIN IMMEDIATE, но только для транзакций бронирования. Иначе два процесса
+            # прочитают без блокировки и один упадёт с "database is locked" при записи
+            Listing.objects.filter(pk=listing_pk).update(id=F('id'))
+        yield get_object_or_404(Listing.objects.select_for_update(), pk=listing_pk)
+
+
+def has_overlapping_booking(listing_pk, start_date, end_date, exclude_pk=None):
+    queryset = Booking.objects.filter(
+        listing_id=listing_pk,
+        start_date__lt=end_date,
+        end_date__gt=start_date,
+        is_canceled=False
+    )
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+    return queryset.exists()
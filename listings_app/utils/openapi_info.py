@@ -0,0 +1,12 @@
+from drf_yasg import openapi
+
+# Описание API для Swagger/ReDoc (SWAGGER_SETTINGS['DEFAULT_INFO']).
+# Импортируется только при генерации схемы, а не при старте воркера.
+API_INFO = openapi.Info(
+    title="Your API Title",
+    default_version='v1',
+    description="API documentation",
+    terms_of_service="https://www.example.com/terms/",
+    contact=openapi.Contact(email="contact@example.com"),
+    license=openapi.License(name="BSD License"),
+)
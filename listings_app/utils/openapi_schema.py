@@ -0,0 +1,98 @@
+import gzip
+import hashlib
+import threading
+from pathlib import Path
+
+from django.conf import settings
+
+CONTENT_TYPES = {
+    '.json': 'application/json',
+    '.yaml': 'application/yaml',
+}
+
+
+class SchemaDocument:
+    """
+    Готовое представление схемы: тело, его gzip-версия и ETag.
+    Всё считается один раз при загрузке, запрос только отдаёт байты.
+    """
+
+    def __init__(self, content, content_type):
+        self.content = content
+        self.content_type = content_type
+        # mtime=0: одинаковая схема даёт одинаковые байты на всех воркерах
+        self.gzipped = gzip.compress(content, compresslevel=9, mtime=0)
+        self.etag = hashlib.sha256(content).hexdigest()[:32]
+
+
+def generate_schema():
+    """
+    Строит OpenAPI схему всех DRF представлений (drf_yasg, public)
+    и кодирует её во все форматы: {'.json': bytes, '.yaml': bytes}.
+    drf_yasg импортируется здесь, а не при загрузке модуля.
+    """
+    from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    from listings_app.utils.openapi_info import API_INFO
+
+    generator = OpenAPISchemaGenerator(info=API_INFO, url=getattr(settings, 'OPENAPI_SCHEMA_URL', None))
+    schema = generator.get_schema(request=None, public=True)
+    return {
+        '.json': OpenAPICodecJson(validators=[]).encode(schema),
+        '.yaml': OpenAPICodecYaml(validators=[]).encode(schema),
+    }
+
+
+def get_schema_files(path):
+    """Файлы схемы на диске: path (JSON) и тот же путь с суффиксом .yaml."""
+    path = Path(path)
+    return {'.json': path.with_suffix('.json'), '.yaml': path.with_suffix('.yaml')}
+
+
+def write_schema(path, contents):
+    files = get_schema_files(path)
+    files['.json'].parent.mkdir(parents=True, exist_ok=True)
+    for format, content in contents.items():
+        files[format].write_bytes(content)
+    return files
+
+
+class SchemaStore:
+    """
+    Схема OpenAPI в памяти процесса.
+    Источник — файл OPENAPI_SCHEMA_FILE (создаётся при сборке командой
+    generate_openapi_schema), а если его нет — генерация при первом запросе.
+    Новый код приходит только с перезапуском воркеров, поэтому схема не устаревает.
+    """
+
+    def __init__(self):
+        self._documents = None
+        self._lock = threading.Lock()
+
+    def get(self, format='.json'):
+        documents = self._documents
+        if documents is None:
+            with self._lock:
+                if self._documents is None:
+                    self._documents = {
+                        format: SchemaDocument(content, CONTENT_TYPES[format])
+                        for format, content in self._load().items()
+                    }
+                documents = self._documents
+        return documents[format]
+
+    def _load(self):
+        path = getattr(settings, 'OPENAPI_SCHEMA_FILE', None)
+        if path:
+            files = get_schema_files(path)
+            if all(file.exists() for file in files.values()):
+                return {format: file.read_bytes() for format, file in files.items()}
+        return generate_schema()
+
+    def clear(self):
+        with self._lock:
+            self._documents = None
+
+
+schema_store = SchemaStore()
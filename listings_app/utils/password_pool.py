@@ -0,0 +1,75 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+
+class PoolSaturated(Exception):
+    """Очередь пула заполнена: запрос нужно отклонить (503), а не ждать."""
+
+
+class PasswordHashingPool:
+    """
+    Ограниченный пул потоков для проверки и хеширования паролей (PBKDF2 отпускает GIL).
+    - не больше `max_workers` хеширований одновременно;
+    - не больше `max_pending` задач в пуле вместе с очередью, сверх этого — PoolSaturated.
+    Шквал логинов занимает только этот пул и не забирает потоки
+    у остальных эндпоинтов (листинги, бронирования).
+    """
+
+    def __init__(self, max_workers=None, max_pending=None):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def get_max_workers(self):
+        if self.max_workers is not None:
+            return self.max_workers
+        return getattr(settings, 'PASSWORD_HASHING_WORKERS', None) or os.cpu_count() or 2
+
+    def get_max_pending(self):
+        if self.max_pending is not None:
+            return self.max_pending
+        return getattr(settings, 'PASSWORD_HASHING_MAX_PENDING', 64)
+
+    def _ensure_started(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._slots = threading.BoundedSemaphore(self.get_max_pending())
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.get_max_workers(), thread_name_prefix='password-hashing'
+                    )
+
+    @staticmethod
+    def _call(func, args, kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            # Поток пула живёт долго, соединения закрываем как после обычного запроса
+            close_old_connections()
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Выполняет func в пуле. PoolSaturated, если свободных мест в очереди нет.
+        """
+        self._ensure_started()
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PoolSaturated()
+        try:
+            future = self._executor.submit(self._call, func, args, kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda done: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+
+password_hashing_pool = PasswordHashingPool()
@@ -0,0 +1,92 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField, RelatedField
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+_plans = {}
+
+
+class PrefetchPlan:
+    def __init__(self):
+        self.select_related = []
+        self.prefetch_related = {}
+
+    def add_select(self, lookup):
+        if lookup not in self.select_related:
+            self.select_related.append(lookup)
+
+    def add_prefetch(self, lookup, prefetch=None):
+        # Полный Prefetch (с урезанным queryset) важнее простой строки
+        if prefetch is not None or lookup not in self.prefetch_related:
+            self.prefetch_related[lookup] = prefetch or lookup
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related.values())
+        return queryset
+
+
+def get_prefetch_plan(serializer_class, model):
+    """
+    Строит (и кэширует) план select_related/prefetch_related по объявленным
+    полям сериализатора:
+    - source через внешний ключ ('owner.username') -> select_related('owner');
+    - many=True / обратная связь ('reviews') -> prefetch_related('reviews');
+    - вложенные сериализаторы обходятся рекурсивно.
+    PrimaryKeyRelatedField по внешнему ключу читает owner_id и запроса не требует.
+    """
+    key = (serializer_class, model)
+    if key not in _plans:
+        plan = PrefetchPlan()
+        _collect(serializer_class(), model, plan, prefix='', to_many=False)
+        _plans[key] = plan
+    return _plans[key]
+
+
+def _collect(serializer, model, plan, prefix, to_many):
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+
+        path = []
+        current_model = model
+        field_to_many = to_many
+        for index, attr in enumerate(field.source_attrs):
+            try:
+                model_field = current_model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                break
+            if not model_field.is_relation or model_field.related_model is None:
+                break
+
+            is_last = index == len(field.source_attrs) - 1
+            path.append(attr)
+            lookup = prefix + '__'.join(path)
+
+            if model_field.one_to_many or model_field.many_to_many:
+                field_to_many = True
+                if (is_last and isinstance(field, ManyRelatedField)
+                        and isinstance(field.child_relation, PrimaryKeyRelatedField)
+                        and model_field.one_to_many):
+                    # Для списка id достаточно pk и внешнего ключа связанной модели
+                    related = model_field.related_model
+                    plan.add_prefetch(lookup, Prefetch(
+                        lookup, queryset=related.objects.only('pk', model_field.field.attname)
+                    ) if not prefix else None)
+                else:
+                    plan.add_prefetch(lookup)
+            else:
+                if (is_last and isinstance(field, RelatedField)
+                        and field.use_pk_only_optimization()):
+                    break
+                if field_to_many:
+                    plan.add_prefetch(lookup)
+                else:
+                    plan.add_select(lookup)
+            current_model = model_field.related_model
+
+        nested = field.child if isinstance(field, ListSerializer) else field
+        if isinstance(nested, BaseSerializer) and path and len(path) == len(field.source_attrs):
+            _collect(nested, current_model, plan, prefix + '__'.join(path) + '__', field_to_many)
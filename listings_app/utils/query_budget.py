@@ -0,0 +1,29 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(max_queries, using=DEFAULT_DB_ALIAS):
+    """
+    Падает, если внутри блока выполнено больше `max_queries` запросов.
+    Используется в тестах, чтобы изменение сериализатора не вернуло N+1:
+
+        with query_budget(4):
+            client.get('/api/listings/')
+    """
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+    executed = len(context.captured_queries)
+    if executed > max_queries:
+        queries = '\n'.join(
+            f'{index}. {query["sql"]}' for index, query in enumerate(context.captured_queries, start=1)
+        )
+        raise QueryBudgetExceeded(
+            f'{executed} queries executed, budget is {max_queries}:\n{queries}'
+        )
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from listings_app.checks import is_shared_cache
+from listings_app.db.router import get_replicas, get_sticky_seconds, is_pinned
+from listings_app.utils.full_text_search import get_search_terms
+from listings_app.utils.text_normalization import normalize_text
+
+CACHE_PREFIX = 'listing_search'
+# Версии (time_ns последнего изменения) входят в ключ страницы: новая версия
+# одной записью делает недействительными все страницы, без обхода ключей
+LISTINGS_VERSION_KEY = f'{CACHE_PREFIX}:version:listings'
+BOOKINGS_VERSION_KEY = f'{CACHE_PREFIX}:version:bookings'
+# Любая запись в объявление, а не только в поля поиска: версия тела списка для ETag
+LISTING_WRITES_VERSION_KEY = f'{CACHE_PREFIX}:version:listing_writes'
+HITS_KEY = f'{CACHE_PREFIX}:hits'
+MISSES_KEY = f'{CACHE_PREFIX}:misses'
+
+DECIMAL_PARAMS = ('price_min', 'price_max', 'rooms_min', 'rooms_max', 'price', 'rooms', 'rating_min')
+TEXT_PARAMS = ('title', 'description', 'search')
+LOCATION_PARAMS = ('location', 'city')
+DATE_PARAMS = ('check_in', 'check_out')
+# Поля объявления, от которых зависит попадание в результаты поиска и порядок
+SNAPSHOT_FIELDS = (
+    'id', 'owner_id', 'title', 'description', 'location', 'city',
+    'rooms', 'property_type', 'price', 'is_active', 'avg_rating',
+    'available_from', 'available_until',
+)
+
+
+def get_timeout():
+    return getattr(settings, 'LISTING_SEARCH_CACHE_TIMEOUT', 60)
+
+
+def _canonical_decimal(value):
+    try:
+        return str(Decimal(value).normalize())
+    except (InvalidOperation, TypeError, ValueError):
+        return str(value)
+
+
+def get_search_params(request):
+    """
+    Приводит параметры поиска к канонической форме, чтобы
+    `city=Berlin&price_max=1500` и `price_max=1500.00&city=berlin`
+    давали одну и ту же сигнатуру.
+    """
+    query_params = request.query_params
+    params = {}
+
+    if query_params.get('my'):
+        params['owner_id'] = request.user.pk
+
+    for name in DECIMAL_PARAMS:
+        value = query_params.get(name)
+        if value not in (None, ''):
+            params[name] = _canonical_decimal(value)
+
+    for name in LOCATION_PARAMS:
+        value = normalize_text(query_params.get(name))
+        if value:
+            params[name] = value
+    if 'location' in params or 'city' in params:
+        match = query_params.get('match')
+        params['match'] = match if match in ('contains', 'prefix', 'exact') else 'contains'
+
+    for name in TEXT_PARAMS:
+        terms = [normalize_text(term) for term in get_search_terms(query_params.get(name))]
+        if terms:
+            params[name] = terms
+
+    property_type = query_params.get('property_type')
+    if property_type:
+        params['property_type'] = property_type
+
+    for name in DATE_PARAMS:
+        value = query_params.get(name)
+        if value:
+            params[name] = value
+
+    params['ordering'] = query_params.get('ordering', '')
+    return params
+
+
+def get_signature(params):
+    payload = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def get_page_key(signature, params, page_params):
+    """
+    Ключ страницы: сигнатура фильтров, версия объявлений и, для поиска
+    по датам (check_in/check_out), версия бронирований.
+    """
+    versions = cache.get_many([LISTINGS_VERSION_KEY, BOOKINGS_VERSION_KEY])
+    version = str(versions.get(LISTINGS_VERSION_KEY, 0))
+    if any(name in params for name in DATE_PARAMS):
+        version = f'{version}.{versions.get(BOOKINGS_VERSION_KEY, 0)}'
+    page = hashlib.sha1(json.dumps(page_params, sort_keys=True, default=str).encode()).hexdigest()
+    return f'{CACHE_PREFIX}:page:{signature}:{version}:{page}'
+
+
+def get_collection_version(params):
+    """
+    Версия тела списка для ETag без запроса к БД: последняя запись в объявления
+    и, для поиска по датам, в бронирования. С кэшем процесса (LocMemCache) записи
+    других воркеров не видны, поэтому версия ещё и меняется раз в get_timeout()
+    секунд: 304 может быть устаревшим не дольше, чем закэшированная страница.
+    """
+    versions = cache.get_many([LISTING_WRITES_VERSION_KEY, BOOKINGS_VERSION_KEY])
+    version = str(versions.get(LISTING_WRITES_VERSION_KEY, 0))
+    if any(name in params for name in DATE_PARAMS):
+        version = f'{version}.{versions.get(BOOKINGS_VERSION_KEY, 0)}'
+    if not is_shared_cache():
+        version = f'{version}.{int(time.time() // get_timeout())}'
+    return version
+
+
+def get_cached_ids(key):
+    ids = cache.get(key)
+    _increment(HITS_KEY if ids is not None else MISSES_KEY)
+    return ids
+
+
+def set_cached_ids(key, ids):
+    if may_be_stale():
+        return
+    cache.set(key, ids, get_timeout())
+
+
+def may_be_stale():
+    """
+    Страница прочитана из реплики вскоре после записи в объявления/бронирования:
+    реплика могла ещё не получить изменение, такую страницу не кэшируем.
+    Время последней записи — версии (time_ns изменения) в общем кэше. С кэшем процесса
+    (LocMemCache) записи других воркеров не видны, поэтому страницы из реплик не кэшируются.
+    """
+    if not get_replicas() or is_pinned():
+        return False
+    if not is_shared_cache():
+        return True
+    versions = cache.get_many([LISTINGS_VERSION_KEY, BOOKINGS_VERSION_KEY])
+    return time.time() - max(versions.values(), default=0) / 1e9 < get_sticky_seconds()
+
+
+def _increment(key):
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Ключ был вытеснен между add и incr
+        cache.set(key, 1, None)
+
+
+def get_stats():
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else None,
+        'timeout': get_timeout(),
+    }
+
+
+def get_listing_snapshot(listing):
+    # Берём значения из __dict__, чтобы не подгружать отложенные (deferred) поля
+    return {field: listing.__dict__.get(field) for field in SNAPSHOT_FIELDS}
+
+
+def _bump(key):
+    # После коммита: до него параллельный поиск закэшировал бы под новой версией старые данные.
+    # time_ns уникальна и не повторяется после вытеснения ключа, поэтому старые страницы не «воскреснут»
+    transaction.on_commit(lambda: cache.set(key, time.time_ns(), None))
+
+
+def invalidate_for_listing(*snapshots):
+    """
+    Сбрасывает закэшированные страницы после изменения объявления
+    (snapshots — состояния до и после). Если поля поиска не изменились,
+    страницы не трогаем: они хранят только id, остальные поля читаются заново.
+    Версия записей (ETag списка) меняется всегда.
+    """
+    _bump(LISTING_WRITES_VERSION_KEY)
+    if len(snapshots) == 2 and snapshots[0] == snapshots[1]:
+        return
+    _bump(LISTINGS_VERSION_KEY)
+
+
+def invalidate_for_booking():
+    """Сбрасывает страницы поиска по датам: бронирование меняет доступность."""
+    _bump(BOOKINGS_VERSION_KEY)
@@ -0,0 +1,120 @@
+import asyncio
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from listings_app.models.search_query import SearchQuery, build_search_query_hash
+
+logger = logging.getLogger(__name__)
+
+
+class SearchQueryBuffer:
+    """
+    Накопитель поисковых запросов в памяти процесса.
+    Одинаковые запросы схлопываются в один счётчик, а в БД уходят
+    периодически одним bulk upsert (SearchQuery.increment_many),
+    поэтому логирование не добавляет запросов к обработке поиска.
+    """
+
+    def __init__(self, flush_interval=None, max_size=None):
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+
+    def get_flush_interval(self):
+        if self.flush_interval is not None:
+            return self.flush_interval
+        return getattr(settings, 'SEARCH_QUERY_FLUSH_INTERVAL', 5)
+
+    def get_max_size(self):
+        if self.max_size is not None:
+            return self.max_size
+        return getattr(settings, 'SEARCH_QUERY_BUFFER_SIZE', 1000)
+
+    def add(self, values):
+        """
+        Добавляет поиск. values — словарь SearchQuery.KEY_FIELDS
+        (owner — id пользователя или None).
+        """
+        query_hash = build_search_query_hash(values)
+        with self._lock:
+            entry = self._pending.get(query_hash)
+            if entry is None:
+                self._pending[query_hash] = [values, 1]
+            else:
+                entry[1] += 1
+            pending_count = len(self._pending)
+
+        if self.get_flush_interval() <= 0 or pending_count >= self.get_max_size():
+            if self._in_event_loop():
+                # Из async представления синхронный ORM вызывать нельзя — сбрасываем в отдельном потоке
+                threading.Thread(target=self._flush_in_thread, name='search-query-flush-now', daemon=True).start()
+            else:
+                self.flush()
+        else:
+            self._ensure_worker()
+
+    @staticmethod
+    def _in_event_loop():
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        return True
+
+    def _flush_in_thread(self):
+        try:
+            self.flush()
+        finally:
+            close_old_connections()
+
+    def flush(self):
+        """
+        Сбрасывает накопленные счётчики в БД.
+        Если запись не удалась, счётчики возвращаются в буфер.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+
+            try:
+                SearchQuery.increment_many([(values, count) for values, count in pending.values()])
+            except Exception:
+                logger.exception('Failed to flush %s search queries', len(pending))
+                with self._lock:
+                    for query_hash, (values, count) in pending.items():
+                        entry = self._pending.setdefault(query_hash, [values, 0])
+                        entry[1] += count
+                return 0
+            return len(pending)
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='search-query-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.get_flush_interval())
+            try:
+                self.flush()
+            finally:
+                # Поток живёт долго, поэтому сами закрываем устаревшие соединения
+                close_old_connections()
+
+
+search_query_buffer = SearchQueryBuffer()
+atexit.register(search_query_buffer.flush)
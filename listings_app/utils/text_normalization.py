@@ -0,0 +1,22 @@
+import unicodedata
+
+
+def normalize_text(value):
+    """
+    Приводит строку к форме для индексированного поиска:
+    без диакритики, casefold, одиночные пробелы.
+    'Düsseldorf ' -> 'dusseldorf'
+    """
+    if not value:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', value)
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.casefold().split())
+
+
+def trigrams(value):
+    """
+    Возвращает множество триграмм нормализованной строки.
+    Строки короче трёх символов триграмм не имеют.
+    """
+    return {value[i:i + 3] for i in range(len(value) - 2)}
@@ -0,0 +1,101 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class VerifiedTokenCache:
+    """
+    LRU-кэш проверенных JWT: ключ — sha256 токена, значение — проверенный токен и его exp.
+    Подпись и декодирование выполняются один раз на токен, а не на каждый запрос.
+    Записи с истёкшим exp не возвращаются, при переполнении вытесняются самые старые.
+    """
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self._tokens = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_max_size(self):
+        if self.max_size is not None:
+            return self.max_size
+        return getattr(settings, 'JWT_VERIFIED_TOKEN_CACHE_SIZE', 10000)
+
+    @staticmethod
+    def _key(raw_token):
+        if isinstance(raw_token, str):
+            raw_token = raw_token.encode()
+        return hashlib.sha256(raw_token).digest()
+
+    def get(self, raw_token, token_class=AccessToken):
+        """
+        Проверенный токен (копия из кэша или новый). TokenError, если токен невалиден или истёк.
+        """
+        key = self._key(raw_token)
+        now = time.time()
+        with self._lock:
+            entry = self._tokens.get(key)
+            if entry is not None:
+                token, exp = entry
+                if exp > now and isinstance(token, token_class):
+                    self._tokens.move_to_end(key)
+                    self.hits += 1
+                    return self._copy(token)
+                del self._tokens[key]
+            self.misses += 1
+
+        token = token_class(raw_token)
+        self.add(token, raw_token)
+        return self._copy(token)
+
+    def add(self, token, raw_token=None):
+        """
+        Кладёт уже проверенный (или только что выпущенный) токен в кэш.
+        """
+        exp = token.payload.get('exp')
+        if exp is None or exp <= time.time():
+            return
+        key = self._key(raw_token if raw_token is not None else str(token))
+        with self._lock:
+            self._tokens[key] = (token, exp)
+            self._tokens.move_to_end(key)
+            while len(self._tokens) > self.get_max_size():
+                self._tokens.popitem(last=False)
+
+    def discard(self, raw_token):
+        with self._lock:
+            self._tokens.pop(self._key(raw_token), None)
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+
+    def get_stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else None,
+            'size': len(self._tokens),
+            'max_size': self.get_max_size(),
+        }
+
+    @staticmethod
+    def _copy(token):
+        # Вызывающий код может менять payload, общий экземпляр из кэша не трогаем
+        token = copy.copy(token)
+        token.payload = dict(token.payload)
+        return token
+
+
+verified_token_cache = VerifiedTokenCache()
+
+
+def get_verified_token(raw_token, token_class=AccessToken):
+    return verified_token_cache.get(raw_token, token_class)
@@ -0,0 +1,163 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from listings_app.models import RevokedToken
+
+
+class BloomFilter:
+    """
+    Компактное множество без удаления: `in` может ошибаться только в сторону «есть»
+    (с вероятностью error_rate при заполнении до capacity).
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hash_count = max(round(self.size / capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.sha256(value.encode()).digest()
+        first = int.from_bytes(digest[:8], 'big')
+        second = int.from_bytes(digest[8:16], 'big') | 1
+        return ((first + index * second) % self.size for index in range(self.hash_count))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class RevocationRegistry:
+    """
+    Проверка отзыва refresh токенов: таблица RevokedToken + фильтр Блума в памяти процесса.
+    - jti, которого нет в фильтре, точно не отозван — БД не нужна (почти все проверки);
+    - попадание в фильтр подтверждается запросом к БД (отозванные токены и редкие ложные срабатывания);
+    - отзывы из других процессов подтягиваются не чаще раза в TOKEN_REVOCATION_SYNC_INTERVAL секунд;
+    - раз в TOKEN_REVOCATION_REBUILD_INTERVAL секунд истёкшие записи удаляются, фильтр строится заново.
+    Запросы к БД выполняются без блокировки, под ней только отметка времени и замена фильтра.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        # Отзывы этого процесса во время перестройки: в новый фильтр их добавит замена
+        self._revoked_during_rebuild = None
+        self._synced_since = None
+        self._synced_at = self._rebuilt_at = -math.inf
+        self.checks = 0
+        self.database_checks = 0
+
+    def get_sync_interval(self):
+        return getattr(settings, 'TOKEN_REVOCATION_SYNC_INTERVAL', 5)
+
+    def get_sync_overlap(self):
+        return getattr(settings, 'TOKEN_REVOCATION_SYNC_OVERLAP', 60)
+
+    def get_rebuild_interval(self):
+        return getattr(settings, 'TOKEN_REVOCATION_REBUILD_INTERVAL', 60 * 60)
+
+    def _claim(self, now):
+        """
+        Что обновляет этот поток: 'rebuild', 'sync' или None. Время отмечается сразу,
+        поэтому остальные потоки не повторяют тот же запрос.
+        """
+        with self._lock:
+            if now - self._rebuilt_at >= self.get_rebuild_interval():
+                self._rebuilt_at = self._synced_at = now
+                self._revoked_during_rebuild = set()
+                return 'rebuild'
+            if self._synced_since is not None and now - self._synced_at >= self.get_sync_interval():
+                self._synced_at = now
+                return 'sync'
+        return None
+
+    def _refresh(self):
+        task = self._claim(time.monotonic())
+        if task is None:
+            return
+        # Синхронизация перечитывает отзывы с перекрытием по revoked_at, а не после последнего id:
+        # строка, вставленная раньше, но закоммиченная после прошлой синхронизации, имеет меньший id
+        started = timezone.now() - timedelta(seconds=self.get_sync_overlap())
+        if task == 'rebuild':
+            self.prune()
+            jtis = list(RevokedToken.objects.values_list('jti', flat=True))
+            # Запас по ёмкости, чтобы новые отзывы до следующей перестройки не портили точность
+            bloom = BloomFilter(max(len(jtis) * 2, 1024))
+            for jti in jtis:
+                bloom.add(jti)
+            with self._lock:
+                for jti in self._revoked_during_rebuild:
+                    bloom.add(jti)
+                self._bloom, self._revoked_during_rebuild = bloom, None
+                self._synced_since = started
+        else:
+            jtis = list(RevokedToken.objects.filter(revoked_at__gte=self._synced_since).values_list('jti', flat=True))
+            with self._lock:
+                for jti in jtis:
+                    self._bloom.add(jti)
+                self._synced_since = max(self._synced_since, started)
+
+    def is_revoked(self, jti):
+        self._refresh()
+        self.checks += 1
+        bloom = self._bloom
+        if bloom is not None and jti not in bloom:
+            return False
+        # Фильтр ещё строится другим потоком — проверяем по БД
+        self.database_checks += 1
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    def revoke(self, jti, expires_at):
+        """
+        Отзывает токен. Возвращает False, если он уже был отозван
+        (повторная ротация того же refresh токена).
+        """
+        self._refresh()
+        token, created = RevokedToken.objects.get_or_create(jti=jti, defaults={'expires_at': expires_at})
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+            if self._revoked_during_rebuild is not None:
+                self._revoked_during_rebuild.add(jti)
+        return created
+
+    def prune(self):
+        """Удаляет записи об уже истёкших токенах: они отклоняются по exp и без таблицы."""
+        return RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()[0]
+
+    def get_stats(self):
+        return {
+            'checks': self.checks,
+            'database_checks': self.database_checks,
+        }
+
+
+revocation_registry = RevocationRegistry()
+
+
+class RevocableRefreshToken(RefreshToken):
+    """
+    Refresh токен с проверкой отзыва (приложение token_blacklist не используется).
+    """
+
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        if revocation_registry.is_revoked(self.payload.get(api_settings.JTI_CLAIM, '')):
+            raise TokenError(_('Token is blacklisted'))
+
+    def revoke(self):
+        expires_at = datetime.fromtimestamp(self.payload['exp'], tz=dt_timezone.utc)
+        return revocation_registry.revoke(self.payload[api_settings.JTI_CLAIM], expires_at)
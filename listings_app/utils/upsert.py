@@ -0,0 +1,70 @@
+from django.db import connection, models, transaction
+from django.db.models import F
+
+UPSERT_BATCH_SIZE = 500
+
+
+def bulk_increment(model, rows, conflict_fields, counter='count', replace_fields=()):
+    """
+    Bulk upsert с атомарным увеличением счётчика.
+    rows — список словарей {имя поля: значение} с одинаковым набором ключей, включая `counter`.
+    Для строк, уже существующих по `conflict_fields` (уникальный ключ),
+    выполняется counter = counter + n, поля из `replace_fields` перезаписываются.
+    - SQLite / PostgreSQL: INSERT ... ON CONFLICT DO UPDATE
+    - MySQL: INSERT ... ON DUPLICATE KEY UPDATE
+    - Другие БД: UPDATE c F() и INSERT по одной строке в транзакции.
+    """
+    if not rows:
+        return
+
+    if connection.vendor not in ('sqlite', 'postgresql', 'mysql'):
+        # Внешние ключи передаём через attname (owner_id), как и в SQL-ветке
+        attnames = {name: model._meta.get_field(name).attname for name in rows[0]}
+        with transaction.atomic():
+            for row in rows:
+                row = {
+                    attnames[name]: value.pk if isinstance(value, models.Model) else value
+                    for name, value in row.items()
+                }
+                lookup = {attnames[name]: row[attnames[name]] for name in conflict_fields}
+                updates = {counter: F(counter) + row[counter]}
+                updates.update({attnames[name]: row[attnames[name]] for name in replace_fields})
+                if not model.objects.filter(**lookup).update(**updates):
+                    model.objects.create(**row)
+        return
+
+    fields = [model._meta.get_field(name) for name in rows[0]]
+    table = model._meta.db_table
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(field.column) for field in fields)
+    counter_column = quote(model._meta.get_field(counter).column)
+    replace_columns = [quote(model._meta.get_field(name).column) for name in replace_fields]
+
+    if connection.vendor == 'mysql':
+        assignments = [f'{counter_column} = {counter_column} + VALUES({counter_column})']
+        assignments += [f'{column} = VALUES({column})' for column in replace_columns]
+        conflict = 'ON DUPLICATE KEY UPDATE ' + ', '.join(assignments)
+    else:
+        target = ', '.join(quote(model._meta.get_field(name).column) for name in conflict_fields)
+        assignments = [f'{counter_column} = {quote(table)}.{counter_column} + excluded.{counter_column}']
+        assignments += [f'{column} = excluded.{column}' for column in replace_columns]
+        conflict = f'ON CONFLICT ({target}) DO UPDATE SET ' + ', '.join(assignments)
+
+    params = []
+    for row in rows:
+        values = []
+        for field in fields:
+            value = row[field.name]
+            if isinstance(value, models.Model):
+                value = value.pk
+            values.append(field.get_db_prep_save(value, connection))
+        params.append(values)
+
+    placeholder = '(%s)' % ', '.join(['%s'] * len(fields))
+    with connection.cursor() as cursor:
+        for start in range(0, len(params), UPSERT_BATCH_SIZE):
+            batch = params[start:start + UPSERT_BATCH_SIZE]
+            cursor.execute(
+                f'INSERT INTO {quote(table)} ({columns}) VALUES {", ".join([placeholder] * len(batch))} {conflict}',
+                [value for values in batch for value in values]
+            )
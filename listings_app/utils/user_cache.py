@@ -0,0 +1,101 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+
+class UserCache:
+    """
+    Кэш пользователей процесса для аутентификации: user_id -> экземпляр User.
+    Ограничен по размеру (LRU) и по времени жизни записи; сбрасывается сигналами
+    post_save/post_delete User (смена пароля, деактивация).
+    TTL ограничивает устаревание, если пользователя изменил другой процесс.
+    """
+
+    def __init__(self, max_size=None, timeout=None):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+        # Растёт при каждом сбросе: загрузка, начатая до сброса, в кэш не попадает
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get_max_size(self):
+        if self.max_size is not None:
+            return self.max_size
+        return getattr(settings, 'AUTH_USER_CACHE_SIZE', 10000)
+
+    def get_timeout(self):
+        if self.timeout is not None:
+            return self.timeout
+        return getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60)
+
+    def get(self, user_id):
+        """
+        Пользователь по id (из кэша или из БД). User.DoesNotExist, если его нет.
+        """
+        user, generation = self._lookup(user_id)
+        if user is not None:
+            return user
+        return self._store(user_id, get_user_model().objects.get(pk=user_id), generation)
+
+    async def aget(self, user_id):
+        """
+        То же, что get, но промах загружается асинхронным ORM.
+        """
+        user, generation = self._lookup(user_id)
+        if user is not None:
+            return user
+        return self._store(user_id, await get_user_model().objects.aget(pk=user_id), generation)
+
+    def _lookup(self, user_id):
+        key = str(user_id)
+        with self._lock:
+            entry = self._users.get(key)
+            if entry is not None:
+                user, expires = entry
+                if expires > time.monotonic():
+                    self._users.move_to_end(key)
+                    self.hits += 1
+                    # Копия: запрос может менять request.user, общий экземпляр не трогаем
+                    return copy.copy(user), self._generation
+                del self._users[key]
+            self.misses += 1
+            return None, self._generation
+
+    def _store(self, user_id, user, generation):
+        with self._lock:
+            if generation == self._generation:
+                self._users[str(user_id)] = (user, time.monotonic() + self.get_timeout())
+                while len(self._users) > self.get_max_size():
+                    self._users.popitem(last=False)
+        return copy.copy(user)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._generation += 1
+            self._users.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._users.clear()
+
+    def get_stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else None,
+            'size': len(self._users),
+            'max_size': self.get_max_size(),
+            'timeout': self.get_timeout(),
+        }
+
+
+user_cache = UserCache()
@@ -0,0 +1,134 @@
+from django.http import Http404, HttpResponse
+from django.views import View
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from listings_app.authentication import CachedJWTAuthentication
+from listings_app.models import Listing
+from listings_app.views.booking import BookingViewSet
+from listings_app.views.listing import SearchListingListView
+from listings_app.views.review import ListingReviewView
+
+
+class AsyncListView(View):
+    """
+    Асинхронный GET списка поверх существующего DRF представления (view_class):
+    права, фильтры, queryset, сериализатор и пагинация берутся из него,
+    а все обращения к БД выполняются асинхронным ORM (aget, async for).
+    Под ASGI воркер не держит поток на время запроса, поэтому медленные клиенты
+    не занимают пул потоков. Сам ORM по-прежнему выполняет запросы в потоке
+    asgiref, так что выигрыш — в числе одновременных соединений, а не в скорости БД.
+    Ответ всегда JSON (без browsable API).
+    """
+    http_method_names = ['get', 'head', 'options']
+    view_class = None
+    view_action = 'list'
+    # Объявление из URL загружается заранее и кладётся в identity map,
+    # чтобы get_queryset/get_serializer_class представления не ходили в БД синхронно
+    preload_listing = False
+    # Как у DRF по умолчанию — первый рендерер из REST_FRAMEWORK
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+
+    async def get(self, request, *args, **kwargs):
+        view = self.initialize_view(request, args, kwargs)
+        try:
+            await self.authenticate(view.request)
+            view.check_permissions(view.request)
+            if self.preload_listing:
+                await self.load_listing(view)
+            data = await self.get_data(view)
+        except Exception as exc:
+            # Http404, ошибки прав и валидации — как в DRF; остальное пробрасывается
+            return self.render(view.handle_exception(exc))
+        return self.render(data)
+
+    def initialize_view(self, request, args, kwargs):
+        authenticator = CachedJWTAuthentication()
+        view = self.view_class()
+        view.action = self.view_action
+        view.args = args
+        view.kwargs = kwargs
+        view.format_kwarg = None
+        view.headers = {}
+        view.request = Request(request, authenticators=[authenticator])
+        view.request.accepted_renderer = self.renderer
+        view.request.accepted_media_type = self.renderer.media_type
+        return view
+
+    async def authenticate(self, request):
+        """
+        То же, что Request._authenticate, но пользователь загружается асинхронно.
+        Без токена — AnonymousUser; check_permissions тогда отвечает 401, как DRF.
+        """
+        authenticator = request.authenticators[0]
+        try:
+            result = await authenticator.aauthenticate(request)
+        except Exception:
+            request._not_authenticated()
+            raise
+        if result is None:
+            request._not_authenticated()
+        else:
+            request._authenticator = authenticator
+            request.user, request.auth = result
+
+    async def load_listing(self, view):
+        try:
+            listing = await Listing.objects.aget(pk=view.kwargs['listing_pk'])
+        except Listing.DoesNotExist:
+            raise Http404('No Listing matches the given query.')
+        view.identity_map.add(listing)
+
+    def get_queryset(self, view):
+        """
+        (queryset, функция сериализации списка объектов) — строится без обращения к БД.
+        """
+        queryset = view.filter_queryset(view.get_queryset())
+        return queryset, lambda objects: view.get_serializer(objects, many=True).data
+
+    async def get_data(self, view):
+        queryset, to_representation = self.get_queryset(view)
+        paginator = view.paginator
+        if paginator is not None:
+            page = await paginator.apaginate_queryset(queryset, view.request, view=view)
+            if page is not None:
+                return paginator.get_paginated_response(to_representation(page))
+        return to_representation([obj async for obj in queryset])
+
+    def render(self, data):
+        if isinstance(data, HttpResponse):
+            response = data
+            response.accepted_renderer = self.renderer
+            response.accepted_media_type = self.renderer.media_type
+            response.renderer_context = {}
+            # Отдаём обычный HttpResponse: TemplateResponse Django рендерил бы в потоке
+            rendered = HttpResponse(response.rendered_content, status=response.status_code)
+            for header, value in response.items():
+                rendered[header] = value
+            return rendered
+        return HttpResponse(self.renderer.render(data), content_type=self.renderer.media_type)
+
+
+class AsyncListingListView(AsyncListView):
+    """Асинхронный вариант GET /api/listings/ (фильтры, поиск, курсорная пагинация, ?fields=)."""
+    view_class = SearchListingListView
+
+    def get_queryset(self, view):
+        fast_path = view.get_values_fast_path()
+        if fast_path is None:
+            return super().get_queryset(view)
+        values_serializer, queryset = fast_path
+        return queryset, values_serializer.to_representation
+
+
+class AsyncBookingListView(AsyncListView):
+    """Асинхронный вариант GET /api/listings/<listing_pk>/bookings/."""
+    view_class = BookingViewSet
+    preload_listing = True
+
+
+class AsyncReviewListView(AsyncListView):
+    """Асинхронный вариант GET /api/listings/<listing_pk>/reviews/."""
+    view_class = ListingReviewView
+    view_action = None
+    preload_listing = True
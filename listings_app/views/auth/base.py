@@ -0,0 +1,44 @@
+import json
+
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from listings_app.utils.password_pool import PoolSaturated, password_hashing_pool
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncAuthView(View):
+    """
+    Асинхронная основа для login/register (Django async view, без DRF):
+    разбор JSON/form тела и запуск хеширования паролей в password_hashing_pool.
+    Как и прежние APIView, без CSRF проверки и без обязательной аутентификации.
+    """
+    http_method_names = ['post', 'options']
+    # Подсказка клиенту, когда повторить запрос при переполненном пуле
+    retry_after = 1
+
+    def get_request_data(self, request):
+        """Словарь данных запроса или None, если JSON некорректен."""
+        if request.content_type == 'application/json':
+            try:
+                data = json.loads(request.body or b'{}')
+            except ValueError:
+                return None
+            return data if isinstance(data, dict) else None
+        return request.POST
+
+    def bad_request(self, errors):
+        return JsonResponse(errors, status=400)
+
+    async def run_in_pool(self, func, *args, **kwargs):
+        return await password_hashing_pool.run(func, *args, **kwargs)
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except PoolSaturated:
+            response = JsonResponse({'detail': 'Server is busy, try again later.'}, status=503)
+            response['Retry-After'] = str(self.retry_after)
+            return response
@@ -1,28 +1,29 @@
 from django.contrib.auth import authenticate
-from django.contrib.auth.models import User
-from rest_framework import status
-from rest_framework.permissions import AllowAny
-from rest_framework.response import Response
-from rest_framework.views import APIView
-from listings_app.serializers.register_login import LoginSerializer
-from listings_app.utils.jwt_utils import set_jwt_cookies
+from django.http import JsonResponse
 
+from listings_app.utils.jwt_utils import issue_jwt_tokens, set_token_cookies
+from listings_app.views.auth.base import AsyncAuthView
 
-class LoginView(APIView):
-    permission_classes = [AllowAny]
-    serializer_class = LoginSerializer
 
-    def post(self, request, *args, **kwargs):
-        email = request.data.get('email')
-        user = User.objects.filter(email=email).first()
-        username = user.username if user is not None else ''
-        password = request.data.get('password')
-        user = authenticate(request, username=username, password=password)
+class LoginView(AsyncAuthView):
+    """
+    Вход по email и паролю. Пользователь ищется одним запросом по индексу LOWER(email)
+    (EmailBackend), проверка пароля выполняется в ограниченном пуле потоков.
+    """
+
+    async def post(self, request, *args, **kwargs):
+        data = self.get_request_data(request)
+        if data is None:
+            return self.bad_request({"detail": "JSON parse error"})
+
+        email = data.get('email')
+        password = data.get('password')
+        user = None
+        if email and password is not None:
+            user = await self.run_in_pool(authenticate, request, email=email, password=password)
 
         if user:
-            response = Response(status=status.HTTP_200_OK)
-            set_jwt_cookies(response, user)
-            return response
+            payload, cookies = issue_jwt_tokens(user)
+            return set_token_cookies(JsonResponse(payload, status=200), cookies)
         else:
-            return Response({"detail": "Invalid credentials"}, status=status.HTTP_401_UNAUTHORIZED)
-
+            return JsonResponse({"detail": "Invalid credentials"}, status=401)
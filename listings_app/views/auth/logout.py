@@ -2,12 +2,24 @@ from rest_framework import status
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import TokenError
+
+from listings_app.utils.token_revocation import RevocableRefreshToken
 
 
 class LogoutView(APIView):
     permission_classes = [AllowAny]
 
     def post(self, request, *args, **kwargs):
+        # Отзываем refresh токен, чтобы по нему больше нельзя было получить access токен
+        refresh_token = request.COOKIES.get('refresh_token') or request.data.get('refresh')
+        if refresh_token:
+            try:
+                RevocableRefreshToken(refresh_token).revoke()
+            except TokenError:
+                # Уже истёк или отозван
+                pass
+
         response = Response(status=status.HTTP_204_NO_CONTENT)
         response.delete_cookie('access_token')
         response.delete_cookie('refresh_token')
@@ -1,22 +1,32 @@
-from rest_framework import status
-from rest_framework.permissions import AllowAny
-from rest_framework.response import Response
-from rest_framework.views import APIView
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError
+from django.http import JsonResponse
+
 from listings_app.serializers.register_login import RegisterSerializer
-from listings_app.utils.jwt_utils import set_jwt_cookies
+from listings_app.utils.jwt_utils import issue_jwt_tokens, set_token_cookies
+from listings_app.views.auth.base import AsyncAuthView
 
 
-class RegisterView(APIView):
-    permission_classes = [AllowAny]
+class RegisterView(AsyncAuthView):
+    """
+    Регистрация. Валидация (с проверкой email по индексу LOWER(email)) идёт обычным
+    sync_to_async, создание пользователя с хешированием пароля — в ограниченном пуле.
+    """
     serializer_class = RegisterSerializer
 
-    def post(self, request):
-        serializer = RegisterSerializer(data=request.data)
-        if serializer.is_valid():
-            user = serializer.save()
-            response = Response(serializer.validated_data,
-                                status=status.HTTP_201_CREATED)
-            set_jwt_cookies(response, user)
-            return response
+    async def post(self, request):
+        data = self.get_request_data(request)
+        if data is None:
+            return self.bad_request({"detail": "JSON parse error"})
+
+        serializer = RegisterSerializer(data=data)
+        if await sync_to_async(serializer.is_valid)():
+            try:
+                user = await self.run_in_pool(serializer.save)
+            except IntegrityError:
+                # Параллельная регистрация с тем же email/username
+                return self.bad_request({'email': ['A user with this email already exists']})
+            payload, cookies = issue_jwt_tokens(user)
+            return set_token_cookies(JsonResponse(payload, status=201), cookies)
         else:
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            return JsonResponse(serializer.errors, status=400)
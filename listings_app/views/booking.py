@@ -1,47 +1,66 @@
 from datetime import timedelta
 
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from rest_framework import viewsets, status
 
 from rest_framework.exceptions import  ValidationError
 
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from listings_app.models import Booking, Listing
 
-from listings_app.serializers.serializers import NotLandlordBookingSerializer, BookingSerializer
+from listings_app.serializers.serializers import (
+    BookingBulkUpdateSerializer, NotLandlordBookingSerializer, BookingSerializer
+)
+from listings_app.utils.listing_lock import has_overlapping_booking, lock_listing
+from listings_app.utils import availability_calendar
+from listings_app.utils.search_cache import invalidate_for_booking
+from listings_app.views.mixins import IdentityMapMixin, PrefetchPlanMixin, StreamingExportMixin
 
-def is_listing_owner(user, listing_pk=None):
+def is_listing_owner(user, listing_pk=None, identity_map=None):
     """
     Проверяет, является ли пользователь владельцем листинга.
     - Возвращает True, если пользователь является владельцем.
     - Возвращает False, если пользователь не является владельцем.
     - Возвращает None, если listing_pk не передан.
+    С identity_map листинг загружается не больше одного раза за запрос.
     """
     if listing_pk is None:
         return None
 
-    listing = get_object_or_404(Listing, id=listing_pk)
-    return listing.owner == user
+    if identity_map is not None:
+        listing = identity_map.get(Listing, listing_pk)
+    else:
+        listing = get_object_or_404(Listing, id=listing_pk)
+    # Сравниваем по owner_id, чтобы не загружать пользователя
+    return listing.owner_id == user.pk
 
 
-def is_booking_owner(user, booking_pk=None):
+def is_booking_owner(user, booking_pk=None, identity_map=None):
     """
     Проверяет, является ли пользователь владельцем бронирования.
     - Возвращает True, если пользователь является владельцем.
     - Возвращает False, если пользователь не является владельцем.
     - Возвращает None, если booking_pk не передан.
+    С identity_map бронирование загружается не больше одного раза за запрос.
     """
     if booking_pk is None:
         return None
 
-    booking = get_object_or_404(Booking, id=booking_pk)
-    return booking.owner == user
+    if identity_map is not None:
+        booking = identity_map.get(Booking, booking_pk)
+    else:
+        booking = get_object_or_404(Booking, id=booking_pk)
+    return booking.owner_id == user.pk
 
-class BookingViewSet(viewsets.ModelViewSet):
+class BookingViewSet(StreamingExportMixin, IdentityMapMixin, PrefetchPlanMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
+    export_filename = 'bookings'
 
     #
     # def get(self, request, *args, **kwargs):
@@ -73,8 +92,11 @@ class BookingViewSet(viewsets.ModelViewSet):
         - Если пользователь владелец листинга, используется LandlordBookingSerializer.
         - Если пользователь не владелец листинга, используется NotLandlordBookingSerializer.
         """
+        # Проверка для Swagger схемы: генерация идёт без пользователя и без БД
+        if getattr(self, 'swagger_fake_view', False):
+            return BookingSerializer
         listing_pk = self.kwargs.get("listing_pk")
-        if is_listing_owner(self.request.user, listing_pk):
+        if is_listing_owner(self.request.user, listing_pk, self.identity_map):
             return BookingSerializer  # Сериализатор для владельца
         return NotLandlordBookingSerializer  # Сериализатор для других пользователей
 
@@ -84,10 +106,12 @@ class BookingViewSet(viewsets.ModelViewSet):
         - Для владельца листинга возвращаются все бронирования этого листинга.
         - Для других пользователей возвращаются только их собственные бронирования.
         """
+        if getattr(self, 'swagger_fake_view', False):
+            return Booking.objects.none()
         listing_pk = self.kwargs.get("listing_pk")
         user = self.request.user
 
-        if is_listing_owner(user, listing_pk):
+        if is_listing_owner(user, listing_pk, self.identity_map):
             return Booking.objects.filter(listing__id=listing_pk)
         else:
             return Booking.objects.filter(owner=user, listing__id=listing_pk)
@@ -95,26 +119,23 @@ class BookingViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         """
         Создание бронирования с проверкой пересекающихся дат.
+        Проверка и запись выполняются под блокировкой строки объявления,
+        поэтому параллельные запросы на те же даты не создают двойных бронирований.
         """
         listing_pk = self.kwargs.get("listing_pk")
-        listing = get_object_or_404(Listing, id=listing_pk)
 
-        if is_listing_owner(self.request.user, listing_pk):
+        if is_listing_owner(self.request.user, listing_pk, self.identity_map):
             raise ValidationError("Владелец листинга не может создать бронирование для собственного объекта.")
 
         start_date = serializer.validated_data['start_date']
         end_date = serializer.validated_data['end_date']
 
-        overlapping_bookings = Booking.objects.filter(
-            listing=listing,
-            start_date__lt=end_date,
-            end_date__gt=start_date,
-            is_canceled=False
-        )
-        if overlapping_bookings.exists():
-            raise ValidationError("This listing is already booked for the selected dates.")
+        with lock_listing(listing_pk) as listing:
+            if has_overlapping_booking(listing.pk, start_date, end_date):
+                raise ValidationError("This listing is already booked for the selected dates.")
 
-        serializer.save(owner=self.request.user, listing=listing)
+            # Заблокированная строка свежее той, что была загружена для проверки прав
+            serializer.save(owner=self.request.user, listing=self.identity_map.add(listing))
 
     def partial_update(self, request, *args, **kwargs):
         """
@@ -128,7 +149,7 @@ class BookingViewSet(viewsets.ModelViewSet):
 
         # Разрешаем редактировать только поле `is_confirmed`
 
-        listings_owner = is_listing_owner(self.request.user, listing_pk=listings_pk)
+        listings_owner = is_listing_owner(self.request.user, listings_pk, self.identity_map)
         if listings_owner:
             serializer = self.get_serializer(booking, data=request.data, partial=True)
             serializer.is_valid(raise_exception=True)
@@ -146,22 +167,22 @@ class BookingViewSet(viewsets.ModelViewSet):
 
             # Проверяем, что пользователь может редактировать только определённые поля
             # Например: `start_date`, `end_date`
-            if 'start_date' in serializer.validated_data or 'end_date' in serializer.validated_data:
-                # Проверка пересечения дат, если пользователь изменяет даты
+            changes_dates = 'start_date' in serializer.validated_data or 'end_date' in serializer.validated_data
+            # Снятие отмены снова занимает даты
+            restores_booking = booking.is_canceled and serializer.validated_data.get('is_canceled') is False
+            if changes_dates or restores_booking:
+                # Проверка пересечения дат и сохранение под блокировкой объявления
                 start_date = serializer.validated_data.get('start_date', booking.start_date)
                 end_date = serializer.validated_data.get('end_date', booking.end_date)
+                is_canceled = serializer.validated_data.get('is_canceled', booking.is_canceled)
 
-                overlapping_bookings = Booking.objects.filter(
-                    listing=booking.listing,
-                    start_date__lt=end_date,
-                    end_date__gt=start_date,
-                    is_canceled=False
-                ).exclude(id=booking.id)
-
-                if overlapping_bookings.exists():
-                    raise ValidationError("Эти даты уже забронированы.")
-
-            serializer.save()
+                with lock_listing(booking.listing_id):
+                    if not is_canceled and has_overlapping_booking(
+                            booking.listing_id, start_date, end_date, exclude_pk=booking.pk):
+                        raise ValidationError("Эти даты уже забронированы.")
+                    serializer.save()
+            else:
+                serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -169,14 +190,88 @@ class BookingViewSet(viewsets.ModelViewSet):
         """
         Запрет на удаление бронирований, если пользователь не владелец бронирования.
         """
-        booking_pk = kwargs.get("pk")
-        if not is_booking_owner(request.user, booking_pk):
+        # get_object() кладёт бронирование в identity map, проверка владельца берёт его оттуда
+        booking = self.get_object()
+        if not is_booking_owner(request.user, booking.pk, self.identity_map):
             return Response(
                 {"error": "You are not allowed to delete this booking."},
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        return super().destroy(request, *args, **kwargs)
+        self.perform_destroy(booking)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class BookingBulkUpdateView(APIView):
+    """
+    Массовое подтверждение/отмена бронирований владельцем листингов.
+    POST /bookings/bulk/ {"ids": [...], "is_confirmed": true | false, "is_canceled": true}
+    - права на весь набор проверяются одним запросом (бронирования чужих листингов -> not_found);
+    - изменение применяется одним UPDATE с теми же условиями в одной транзакции с проверкой;
+    - в ответе статус по каждому id: updated, not_found или canceled
+      (отменённое бронирование нельзя подтвердить).
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser]
+
+    def post(self, request, *args, **kwargs):
+        serializer = BookingBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        changes = {
+            field: serializer.validated_data[field]
+            for field in ('is_confirmed', 'is_canceled') if field in serializer.validated_data
+        }
+
+        with transaction.atomic():
+            # Строки блокируются до конца транзакции (select_for_update): между проверкой
+            # и UPDATE бронирование не отменят и объявление не передадут другому владельцу
+            owned = {
+                row['id']: row for row in Booking.objects.select_for_update().filter(
+                    id__in=ids, listing__owner=request.user
+                ).values('id', 'listing_id', 'is_canceled', 'start_date', 'end_date')
+            }
+            statuses = {}
+            for booking_id in ids:
+                row = owned.get(booking_id)
+                if row is None:
+                    statuses[booking_id] = 'not_found'
+                elif changes.get('is_confirmed') and row['is_canceled'] and not changes.get('is_canceled'):
+                    statuses[booking_id] = 'canceled'
+                else:
+                    statuses[booking_id] = 'updated'
+
+            updated_ids = [booking_id for booking_id, result in statuses.items() if result == 'updated']
+            if updated_ids:
+                # Те же условия повторяются в UPDATE: без блокировки строк (SQLite) строку могли
+                # изменить после чтения, и чужое или отменённое бронирование не должно измениться
+                guard = {'listing__owner': request.user}
+                if changes.get('is_confirmed') and not changes.get('is_canceled'):
+                    guard['is_canceled'] = False
+                updated = Booking.objects.filter(id__in=updated_ids, **guard).update(**changes)
+                if updated != len(updated_ids):
+                    # После UPDATE запись БД за нами, поэтому повторное чтение точное
+                    matched = set(Booking.objects.filter(id__in=updated_ids, **guard).values_list('id', flat=True))
+                    canceled = set(Booking.objects.filter(
+                        id__in=updated_ids, listing__owner=request.user
+                    ).values_list('id', flat=True)) - matched
+                    for booking_id in updated_ids:
+                        if booking_id not in matched:
+                            statuses[booking_id] = 'canceled' if booking_id in canceled else 'not_found'
+                    updated_ids = [booking_id for booking_id in updated_ids if booking_id in matched]
+
+        if updated_ids and changes.get('is_canceled'):
+            # update() не вызывает сигналы, поэтому кэши поиска по датам и календаря сбрасываем сами
+            invalidate_for_booking()
+            for booking_id in updated_ids:
+                row = owned[booking_id]
+                availability_calendar.invalidate_months(row['listing_id'], (row['start_date'], row['end_date']))
+
+        return Response({
+            'updated': len(updated_ids),
+            'results': [{'id': booking_id, 'status': result} for booking_id, result in statuses.items()],
+        }, status=status.HTTP_200_OK)
+
+
 # class BookingViewSet(viewsets.ModelViewSet):
 #     serializer_class = BookingSerializer
 #     permission_classes = [IsAuthenticated]
@@ -1,27 +1,53 @@
+from datetime import date, timedelta
+
 from django.db.models import Avg
+from django.http import Http404
+from django.utils import timezone
+from django.utils.http import quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.exceptions import PermissionDenied
-from rest_framework.filters import OrderingFilter, SearchFilter
-from rest_framework.generics import ListAPIView
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.generics import ListAPIView, get_object_or_404
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.response import Response
+from rest_framework import status
 from rest_framework.viewsets import ModelViewSet
 
+from listings_app.filters import (
+    FullTextSearchFilter, MATCH_MODES, filter_available, filter_normalized, parse_rating, parse_stay_dates
+)
 from listings_app.models.listing import Listing
+from listings_app.pagination import ListingCursorPagination
 from listings_app.serializers.serializers import ListingSerializer, SearchQuerySerializer
+from listings_app.serializers.sparse import ValuesRowSerializer, get_requested_fields
+from listings_app.utils import availability_calendar, search_cache
+from listings_app.utils.conditional import get_representation, get_validator_headers, is_not_modified, make_etag
+from listings_app.utils.full_text_search import full_text_search
+from listings_app.utils.search_log import search_query_buffer
+from listings_app.utils.token_cache import verified_token_cache
+from listings_app.utils.user_cache import user_cache
+from listings_app.views.mixins import PrefetchPlanMixin, StreamingExportMixin
 
 
-class SearchListingListView(ModelViewSet):
+class SearchListingListView(StreamingExportMixin, PrefetchPlanMixin, ModelViewSet):
     permission_classes = [IsAuthenticated]
     serializer_class = ListingSerializer
     queryset = Listing.objects.all()
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ['price', 'location', 'rooms', 'property_type']
-    search_fields = ['title', 'description']
-    ordering_fields = ['-price', '-created_at', '-avg_rating']
+    pagination_class = ListingCursorPagination
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, OrderingFilter]
+    filterset_fields = ['price', 'rooms', 'property_type']
+    ordering_fields = ['price', 'created_at', 'avg_rating']
+    values_fast_path = True
+    values_ordering_fields = ['id', 'price', 'created_at', 'avg_rating']
+    export_filename = 'listings'
 
 
 
     def get_queryset(self):
+        # Проверка для Swagger схемы: генерация идёт без запроса
+        if getattr(self, 'swagger_fake_view', False):
+            return Listing.objects.none()
         user = self.request.user
         my_param = self.request.query_params.get('my', None)
 
@@ -36,6 +62,13 @@ class SearchListingListView(ModelViewSet):
         property_type = self.request.query_params.get('property_type')
         price_min = self.request.query_params.get('price_min')
         price_max = self.request.query_params.get('price_max')
+        rating_min = self.request.query_params.get('rating_min')
+        check_in = self.request.query_params.get('check_in')
+        check_out = self.request.query_params.get('check_out')
+        # Режим поиска по city/location: contains (по умолчанию), prefix или exact
+        match = self.request.query_params.get('match')
+        if match not in MATCH_MODES:
+            match = 'contains'
         if my_param and user.is_authenticated:
             # Вывод только объявлений текущего пользователя
            queryset =Listing.objects.filter(owner= user)
@@ -46,19 +79,23 @@ class SearchListingListView(ModelViewSet):
         if price_max is not None:
             queryset = queryset.filter(price__lte=price_max)
         if location:
-            queryset = queryset.filter(location__icontains=location)
+            queryset = filter_normalized(queryset, 'location', location, match)
         if city:
-            queryset = queryset.filter(city__icontains=city)
+            queryset = filter_normalized(queryset, 'city', city, match)
         if description:
-            queryset = queryset.filter(description__icontains=description)
+            queryset = full_text_search(queryset, description, columns=['description'])
         if title:
-            queryset = queryset.filter(title__icontains=title)
+            queryset = full_text_search(queryset, title, columns=['title'])
         if rooms_min is not None:
             queryset = queryset.filter(rooms__gte=rooms_min)
         if rooms_max is not None:
             queryset = queryset.filter(rooms__lte=rooms_max)
         if property_type:
             queryset = queryset.filter(property_type=property_type)
+        if rating_min is not None:
+            queryset = queryset.filter(avg_rating__gte=parse_rating(rating_min))
+        if check_in or check_out:
+            queryset = filter_available(queryset, *parse_stay_dates(check_in, check_out))
 
         if any([title, description, location, city, rooms_min, rooms_max, property_type, price_min, price_max]):
             search_query_data = {
@@ -78,7 +115,11 @@ class SearchListingListView(ModelViewSet):
             search_query_serializer = SearchQuerySerializer(data=search_query_data)
 
             if search_query_serializer.is_valid():
-                search_query_serializer.save()
+                # Запись в БД идёт пачками в фоне, а не в рамках этого запроса
+                search_query_buffer.add({
+                    **search_query_serializer.validated_data,
+                    'owner': user.pk if user.is_authenticated else None,
+                })
             else:
                 print(search_query_serializer.errors)
 
@@ -86,6 +127,148 @@ class SearchListingListView(ModelViewSet):
 
 
 
+    def list(self, request, *args, **kwargs):
+        """
+        Если в `?fields=` только поля-колонки (например, id,title,price,city,rooms),
+        список строится из .values() без создания моделей и ModelSerializer.
+        Иначе — обычный путь ModelViewSet.
+        ETag коллекции — без запроса к БД: сигнатура фильтров и версия записей
+        в объявления (и бронирования для поиска по датам) из кэша поиска.
+        На совпавший If-None-Match отвечаем 304 без выборки страницы и сериализации.
+        Чтение из реплики сразу после записи может вернуть старые данные — тогда
+        ETag не выдаём (тело могло не совпадать с текущей версией).
+        """
+        if self.is_export():
+            return self.get_export_response()
+
+        fast_path = self.get_values_fast_path()
+        if fast_path is None:
+            values_serializer, queryset = None, self.filter_queryset(self.get_queryset())
+        else:
+            values_serializer, queryset = fast_path
+
+        headers = {}
+        if not search_cache.may_be_stale():
+            params = search_cache.get_search_params(request)
+            etag = make_etag(
+                search_cache.get_signature(params), search_cache.get_collection_version(params),
+                get_representation(request),
+            )
+            headers = get_validator_headers(etag)
+            if is_not_modified(request, etag):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else queryset
+        if values_serializer is not None:
+            data = values_serializer.to_representation(rows)
+        else:
+            data = self.get_serializer(rows, many=True).data
+        response = self.get_paginated_response(data) if page is not None else Response(data)
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        ETag и Last-Modified объявления из update_at: сначала читаем одну колонку,
+        и если клиент прислал актуальный If-None-Match / If-Modified-Since —
+        304 без загрузки объекта и сериализации.
+        """
+        lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        # get_object_or_404 DRF: нечисловой id (ValueError) — тоже 404, а не 500
+        last_update = get_object_or_404(
+            self.filter_queryset(self.get_queryset()).values_list('update_at', flat=True),
+            **{self.lookup_field: lookup},
+        )
+
+        etag = make_etag(lookup, last_update.isoformat(), get_representation(request))
+        headers = get_validator_headers(etag, last_update)
+        if is_not_modified(request, etag, last_update):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        # Если объект изменится между запросами, ETag окажется старше тела —
+        # клиент просто получит 200 при следующей проверке
+        response = super().retrieve(request, *args, **kwargs)
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    def get_values_fast_path(self):
+        """
+        (ValuesRowSerializer, queryset.values(...)) для быстрого пути или None,
+        если запрошены поля, которые нельзя прочитать колонками.
+        """
+        serializer = self.get_serializer()
+        if (not self.values_fast_path or get_requested_fields(self.request) is None
+                or not ValuesRowSerializer.supports(serializer, Listing)):
+            return None
+
+        values_serializer = ValuesRowSerializer(serializer, Listing)
+        queryset = self.filter_queryset(self.get_queryset()).select_related(None).prefetch_related(None)
+        # Поля сортировки нужны пагинации для позиции курсора
+        lookups = set(values_serializer.get_lookups()) | set(self.values_ordering_fields)
+        if 'search_rank' in queryset.query.annotations:
+            lookups.add('search_rank')
+        return values_serializer, queryset.values(*lookups)
+
+    calendar_default_days = 60
+    calendar_max_days = 366
+
+    def _get_calendar_window(self):
+        try:
+            start = date.fromisoformat(self.request.query_params.get('from') or timezone.now().date().isoformat())
+            end = self.request.query_params.get('to')
+            end = date.fromisoformat(end) if end else start + timedelta(days=self.calendar_default_days)
+        except ValueError:
+            raise ValidationError('from and to must be dates in YYYY-MM-DD format.')
+        if start >= end:
+            raise ValidationError('from must be before to.')
+        if (end - start).days > self.calendar_max_days:
+            raise ValidationError(f'The calendar window can not exceed {self.calendar_max_days} days.')
+        return start, end
+
+    @action(detail=True, methods=['get'], url_path='calendar')
+    def calendar(self, request, pk=None):
+        """
+        Занятость объявления по дням: /listings/<pk>/calendar/?from=2025-01-01&to=2025-03-01
+        (to не включается, по умолчанию 60 дней от from).
+        - days: строка по дню на символ, '1' — занято (бронь или вне available_from/until), '0' — свободно;
+        - unavailable: те же занятые дни периодами [start, end).
+        Месяцы кэшируются и сбрасываются при изменении бронирований; повторный запрос
+        с If-None-Match получает 304 без обращения к БД.
+        """
+        try:
+            pk = int(pk)
+        except ValueError:
+            raise Http404('Listing not found.')
+        start, end = self._get_calendar_window()
+        days = availability_calendar.get_occupancy(pk, start, end)
+        etag = quote_etag(availability_calendar.get_etag(pk, start, end, days))
+        headers = get_validator_headers(etag)
+        if is_not_modified(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        return Response({
+            'listing': pk,
+            'from': start,
+            'to': end,
+            'days': days,
+            'unavailable': availability_calendar.get_busy_ranges(start, days),
+        }, headers=headers)
+
+    @action(detail=False, methods=['get'], url_path='cache-stats', permission_classes=[IsAdminUser])
+    def cache_stats(self, request):
+        """
+        Счётчики попаданий/промахов кэша результатов поиска (для подбора TTL),
+        а также кэшей проверенных токенов и пользователей этого процесса.
+        """
+        return Response({
+            **search_cache.get_stats(),
+            'verified_tokens': verified_token_cache.get_stats(),
+            'users': user_cache.get_stats(),
+        })
+
     def perform_create(self, serializer):
         """
         Устанавливаем владельцем текущего пользователя при создании объявления.
@@ -96,8 +279,8 @@ class SearchListingListView(ModelViewSet):
         """
         Проверяем, что текущий пользователь — владелец объявления перед обновлением.
         """
-        listing = self.get_object()
-        if listing.owner != self.request.user:
+        # Объект уже загружен в update(), второй get_object() не нужен
+        if serializer.instance.owner_id != self.request.user.pk:
             raise PermissionDenied("Вы не можете редактировать это объявление.")
         serializer.save()
 
@@ -105,6 +288,6 @@ class SearchListingListView(ModelViewSet):
         """
         Проверяем, что текущий пользователь — владелец объявления перед удалением.
         """
-        if instance.owner != self.request.user:
+        if instance.owner_id != self.request.user.pk:
             raise PermissionDenied("Вы не можете удалить это объявление.")
         instance.delete()
\ No newline at end of file
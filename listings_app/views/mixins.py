@@ -0,0 +1,106 @@
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+from listings_app.renderers import CSVRenderer, NDJSONRenderer
+from listings_app.utils.identity_map import get_identity_map
+from listings_app.utils.prefetch_planner import get_prefetch_plan
+
+
+class PrefetchPlanMixin:
+    """
+    Добавляет к queryset представления select_related/prefetch_related,
+    выведенные из полей сериализатора, чтобы список любого размера
+    обслуживался постоянным числом запросов.
+    Подключается через filter_queryset, поэтому работает и с собственным get_queryset.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        plan = get_prefetch_plan(self.get_serializer_class(), queryset.model)
+        return plan.apply(queryset)
+
+
+class IdentityMapMixin:
+    """
+    Общая для запроса карта объектов (см. utils.identity_map).
+    get_object() выполняет запрос один раз и кладёт объект в карту,
+    повторные вызовы из perform_update/проверок прав возвращают тот же экземпляр.
+    """
+
+    @property
+    def identity_map(self):
+        return get_identity_map(self.request)
+
+    def get_object(self):
+        instance = getattr(self, '_object', None)
+        if instance is None:
+            instance = self._object = self.identity_map.add(super().get_object())
+        return instance
+
+
+class StreamingExportMixin:
+    """
+    Выгрузка всего отфильтрованного набора list() без пагинации:
+    ?format=ndjson|csv (или Accept: application/x-ndjson / text/csv).
+    - тело пишется StreamingHttpResponse пачками по export_chunk_size строк;
+    - пачки выбираются по первичному ключу (pk > последнего), а не одним курсором:
+      память постоянна при любом числе строк и на любом драйвере, соединение
+      не держит открытый курсор, пока медленный клиент скачивает файл;
+    - первая пачка маленькая (export_first_chunk_size), первый байт уходит сразу;
+    - под ASGI тело — асинхронный итератор, иначе Django собрал бы его в память целиком.
+    Порядок выгрузки — по pk (?ordering= не учитывается).
+    Представления со своим list() вызывают get_export_response() в его начале.
+    """
+    export_renderer_classes = (NDJSONRenderer, CSVRenderer)
+    export_chunk_size = 1000
+    export_first_chunk_size = 100
+    export_filename = 'export'
+
+    def get_renderers(self):
+        return [*super().get_renderers(), *(renderer() for renderer in self.export_renderer_classes)]
+
+    def is_export(self):
+        return isinstance(self.request.accepted_renderer, self.export_renderer_classes)
+
+    def list(self, request, *args, **kwargs):
+        if self.is_export():
+            return self.get_export_response()
+        return super().list(request, *args, **kwargs)
+
+    def get_export_response(self):
+        renderer = self.request.accepted_renderer
+        queryset = self.filter_queryset(self.get_queryset()).order_by('pk')
+        fields = [name for name, field in self.get_serializer().fields.items() if not field.write_only]
+        if isinstance(self.request._request, ASGIRequest):
+            content = self._aiter_export(queryset, renderer, fields)
+        else:
+            content = self._iter_export(queryset, renderer, fields)
+        response = StreamingHttpResponse(content, content_type=f'{renderer.media_type}; charset={renderer.charset}')
+        response['Content-Disposition'] = f'attachment; filename="{self.export_filename}.{renderer.format}"'
+        return response
+
+    def _render_chunk(self, queryset, renderer, fields, last_pk):
+        """(байты пачки, pk её последней строки); (b'', None), когда строки закончились."""
+        if last_pk is None:
+            batch = list(queryset[:self.export_first_chunk_size])
+        else:
+            batch = list(queryset.filter(pk__gt=last_pk)[:self.export_chunk_size])
+        if not batch:
+            return b'', None
+        return renderer.render_rows(self.get_serializer(batch, many=True).data, fields), batch[-1].pk
+
+    def _iter_export(self, queryset, renderer, fields):
+        yield renderer.render_header(fields)
+        chunk, last_pk = self._render_chunk(queryset, renderer, fields, None)
+        while last_pk is not None:
+            yield chunk
+            chunk, last_pk = self._render_chunk(queryset, renderer, fields, last_pk)
+
+    async def _aiter_export(self, queryset, renderer, fields):
+        render_chunk = sync_to_async(self._render_chunk)
+        yield renderer.render_header(fields)
+        chunk, last_pk = await render_chunk(queryset, renderer, fields, None)
+        while last_pk is not None:
+            yield chunk
+            chunk, last_pk = await render_chunk(queryset, renderer, fields, last_pk)
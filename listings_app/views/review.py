@@ -1,4 +1,4 @@
-from django.shortcuts import get_object_or_404
+from django.db import transaction
 from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 from rest_framework.generics import ListCreateAPIView
@@ -6,20 +6,26 @@ from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from listings_app.models import Listing, Review, Booking
 from listings_app.permissions import IsNotLandlordForCreate
 from listings_app.serializers.review import ReviewSerializer
+from listings_app.utils.search_cache import get_listing_snapshot, invalidate_for_listing
+from listings_app.views.mixins import IdentityMapMixin, PrefetchPlanMixin, StreamingExportMixin
 
 
-class ListingReviewView(ListCreateAPIView):
+class ListingReviewView(StreamingExportMixin, IdentityMapMixin, PrefetchPlanMixin, ListCreateAPIView):
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthenticatedOrReadOnly, IsNotLandlordForCreate]
+    export_filename = 'reviews'
 
 
     def get_queryset(self):
+        # Проверка для Swagger схемы
+        if getattr(self, 'swagger_fake_view', False):
+            return Review.objects.none()
         listing_slug = self.kwargs['listing_pk']
-        listing = get_object_or_404(Listing, id=listing_slug)
+        listing = self.identity_map.get(Listing, listing_slug)
         return Review.objects.filter(listing=listing)
 
     def perform_create(self, serializer):
-        listing = get_object_or_404(Listing, id=self.kwargs['listing_pk'])
+        listing = self.identity_map.get(Listing, self.kwargs['listing_pk'])
         booking_exists = Booking.objects.filter(
             listing=listing,
             owner=self.request.user,
@@ -27,6 +33,10 @@ class ListingReviewView(ListCreateAPIView):
             end_date__lt=timezone.now().date()
         ).exists()
         if booking_exists:
-            serializer.save(listing=listing, user=self.request.user)
+            with transaction.atomic():
+                review = serializer.save(listing=listing, user=self.request.user)
+                Listing.add_rating(listing.pk, review.rating)
+            listing.refresh_from_db(fields=['avg_rating', 'rating_sum', 'rating_count'])
+            invalidate_for_listing(listing._search_snapshot, get_listing_snapshot(listing))
         else:
             raise ValidationError("You have not permissions to add review now")
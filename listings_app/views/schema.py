@@ -0,0 +1,59 @@
+import re
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_safe
+
+from listings_app.utils.openapi_schema import schema_store
+
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+
+
+@require_safe
+def openapi_schema(request, format='.json'):
+    """
+    /api/swagger.json и /api/swagger.yaml из готовой схемы (см. utils.openapi_schema):
+    без интроспекции представлений, с ETag (304 на If-None-Match) и gzip.
+    """
+    document = schema_store.get(format)
+    # Слабый ETag: сжатое и несжатое тело — одно представление
+    etag = f'W/"{document.etag}"'
+    headers = {
+        'ETag': etag,
+        'Cache-Control': 'public, no-cache',
+        'Vary': 'Accept-Encoding',
+    }
+
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        etags = {value.removeprefix('W/') for value in parse_etags(if_none_match)}
+        if f'"{document.etag}"' in etags or '*' in etags:
+            return HttpResponseNotModified(headers=headers)
+
+    if ACCEPTS_GZIP.search(request.headers.get('Accept-Encoding', '')):
+        response = HttpResponse(document.gzipped, content_type=document.content_type, headers=headers)
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(document.content, content_type=document.content_type, headers=headers)
+    return response
+
+
+_ui_views = {}
+
+
+def schema_ui(request, renderer):
+    """
+    Страницы Swagger UI / ReDoc. drf_yasg импортируется при первом открытии,
+    сама схема загружается страницей с /api/swagger.json (SPEC_URL).
+    """
+    view = _ui_views.get(renderer)
+    if view is None:
+        from drf_yasg.views import get_schema_view
+        from rest_framework.permissions import AllowAny
+
+        from listings_app.utils.openapi_info import API_INFO
+
+        view = _ui_views[renderer] = get_schema_view(
+            API_INFO, public=True, permission_classes=(AllowAny,)
+        ).with_ui(renderer, cache_timeout=0)
+    return view(request)
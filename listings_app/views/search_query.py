@@ -1,15 +1,65 @@
+from django.db.models import Sum
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.generics import ListAPIView
 from rest_framework.permissions import IsAuthenticated
 
 from listings_app.models.search_query import SearchQuery
-from listings_app.serializers.serializers import SearchQuerySerializer
+from listings_app.models.search_query_rollup import SearchQueryRollup
+from listings_app.serializers.serializers import PopularSearchQuerySerializer, SearchQuerySerializer
+from listings_app.utils.text_normalization import normalize_text
+from listings_app.views.mixins import PrefetchPlanMixin
 from rest_framework import generics, filters
 
-class SearchQueryListView(ListAPIView):
+class SearchQueryListView(PrefetchPlanMixin, ListAPIView):
     serializer_class = SearchQuerySerializer
     permissions = [IsAuthenticated]
 
 
     def get_queryset(self):
         return SearchQuery.objects.filter(owner=self.request.user)
+
+
+class PopularSearchQueryListView(ListAPIView):
+    """
+    Топ поисковых запросов за последние `hours` часов или `days` дней (по умолчанию 7 дней).
+    Читает только агрегаты SearchQueryRollup, а не всю таблицу SearchQuery.
+    /?days=7&city=Berlin&limit=10
+    """
+    serializer_class = PopularSearchQuerySerializer
+    permission_classes = [IsAuthenticated]
+    default_limit = 10
+    max_limit = 100
+
+    def _get_positive_int(self, name, default, maximum):
+        try:
+            value = int(self.request.query_params.get(name, default))
+        except (TypeError, ValueError):
+            return default
+        return min(max(value, 1), maximum)
+
+    def get_queryset(self):
+        if 'hours' in self.request.query_params:
+            period = SearchQueryRollup.HOUR
+            size = self._get_positive_int('hours', 24, 24 * 7)
+        else:
+            period = SearchQueryRollup.DAY
+            size = self._get_positive_int('days', 7, 366)
+
+        queryset = SearchQueryRollup.objects.filter(
+            period=period,
+            bucket_start__gte=SearchQueryRollup.get_window_start(timezone.now(), period, size),
+        )
+        city = normalize_text(self.request.query_params.get('city'))
+        if city:
+            queryset = queryset.filter(city=city)
+        property_type = self.request.query_params.get('property_type')
+        if property_type:
+            queryset = queryset.filter(property_type=property_type)
+
+        limit = self._get_positive_int('limit', self.default_limit, self.max_limit)
+        return (
+            queryset.values('filter_hash', *SearchQueryRollup.FILTER_FIELDS)
+            .annotate(total=Sum('count'))
+            .order_by('-total')[:limit]
+        )